@@ -12,3 +12,29 @@ UPLOAD_DIR = ROOT_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
 FRONTEND_BUILD_DIR = PARENT_DIR / "frontend" / "build"
+
+SLA_CHECK_INTERVAL_SECONDS = int(os.environ.get('SLA_CHECK_INTERVAL_SECONDS', '60'))
+SLA_AT_RISK_FRACTION = float(os.environ.get('SLA_AT_RISK_FRACTION', '0.25'))
+# Each worker rebuilds its SLA monitor from the database this often, to pick up other workers' writes
+SLA_RELOAD_INTERVAL_SECONDS = int(os.environ.get('SLA_RELOAD_INTERVAL_SECONDS', '300'))
+PARTS_INDEX_MAX_AGE_SECONDS = int(os.environ.get('PARTS_INDEX_MAX_AGE_SECONDS', '300'))
+
+BATCH_MAX_OPERATIONS = int(os.environ.get('BATCH_MAX_OPERATIONS', '25'))
+BATCH_CONCURRENCY = int(os.environ.get('BATCH_CONCURRENCY', '8'))
+
+SYNC_PAGE_SIZE = int(os.environ.get('SYNC_PAGE_SIZE', '500'))
+SYNC_OVERLAP_SECONDS = int(os.environ.get('SYNC_OVERLAP_SECONDS', '10'))
+
+# "memory" keeps Idempotency-Key records per process; "database" shares them via the idempotency_keys table
+IDEMPOTENCY_STORE = os.environ.get('IDEMPOTENCY_STORE', 'memory')
+IDEMPOTENCY_TTL_SECONDS = int(os.environ.get('IDEMPOTENCY_TTL_SECONDS', '86400'))
+IDEMPOTENCY_MAX_KEYS = int(os.environ.get('IDEMPOTENCY_MAX_KEYS', '10000'))
+
+# Raw engineer_locations partitions older than this many months are rolled up and dropped
+LOCATION_RETENTION_MONTHS = int(os.environ.get('LOCATION_RETENTION_MONTHS', '6'))
+LOCATION_RETENTION_INTERVAL_SECONDS = int(os.environ.get('LOCATION_RETENTION_INTERVAL_SECONDS', '21600'))
+# First run is delayed by this plus up to as much again, so restarted workers do not all run it at once
+LOCATION_RETENTION_INITIAL_DELAY_SECONDS = int(os.environ.get('LOCATION_RETENTION_INITIAL_DELAY_SECONDS', '300'))
+
+# GET /metrics requires 'Authorization: Bearer <METRICS_TOKEN>'; it is disabled while unset
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN')
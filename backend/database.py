@@ -2,12 +2,101 @@ from supabase import create_client, Client
 from dotenv import load_dotenv
 from pathlib import Path
 import os
+import time
+
+from metrics import record_db_query
 
 ROOT_DIR = Path(__file__).parent
 PARENT_DIR = ROOT_DIR.parent
 load_dotenv(PARENT_DIR / '.env')
 
-supabase: Client = create_client(
+# Builder methods that pick the operation label for a table query
+QUERY_OPERATIONS = {"select", "insert", "update", "upsert", "delete"}
+
+
+class InstrumentedQuery:
+    """Wraps a postgrest query builder so that execute() is timed and counted."""
+
+    def __init__(self, builder, table: str, operation: str):
+        self._builder = builder
+        self._table = table
+        self._operation = operation
+
+    def __getattr__(self, name):
+        attr = getattr(self._builder, name)
+        if hasattr(attr, "execute"):
+            # Properties such as not_ return the next builder directly
+            return InstrumentedQuery(attr, self._table, self._operation)
+        if not callable(attr):
+            return attr
+
+        def call(*args, **kwargs):
+            result = attr(*args, **kwargs)
+            if hasattr(result, "execute"):
+                operation = name if name in QUERY_OPERATIONS else self._operation
+                return InstrumentedQuery(result, self._table, operation)
+            return result
+        return call
+
+    def execute(self):
+        start = time.perf_counter()
+        failed = True
+        try:
+            response = self._builder.execute()
+            failed = False
+            return response
+        finally:
+            record_db_query(self._table, self._operation, time.perf_counter() - start, failed)
+
+
+class InstrumentedClient:
+    """Supabase client whose table() and rpc() queries report to the Prometheus metrics."""
+
+    def __init__(self, client: Client):
+        self._client = client
+
+    def table(self, name: str) -> InstrumentedQuery:
+        return InstrumentedQuery(self._client.table(name), name, "select")
+
+    def rpc(self, fn: str, params: dict = None, **kwargs) -> InstrumentedQuery:
+        return InstrumentedQuery(self._client.rpc(fn, params, **kwargs), fn, "rpc")
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+
+supabase = InstrumentedClient(create_client(
     os.environ.get('SUPABASE_URL') or os.environ.get('SUPERBASE_URL'),
     os.environ.get('SUPABASE_KEY') or os.environ.get('SUPERBASE_KEY')
-)
+))
+
+
+def iter_pages(table: str, columns: str = '*', page_size: int = 1000, filters=None, key: str = 'id'):
+    """
+    Yield a table's rows page by page in `key` order using keyset pagination.
+    `columns` must include the key column; `filters` is an optional callable applied to each page query.
+    """
+    last_key = None
+    while True:
+        query = supabase.table(table).select(columns)
+        if filters:
+            query = filters(query)
+        if last_key is not None:
+            query = query.gt(key, last_key)
+        rows = query.order(key).limit(page_size).execute().data or []
+        if not rows:
+            return
+        yield rows
+        if len(rows) < page_size:
+            return
+        last_key = rows[-1][key]
+
+
+# Keep in_() filters short enough for the request URL
+IN_FILTER_BATCH_SIZE = 200
+
+
+def batched(values: list, size: int = IN_FILTER_BATCH_SIZE):
+    """Yield successive slices of `values`, e.g. to split ids across several in_() queries."""
+    for start in range(0, len(values), size):
+        yield values[start:start + size]
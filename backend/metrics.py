@@ -0,0 +1,152 @@
+import os
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    REGISTRY,
+    generate_latest,
+)
+
+UNMATCHED_ROUTE = "unmatched"
+
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time to serve a request, by route template.",
+    ["method", "route"],
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "Requests served, by route template and status code.",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "Requests currently being served.",
+    ["method"],
+    multiprocess_mode="livesum",
+)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "Supabase calls made while serving one request.",
+    ["method", "route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100, 200),
+)
+HTTP_REQUEST_DB_SECONDS = Histogram(
+    "http_request_db_seconds",
+    "Time spent waiting on Supabase while serving one request.",
+    ["method", "route"],
+)
+DB_QUERY_DURATION = Histogram(
+    "db_query_duration_seconds",
+    "Supabase call round-trip time, by table (or rpc function) and operation.",
+    ["table", "operation"],
+)
+DB_QUERY_ERRORS = Counter(
+    "db_query_errors_total",
+    "Supabase calls that raised, by table (or rpc function) and operation.",
+    ["table", "operation"],
+)
+PDF_RENDER_DURATION = Histogram(
+    "pdf_render_duration_seconds",
+    "Time to render a PDF document.",
+    ["document"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+UPLOAD_SIZE = Histogram(
+    "upload_size_bytes",
+    "Size of uploaded request payloads.",
+    ["kind"],
+    buckets=(1e3, 1e4, 1e5, 5e5, 1e6, 5e6, 1e7, 5e7),
+)
+
+# Database time for the request being served; set by MetricsMiddleware, added to by
+# the instrumented Supabase client. Worker threads started from a request share it.
+_request_db_usage: ContextVar[Optional[list]] = ContextVar("request_db_usage", default=None)
+
+
+def record_db_query(table: str, operation: str, seconds: float, failed: bool = False):
+    DB_QUERY_DURATION.labels(table, operation).observe(seconds)
+    if failed:
+        DB_QUERY_ERRORS.labels(table, operation).inc()
+    usage = _request_db_usage.get()
+    if usage is not None:
+        usage[0] += 1
+        usage[1] += seconds
+
+
+def record_upload(kind: str, size: int):
+    UPLOAD_SIZE.labels(kind).observe(size)
+
+
+def _route_template(scope) -> str:
+    """
+    The full path template of the route that handled the request, to keep label values
+    bounded. scope["route"] is the route as declared on its router, and its path lacks
+    the prefixes of the routers it was included into (/api/jobs/abc matches
+    "/jobs/{job_id}"), so the literal part of the request path in front of what the
+    route matched is put back.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path", None)
+    if not template:
+        return UNMATCHED_ROUTE
+    path = scope.get("path", "")
+    path_regex = getattr(route, "path_regex", None)
+    if path_regex is not None:
+        for i, char in enumerate(path):
+            if char == "/" and path_regex.match(path[i:]):
+                return path[:i] + template
+    return template
+
+
+class MetricsMiddleware:
+    """Records latency, in-flight count, status and database usage for every HTTP request."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        method = scope["method"]
+        status = 500
+        usage = [0, 0.0]
+        token = _request_db_usage.set(usage)
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        in_flight = HTTP_REQUESTS_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router records the matched route in the scope
+            route = _route_template(scope)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(time.perf_counter() - start)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_REQUEST_DB_QUERIES.labels(method, route).observe(usage[0])
+            HTTP_REQUEST_DB_SECONDS.labels(method, route).observe(usage[1])
+            in_flight.dec()
+            _request_db_usage.reset(token)
+
+
+def render_metrics():
+    """Metrics in the Prometheus text format, merged across workers in multiprocess mode."""
+    registry = REGISTRY
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    return generate_latest(registry), CONTENT_TYPE_LATEST
@@ -1,13 +1,15 @@
 from models.auth import UserCreate, UserLogin, UserResponse
 from models.customer import CustomerCreate, CustomerResponse, SiteCreate, SiteResponse
 from models.asset import AssetCreate, AssetResponse
-from models.job import JobCreate, JobUpdate, JobResponse, ChecklistItemCreate, JobCompletionCreate
+from models.job import JobCreate, JobUpdate, JobBulkUpdate, JobBulkUpdateItem, JobResponse, ChecklistItemCreate, JobCompletionCreate
 from models.invoice import QuoteCreate, QuoteResponse, InvoiceCreate, InvoiceResponse, PartCreate, PartResponse
+from models.batch import BatchOperation, BatchRequest, BatchOperationResult
 
 __all__ = [
     "UserCreate", "UserLogin", "UserResponse",
     "CustomerCreate", "CustomerResponse", "SiteCreate", "SiteResponse",
     "AssetCreate", "AssetResponse",
-    "JobCreate", "JobUpdate", "JobResponse", "ChecklistItemCreate", "JobCompletionCreate",
+    "JobCreate", "JobUpdate", "JobBulkUpdate", "JobBulkUpdateItem", "JobResponse", "ChecklistItemCreate", "JobCompletionCreate",
     "QuoteCreate", "QuoteResponse", "InvoiceCreate", "InvoiceResponse", "PartCreate", "PartResponse",
+    "BatchOperation", "BatchRequest", "BatchOperationResult",
 ]
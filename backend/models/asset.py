@@ -33,6 +33,7 @@ class AssetResponse(BaseModel):
     warranty_expiry: str
     refrigerant_type: str
     refrigerant_charge: str
+    refrigerant_charge_kg: Optional[float] = None
     pm_interval_months: int
     last_service_date: Optional[str]
     next_pm_due: Optional[str]
@@ -0,0 +1,21 @@
+from pydantic import BaseModel
+from typing import List, Optional, Dict, Any
+
+
+class BatchOperation(BaseModel):
+    id: str
+    method: str = "GET"
+    path: str
+    body: Optional[Any] = None
+    depends_on: List[str] = []
+
+
+class BatchRequest(BaseModel):
+    operations: List[BatchOperation]
+
+
+class BatchOperationResult(BaseModel):
+    id: str
+    status: int
+    body: Optional[Any] = None
+    headers: Dict[str, str] = {}
@@ -63,6 +63,7 @@ class PartCreate(BaseModel):
     unit_price: float
     stock_quantity: int = 0
     min_stock_level: int = 5
+    lead_time_days: int = 7
 
 
 class PartResponse(BaseModel):
@@ -74,4 +75,5 @@ class PartResponse(BaseModel):
     unit_price: float
     stock_quantity: int
     min_stock_level: int
+    lead_time_days: Optional[int] = 7
     created_at: str
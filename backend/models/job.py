@@ -23,6 +23,19 @@ class JobUpdate(BaseModel):
     scheduled_time: Optional[str] = None
     notes: Optional[str] = None
     priority: Optional[str] = None
+    # Required: update_job answers 428 without it rather than overwriting blindly
+    version: Optional[int] = None
+
+
+class JobBulkUpdateItem(BaseModel):
+    job_id: str
+    assigned_engineer_id: Optional[str] = None
+    scheduled_date: Optional[str] = None
+    scheduled_time: Optional[str] = None
+
+
+class JobBulkUpdate(BaseModel):
+    items: List[JobBulkUpdateItem]
 
 
 class JobResponse(BaseModel):
@@ -43,6 +56,7 @@ class JobResponse(BaseModel):
     sla_hours: Optional[int]
     created_at: str
     updated_at: str
+    version: int = 1
 
 
 class ChecklistItemCreate(BaseModel):
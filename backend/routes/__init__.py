@@ -12,6 +12,11 @@ from routes.pm import router as pm_router
 from routes.portal import router as portal_router
 from routes.fgas import router as fgas_router
 from routes.locations import router as locations_router
+from routes.search import router as search_router
+from routes.export import router as export_router
+from routes.imports import router as import_router
+from routes.batch import router as batch_router
+from routes.sync import router as sync_router
 
 __all__ = [
     "auth_router", "users_router",
@@ -28,4 +33,9 @@ __all__ = [
     "portal_router",
     "fgas_router",
     "locations_router",
+    "search_router",
+    "export_router",
+    "import_router",
+    "batch_router",
+    "sync_router",
 ]
@@ -6,6 +6,9 @@ from datetime import datetime, timezone, timedelta
 from database import supabase
 from models.asset import AssetCreate, AssetResponse
 from services.auth import get_current_user
+from services.pm_schedule import next_pm_due_from
+from services.refrigerants import fgas_fields_for
+from services.cache import forecast_cache
 
 router = APIRouter(prefix="/assets", tags=["assets"])
 
@@ -15,13 +18,7 @@ async def create_asset(data: AssetCreate, user: dict = Depends(get_current_user)
     asset_id = str(uuid.uuid4())
     now = datetime.now(timezone.utc)
     
-    next_pm_due = None
-    if data.install_date:
-        try:
-            install = datetime.fromisoformat(data.install_date.replace('Z', '+00:00'))
-            next_pm_due = (install + timedelta(days=data.pm_interval_months * 30)).isoformat()
-        except ValueError:
-            pass
+    next_pm_due = next_pm_due_from(data.install_date, data.pm_interval_months)
     
     fgas_next_leak_check_due = None
     if data.install_date and data.fgas_leak_check_interval:
@@ -34,6 +31,7 @@ async def create_asset(data: AssetCreate, user: dict = Depends(get_current_user)
     doc = {
         "id": asset_id,
         **data.model_dump(),
+        **fgas_fields_for(data.refrigerant_type, data.refrigerant_charge, data.fgas_co2_equivalent, data.fgas_category),
         "last_service_date": None,
         "next_pm_due": next_pm_due,
         "fgas_last_leak_check": None,
@@ -41,6 +39,7 @@ async def create_asset(data: AssetCreate, user: dict = Depends(get_current_user)
         "created_at": now.isoformat()
     }
     supabase.table('assets').insert(doc).execute()
+    forecast_cache.invalidate()
     return {**doc, "id": asset_id}
 
 
@@ -70,10 +69,21 @@ async def get_asset(asset_id: str, user: dict = Depends(get_current_user)):
 
 @router.put("/{asset_id}", response_model=AssetResponse)
 async def update_asset(asset_id: str, data: AssetCreate, user: dict = Depends(get_current_user)):
-    response = supabase.table('assets').update(data.model_dump()).eq('id', asset_id).execute()
+    update_data = {
+        **data.model_dump(),
+        **fgas_fields_for(data.refrigerant_type, data.refrigerant_charge, data.fgas_co2_equivalent, data.fgas_category)
+    }
+    response = supabase.table('assets').update(update_data).eq('id', asset_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Asset not found")
-    return response.data[0]
+    asset = response.data[0]
+    
+    next_pm_due = next_pm_due_from(asset.get("last_service_date") or asset.get("install_date"), asset.get("pm_interval_months"))
+    if next_pm_due and next_pm_due != asset.get("next_pm_due"):
+        response = supabase.table('assets').update({"next_pm_due": next_pm_due}).eq('id', asset_id).execute()
+        asset = response.data[0]
+    forecast_cache.invalidate()
+    return asset
 
 
 @router.delete("/{asset_id}")
@@ -81,10 +91,13 @@ async def delete_asset(asset_id: str, user: dict = Depends(get_current_user)):
     response = supabase.table('assets').delete().eq('id', asset_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Asset not found")
+    forecast_cache.invalidate()
     return {"message": "Asset deleted"}
 
 
 @router.get("/{asset_id}/history")
 async def get_asset_history(asset_id: str, user: dict = Depends(get_current_user)):
-    response = supabase.table('jobs').select('*').contains('asset_ids', [asset_id]).order('created_at', desc=True).limit(100).execute()
+    response = supabase.table('jobs').select('*, job_assets!inner(asset_id)').eq('job_assets.asset_id', asset_id).order('created_at', desc=True).limit(100).execute()
+    for job in response.data:
+        job.pop('job_assets', None)
     return response.data
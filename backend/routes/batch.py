@@ -0,0 +1,17 @@
+from fastapi import APIRouter, Depends, Request
+from typing import List
+
+from models.batch import BatchRequest, BatchOperationResult
+from services.auth import get_current_user
+from services.batch import run_batch
+
+router = APIRouter(prefix="/batch", tags=["batch"])
+
+
+@router.post("", response_model=List[BatchOperationResult])
+async def batch(data: BatchRequest, request: Request, user: dict = Depends(get_current_user)):
+    """
+    Run several API calls in one round trip. Each operation's path is relative to /api;
+    operations without depends_on run concurrently, dependent ones after their dependencies.
+    """
+    return await run_batch(request.app, data.operations, request.scope["headers"], user)
@@ -0,0 +1,111 @@
+from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
+from typing import Optional
+
+from database import iter_pages
+from models.asset import AssetResponse
+from models.invoice import InvoiceResponse, QuoteResponse
+from models.job import JobResponse
+from services.auth import get_user_from_token_param
+from services.export import csv_stream, ndjson_stream, NDJSON_MEDIA_TYPE
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+EXPORT_PAGE_SIZE = 1000
+
+# entity -> (response model whose fields are the exportable columns, filter param -> column)
+EXPORT_ENTITIES = {
+    "jobs": (JobResponse, {
+        "status": "status",
+        "priority": "priority",
+        "engineer_id": "assigned_engineer_id",
+        "customer_id": "customer_id",
+        "site_id": "site_id",
+        "job_type": "job_type",
+    }),
+    "invoices": (InvoiceResponse, {
+        "status": "status",
+        "customer_id": "customer_id",
+        "site_id": "site_id",
+    }),
+    "quotes": (QuoteResponse, {
+        "status": "status",
+        "customer_id": "customer_id",
+        "site_id": "site_id",
+    }),
+    "assets": (AssetResponse, {
+        "site_id": "site_id",
+    }),
+}
+
+
+@router.get("/{entity}")
+async def export_entity(
+    entity: str,
+    format: str = "csv",
+    columns: Optional[str] = None,
+    status: Optional[str] = None,
+    priority: Optional[str] = None,
+    engineer_id: Optional[str] = None,
+    customer_id: Optional[str] = None,
+    site_id: Optional[str] = None,
+    job_type: Optional[str] = None,
+    created_from: Optional[str] = None,
+    created_to: Optional[str] = None,
+    user: dict = Depends(get_user_from_token_param)
+):
+    """
+    Stream every matching row as CSV or NDJSON. Rows are fetched with keyset pages on id
+    and written as each page arrives, so memory use does not grow with the export size.
+    """
+    if entity not in EXPORT_ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown export entity; use one of: {', '.join(EXPORT_ENTITIES)}")
+    if format not in ("csv", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be csv or ndjson")
+    model, filter_columns = EXPORT_ENTITIES[entity]
+
+    available = list(model.model_fields)
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else available
+    unknown = [c for c in selected if c not in available]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown column(s) for {entity}: {', '.join(unknown)}")
+
+    requested_filters = {
+        "status": status,
+        "priority": priority,
+        "engineer_id": engineer_id,
+        "customer_id": customer_id,
+        "site_id": site_id,
+        "job_type": job_type,
+    }
+    equals = {}
+    for param, value in requested_filters.items():
+        if value is None:
+            continue
+        if param not in filter_columns:
+            raise HTTPException(status_code=400, detail=f"{entity} cannot be filtered by {param}")
+        equals[filter_columns[param]] = value
+
+    def apply_filters(query):
+        for column, value in equals.items():
+            query = query.eq(column, value)
+        if created_from:
+            query = query.gte('created_at', created_from)
+        if created_to:
+            query = query.lte('created_at', created_to)
+        return query
+
+    fetch_columns = selected if "id" in selected else ["id", *selected]
+    pages = iter_pages(entity, ", ".join(fetch_columns), page_size=EXPORT_PAGE_SIZE, filters=apply_filters)
+
+    if format == "ndjson":
+        return StreamingResponse(
+            ndjson_stream(selected, pages),
+            media_type=NDJSON_MEDIA_TYPE,
+            headers={"Content-Disposition": f"attachment; filename={entity}.ndjson"}
+        )
+    return StreamingResponse(
+        csv_stream(selected, pages),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={entity}.csv"}
+    )
@@ -1,11 +1,20 @@
+import asyncio
+
 from fastapi import APIRouter, HTTPException, Depends
+from fastapi.responses import StreamingResponse
 from typing import List, Optional
 import uuid
 from datetime import datetime, timezone, timedelta
 
-from database import supabase
+from database import supabase, iter_pages
 from models.asset import FGasLogCreate, FGasLogResponse
-from services.auth import get_current_user
+from services.auth import get_current_user, get_user_from_token_param
+from services.cache import forecast_cache
+from services.export import csv_stream, write_xlsx, file_stream, XLSX_MEDIA_TYPE
+from services.fgas_export import EXPORT_REPORTS, MAX_EXPORT_YEARS
+from services.job_generation import assets_with_open_jobs, sites_by_id, insert_generated_jobs
+from services.pm_schedule import LEAK_CHECK_ESTIMATED_DURATION
+from services.refrigerants import REFRIGERANT_GWP, recompute_fgas_equivalents
 
 router = APIRouter(prefix="/fgas", tags=["fgas"])
 
@@ -32,6 +41,7 @@ async def create_fgas_log(data: FGasLogCreate, user: dict = Depends(get_current_
                 "fgas_last_leak_check": now.isoformat(),
                 "fgas_next_leak_check_due": next_leak_check
             }).eq('id', data.asset_id).execute()
+            forecast_cache.invalidate()
     
     return doc
 
@@ -71,86 +81,167 @@ async def delete_fgas_log(log_id: str, user: dict = Depends(get_current_user)):
     return {"message": "F-Gas log deleted"}
 
 
+LEAK_CHECK_LIST_COLUMNS = "id, site_id, name, make, model, refrigerant_type, refrigerant_charge, fgas_category, fgas_last_leak_check, fgas_next_leak_check_due"
+
+
+def _fgas_assets_query(columns: str, **kwargs):
+    return supabase.table('assets').select(columns, **kwargs).neq('refrigerant_type', '').neq('refrigerant_charge', '')
+
+
 @router.get("/dashboard")
 async def get_fgas_dashboard(user: dict = Depends(get_current_user)):
-    now = datetime.now(timezone.utc).isoformat()
-    
-    all_assets = supabase.table('assets').select('*').execute()
-    assets = all_assets.data if all_assets.data else []
-    
-    fgas_assets = [a for a in assets if a.get('refrigerant_type') and a.get('refrigerant_charge')]
-    
-    inventory_by_category = {}
-    for asset in fgas_assets:
-        category = asset.get('fgas_category') or 'Uncategorized'
-        if category not in inventory_by_category:
-            inventory_by_category[category] = {
-                'count': 0,
-                'total_charge_kg': 0,
-                'total_co2_equivalent': 0
-            }
-        inventory_by_category[category]['count'] += 1
-        try:
-            charge = float(asset.get('refrigerant_charge', 0) or 0)
-            inventory_by_category[category]['total_charge_kg'] += charge
-        except (ValueError, TypeError):
-            pass
-        try:
-            co2_eq = float(asset.get('fgas_co2_equivalent', 0) or 0)
-            inventory_by_category[category]['total_co2_equivalent'] += co2_eq
-        except (ValueError, TypeError):
-            pass
-    
-    leak_check_overdue = []
-    leak_check_due_soon = []
-    for asset in fgas_assets:
-        next_check = asset.get('fgas_next_leak_check_due')
-        if next_check:
-            try:
-                check_date = datetime.fromisoformat(next_check.replace('Z', '+00:00'))
-                if check_date <= datetime.now(timezone.utc):
-                    leak_check_overdue.append(asset)
-                elif check_date <= datetime.now(timezone.utc) + timedelta(days=30):
-                    leak_check_due_soon.append(asset)
-            except (ValueError, TypeError):
-                pass
+    now = datetime.now(timezone.utc)
+    soon = now + timedelta(days=30)
     
-    recent_logs = supabase.table('fgas_logs').select('*').order('created_at', desc=True).limit(10).execute()
+    category_rows = supabase.table('fgas_category_summary').select('*').gt('asset_count', 0).execute().data or []
+    inventory_by_category = {
+        row['category']: {
+            'count': row['asset_count'],
+            'total_charge_kg': float(row['total_charge_kg'] or 0),
+            'total_co2_equivalent': float(row['total_co2_equivalent'] or 0)
+        }
+        for row in category_rows
+    }
     
-    total_refrigerant_added = 0
-    total_refrigerant_recovered = 0
-    total_refrigerant_lost = 0
+    overdue = _fgas_assets_query(LEAK_CHECK_LIST_COLUMNS, count='exact').lte('fgas_next_leak_check_due', now.isoformat()).order('fgas_next_leak_check_due').limit(10).execute()
+    due_soon = _fgas_assets_query(LEAK_CHECK_LIST_COLUMNS, count='exact').gt('fgas_next_leak_check_due', now.isoformat()).lte('fgas_next_leak_check_due', soon.isoformat()).order('fgas_next_leak_check_due').limit(10).execute()
     
-    year_start = datetime(datetime.now().year, 1, 1, tzinfo=timezone.utc).isoformat()
-    year_logs = supabase.table('fgas_logs').select('*').gte('created_at', year_start).execute()
+    recent_logs = supabase.table('fgas_logs').select('*').order('created_at', desc=True).limit(10).execute()
     
-    for log in (year_logs.data or []):
-        try:
-            total_refrigerant_added += float(log.get('refrigerant_added', 0) or 0)
-            total_refrigerant_recovered += float(log.get('refrigerant_recovered', 0) or 0)
-            total_refrigerant_lost += float(log.get('refrigerant_lost', 0) or 0)
-        except (ValueError, TypeError):
-            pass
+    annual_rows = supabase.table('fgas_annual_summary').select('*').eq('year', now.year).execute().data
+    annual = annual_rows[0] if annual_rows else {}
     
     return {
-        "total_fgas_assets": len(fgas_assets),
+        "total_fgas_assets": sum(c['count'] for c in inventory_by_category.values()),
         "inventory_by_category": inventory_by_category,
-        "leak_check_overdue_count": len(leak_check_overdue),
-        "leak_check_overdue": leak_check_overdue[:10],
-        "leak_check_due_soon_count": len(leak_check_due_soon),
-        "leak_check_due_soon": leak_check_due_soon[:10],
+        "leak_check_overdue_count": overdue.count or 0,
+        "leak_check_overdue": overdue.data or [],
+        "leak_check_due_soon_count": due_soon.count or 0,
+        "leak_check_due_soon": due_soon.data or [],
         "recent_logs": recent_logs.data or [],
         "annual_summary": {
-            "year": datetime.now().year,
-            "refrigerant_added_kg": round(total_refrigerant_added, 3),
-            "refrigerant_recovered_kg": round(total_refrigerant_recovered, 3),
-            "refrigerant_lost_kg": round(total_refrigerant_lost, 3)
+            "year": now.year,
+            "refrigerant_added_kg": round(float(annual.get('refrigerant_added_kg') or 0), 3),
+            "refrigerant_recovered_kg": round(float(annual.get('refrigerant_recovered_kg') or 0), 3),
+            "refrigerant_lost_kg": round(float(annual.get('refrigerant_lost_kg') or 0), 3)
         }
     }
 
 
+@router.get("/gwp")
+async def get_refrigerant_gwp(user: dict = Depends(get_current_user)):
+    return REFRIGERANT_GWP
+
+
+@router.post("/recompute-co2e")
+async def recompute_co2e(user: dict = Depends(get_current_user)):
+    return recompute_fgas_equivalents()
+
+
 @router.get("/leak-check-due")
 async def get_assets_leak_check_due(user: dict = Depends(get_current_user)):
     now = datetime.now(timezone.utc).isoformat()
-    response = supabase.table('assets').select('*').lte('fgas_next_leak_check_due', now).execute()
+    response = _fgas_assets_query(LEAK_CHECK_LIST_COLUMNS).lte('fgas_next_leak_check_due', now).order('fgas_next_leak_check_due').limit(500).execute()
     return response.data or []
+
+
+@router.post("/generate-leak-check-jobs")
+async def generate_leak_check_jobs(days_ahead: int = 30, user: dict = Depends(get_current_user)):
+    """
+    Create one leak-check job per site covering every F-Gas asset that is overdue or due
+    within `days_ahead` days. Assets already on an open leak-check job are skipped, so
+    running this again does not duplicate work; completing the job moves the assets'
+    fgas_next_leak_check_due on (see complete_job), so they drop out after that.
+    """
+    now = datetime.now(timezone.utc)
+    horizon = (now + timedelta(days=max(0, min(days_ahead, 365)))).isoformat()
+    
+    assets_by_site = {}
+    for page in iter_pages(
+        'assets',
+        'id, site_id, name, fgas_next_leak_check_due',
+        filters=lambda q: q.neq('refrigerant_type', '').neq('refrigerant_charge', '').lte('fgas_next_leak_check_due', horizon)
+    ):
+        already_scheduled = assets_with_open_jobs([a["id"] for a in page], 'leak_check')
+        for asset in page:
+            if asset["id"] not in already_scheduled and asset.get("site_id"):
+                assets_by_site.setdefault(asset["site_id"], []).append(asset)
+    
+    sites = sites_by_id(list(assets_by_site))
+    
+    job_docs = []
+    event_details = []
+    site_summaries = []
+    for site_id, assets in assets_by_site.items():
+        site = sites.get(site_id)
+        if not site:
+            continue
+        overdue = any(a["fgas_next_leak_check_due"] <= now.isoformat() for a in assets)
+        job_docs.append({
+            "customer_id": site.get("customer_id"),
+            "site_id": site_id,
+            "asset_ids": [a["id"] for a in assets],
+            "job_type": "leak_check",
+            "priority": "high" if overdue else "medium",
+            "description": f"F-Gas leak check at {site.get('name')}: {len(assets)} asset(s)",
+            "estimated_duration": LEAK_CHECK_ESTIMATED_DURATION * len(assets)
+        })
+        event_details.append({"reason": "Leak check due", "asset_ids": [a["id"] for a in assets]})
+        site_summaries.append({"site": site.get("name"), "assets": len(assets), "overdue": overdue})
+    
+    created = insert_generated_jobs(job_docs, event_details, now)
+    jobs_created = [
+        {"job_number": job["job_number"], **summary}
+        for job, summary in zip(created, site_summaries)
+    ]
+    
+    return {"jobs_created": len(jobs_created), "details": jobs_created}
+
+
+@router.get("/export")
+async def export_fgas_report(
+    year: int,
+    to_year: Optional[int] = None,
+    report: Optional[str] = None,
+    format: str = "csv",
+    user: dict = Depends(get_user_from_token_param)
+):
+    """
+    Export F-Gas reports for `year` to `to_year` (at most MAX_EXPORT_YEARS years).
+    CSV streams one report page by page. XLSX puts the reports on separate sheets; the
+    workbook is written in full before it is sent and is refused with 413 above
+    XLSX_MAX_ROWS rows.
+    """
+    to_year = to_year or year
+    if to_year < year:
+        raise HTTPException(status_code=400, detail="to_year must not be before year")
+    if to_year - year + 1 > MAX_EXPORT_YEARS:
+        raise HTTPException(status_code=400, detail=f"Export at most {MAX_EXPORT_YEARS} years at a time")
+    filename = f"fgas-{year}" if to_year == year else f"fgas-{year}-{to_year}"
+    
+    if format == "xlsx":
+        reports = list(EXPORT_REPORTS) if report in (None, "all") else [report]
+        if any(r not in EXPORT_REPORTS for r in reports):
+            raise HTTPException(status_code=400, detail=f"report must be one of: all, {', '.join(EXPORT_REPORTS)}")
+        sheets = [
+            (EXPORT_REPORTS[r][0], EXPORT_REPORTS[r][1], EXPORT_REPORTS[r][2](year, to_year))
+            for r in reports
+        ]
+        path = await asyncio.to_thread(write_xlsx, sheets)
+        return StreamingResponse(
+            file_stream(path),
+            media_type=XLSX_MEDIA_TYPE,
+            headers={"Content-Disposition": f"attachment; filename={filename}.xlsx"}
+        )
+    
+    if format != "csv":
+        raise HTTPException(status_code=400, detail="format must be csv or xlsx")
+    report = report or "logs"
+    if report not in EXPORT_REPORTS:
+        raise HTTPException(status_code=400, detail=f"report must be one of: {', '.join(EXPORT_REPORTS)}")
+    _, columns, pages = EXPORT_REPORTS[report]
+    return StreamingResponse(
+        csv_stream(columns, pages(year, to_year)),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}-{report}.csv"}
+    )
@@ -0,0 +1,32 @@
+import asyncio
+
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
+
+from metrics import record_upload
+from services.auth import get_current_user
+from services.cache import forecast_cache
+from services.importer import import_csv, IMPORT_ENTITIES
+
+router = APIRouter(prefix="/import", tags=["import"])
+
+
+@router.post("/{entity}")
+async def import_entity_csv(
+    entity: str,
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    user: dict = Depends(get_current_user)
+):
+    """
+    Bulk import customers, sites or assets from CSV. Sites may reference their customer
+    by customer_id or customer_name, and assets their site by site_id or site_name.
+    """
+    if entity not in IMPORT_ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unknown import entity; use one of: {', '.join(IMPORT_ENTITIES)}")
+    record_upload("csv_import", file.size or 0)
+    # Validation and inserts make blocking database calls; keep them off the event loop
+    result = await asyncio.to_thread(import_csv, entity, file.file, dry_run=dry_run)
+
+    if entity == "assets" and result["imported"] and not dry_run:
+        forecast_cache.invalidate()
+    return result
@@ -1,24 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends, UploadFile, File
-from fastapi.responses import StreamingResponse
+from fastapi import APIRouter, HTTPException, Depends, UploadFile, File, Request
+from fastapi.responses import StreamingResponse, Response
 from typing import List, Optional
 import uuid
-from datetime import datetime, timezone, timedelta
+import json
+import hashlib
+from datetime import datetime, timezone
 from pathlib import Path
 import aiofiles
+from postgrest.exceptions import APIError
 
 from database import supabase
-from models.job import JobCreate, JobUpdate, JobResponse, JobCompletionCreate
+from models.job import JobCreate, JobUpdate, JobBulkUpdate, JobResponse, JobCompletionCreate
 from services.auth import get_current_user, get_user_from_token_param
 from services.pdf import generate_job_pdf_content
+from services.sla import sla_monitor
+from services.cache import calendar_cache, forecast_cache, parts_analytics_cache
+from services.calendar import build_engineer_calendar, calendar_version, CALENDAR_JOB_COLUMNS
+from services.job_generation import next_job_numbers
+from services.parts_index import parts_index
+from services.work_pack import build_work_pack
 from config import UPLOAD_DIR
+from metrics import record_upload
 
 router = APIRouter(prefix="/jobs", tags=["jobs"])
 
+MAX_BULK_UPDATE_ITEMS = 500
+
 
 def generate_job_number():
-    response = supabase.table('jobs').select('*', count='exact').execute()
-    count = response.count if response.count else 0
-    return f"JOB-{str(count + 1).zfill(5)}"
+    return next_job_numbers(1)[0]
 
 
 @router.post("", response_model=JobResponse)
@@ -47,6 +57,8 @@ async def create_job(data: JobCreate, user: dict = Depends(get_current_user)):
         "details": {"status": "pending"}
     }).execute()
     
+    sla_monitor.track(doc)
+    calendar_cache.invalidate()
     return {**doc}
 
 
@@ -75,28 +87,100 @@ async def get_jobs(
     return response.data
 
 
+@router.post("/bulk-update", response_model=List[JobResponse])
+async def bulk_update_jobs(data: JobBulkUpdate, user: dict = Depends(get_current_user)):
+    if not data.items:
+        raise HTTPException(status_code=400, detail="No jobs to update")
+    if len(data.items) > MAX_BULK_UPDATE_ITEMS:
+        raise HTTPException(status_code=400, detail=f"Cannot update more than {MAX_BULK_UPDATE_ITEMS} jobs at once")
+    job_ids = [item.job_id for item in data.items]
+    if len(set(job_ids)) != len(job_ids):
+        raise HTTPException(status_code=400, detail="Each job may only appear once")
+    
+    try:
+        response = supabase.rpc('bulk_update_jobs', {
+            "p_items": [item.model_dump(exclude_none=True) for item in data.items],
+            "p_user_id": user["id"]
+        }).execute()
+    except APIError as e:
+        if e.code == 'P0002':
+            raise HTTPException(status_code=404, detail=e.message)
+        raise
+    
+    for job in response.data:
+        sla_monitor.track(job)
+    calendar_cache.invalidate()
+    return response.data
+
+
 @router.get("/scheduled")
 async def get_scheduled_jobs(
     start_date: Optional[str] = None,
     end_date: Optional[str] = None,
     user: dict = Depends(get_current_user)
 ):
-    query = supabase.table('jobs').select('*').not_.is_('scheduled_date', 'null')
+    query = supabase.table('jobs').select(CALENDAR_JOB_COLUMNS).not_.is_('scheduled_date', 'null')
     if start_date:
         query = query.gte('scheduled_date', start_date)
     if end_date:
         query = query.lte('scheduled_date', end_date)
     
-    response = query.execute()
+    response = query.order('scheduled_date').limit(5000).execute()
     return response.data
 
 
+@router.get("/calendar")
+async def get_jobs_calendar(
+    start_date: str,
+    end_date: str,
+    engineer_id: Optional[str] = None,
+    user: dict = Depends(get_current_user)
+):
+    cache_key = (start_date, end_date, engineer_id, calendar_version())
+    cached = calendar_cache.get(cache_key)
+    if cached is not None:
+        return cached
+    
+    query = supabase.table('jobs').select(CALENDAR_JOB_COLUMNS).gte('scheduled_date', start_date).lte('scheduled_date', end_date)
+    if engineer_id:
+        query = query.eq('assigned_engineer_id', engineer_id)
+    response = query.neq('status', 'cancelled').limit(5000).execute()
+    
+    result = {
+        "start_date": start_date,
+        "end_date": end_date,
+        "engineers": build_engineer_calendar(response.data or [])
+    }
+    calendar_cache.set(cache_key, result)
+    return result
+
+
+@router.get("/sla-risk")
+async def get_sla_risk_jobs(include_breached: bool = True, user: dict = Depends(get_current_user)):
+    return sla_monitor.at_risk(include_breached=include_breached)
+
+
 @router.get("/my-jobs")
 async def get_my_jobs(user: dict = Depends(get_current_user)):
     response = supabase.table('jobs').select('*').eq('assigned_engineer_id', user["id"]).in_('status', ['pending', 'in_progress', 'travelling']).order('scheduled_date').limit(100).execute()
     return response.data
 
 
+@router.get("/my-jobs/bundle")
+async def get_my_jobs_bundle(request: Request, user: dict = Depends(get_current_user)):
+    """
+    The engineer's open jobs with their customers, sites, assets, photos and checklist
+    templates in one response. The ETag is a hash of the content, so a device that already
+    has the current bundle gets a bodyless 304.
+    """
+    body = json.dumps(build_work_pack(user["id"]), sort_keys=True, separators=(",", ":"), default=str).encode()
+    etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
 @router.get("/{job_id}", response_model=JobResponse)
 async def get_job(job_id: str, user: dict = Depends(get_current_user)):
     response = supabase.table('jobs').select('*').eq('id', job_id).execute()
@@ -107,26 +191,27 @@ async def get_job(job_id: str, user: dict = Depends(get_current_user)):
 
 @router.put("/{job_id}")
 async def update_job(job_id: str, data: JobUpdate, user: dict = Depends(get_current_user)):
-    update_data = {k: v for k, v in data.model_dump().items() if v is not None}
-    update_data["updated_at"] = datetime.now(timezone.utc).isoformat()
-    
-    old_job_response = supabase.table('jobs').select('*').eq('id', job_id).execute()
-    if not old_job_response.data:
-        raise HTTPException(status_code=404, detail="Job not found")
-    old_job = old_job_response.data[0]
-    
-    response = supabase.table('jobs').update(update_data).eq('id', job_id).execute()
+    # Without the version the edit was based on, a stale form would silently overwrite
+    if data.version is None:
+        raise HTTPException(status_code=428, detail="Send the job's current version with the update")
+    update_data = {k: v for k, v in data.model_dump(exclude={"version"}).items() if v is not None}
     
-    if data.status and data.status != old_job.get("status"):
-        supabase.table('job_events').insert({
-            "id": str(uuid.uuid4()),
-            "job_id": job_id,
-            "event_type": "status_changed",
-            "user_id": user["id"],
-            "timestamp": datetime.now(timezone.utc).isoformat(),
-            "details": {"old_status": old_job.get("status"), "new_status": data.status}
+    try:
+        response = supabase.rpc('update_job_versioned', {
+            "p_job_id": job_id,
+            "p_changes": update_data,
+            "p_expected_version": data.version,
+            "p_user_id": user["id"]
         }).execute()
+    except APIError as e:
+        if e.code == 'P0002':
+            raise HTTPException(status_code=404, detail="Job not found")
+        if e.code == 'PT409':
+            raise HTTPException(status_code=409, detail="Job has been modified by another user. Reload and try again.")
+        raise
     
+    sla_monitor.track(response.data[0])
+    calendar_cache.invalidate()
     return response.data[0]
 
 
@@ -135,6 +220,8 @@ async def delete_job(job_id: str, user: dict = Depends(get_current_user)):
     response = supabase.table('jobs').delete().eq('id', job_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Job not found")
+    sla_monitor.discard(job_id)
+    calendar_cache.invalidate()
     return {"message": "Job deleted"}
 
 
@@ -146,42 +233,40 @@ async def get_job_events(job_id: str, user: dict = Depends(get_current_user)):
 
 @router.post("/{job_id}/complete")
 async def complete_job(job_id: str, data: JobCompletionCreate, user: dict = Depends(get_current_user)):
-    job_response = supabase.table('jobs').select('*').eq('id', job_id).execute()
-    if not job_response.data:
-        raise HTTPException(status_code=404, detail="Job not found")
-    job = job_response.data[0]
-    
-    now = datetime.now(timezone.utc).isoformat()
+    try:
+        response = supabase.rpc('complete_job', {
+            "p_job_id": job_id,
+            "p_completion": data.model_dump(),
+            "p_user_id": user["id"]
+        }).execute()
+    except APIError as e:
+        if e.code == 'P0002':
+            raise HTTPException(status_code=404, detail="Job not found")
+        if e.code == 'PT409':
+            raise HTTPException(status_code=409, detail="Job is already completed")
+        raise
     
-    completion_doc = {
-        "id": str(uuid.uuid4()),
-        "job_id": job_id,
-        **data.model_dump(),
-        "completed_by": user["id"],
-        "completed_at": now
+    sla_monitor.discard(job_id)
+    calendar_cache.invalidate()
+    if response.data["assets_updated"]:
+        forecast_cache.invalidate()
+    for part in response.data["parts"]:
+        parts_index.upsert(part)
+    if data.parts_used:
+        parts_analytics_cache.invalidate()
+    return {
+        "message": "Job completed",
+        "completion_id": response.data["completion_id"],
+        "assets_updated": response.data["assets_updated"],
+        "leak_checks_recorded": response.data["leak_checks_recorded"],
+        "parts_updated": len(response.data["parts"]),
+        # Parts used beyond the recorded stock; their stock was clamped at zero
+        "stock_shortfall": [
+            {"part_id": part["id"], "part_number": part["part_number"], "shortfall": part["shortfall"]}
+            for part in response.data["parts"]
+            if part.get("shortfall")
+        ]
     }
-    supabase.table('job_completions').insert(completion_doc).execute()
-    
-    supabase.table('jobs').update({"status": "completed", "updated_at": now}).eq('id', job_id).execute()
-    
-    for asset_id in job.get("asset_ids", []):
-        asset_response = supabase.table('assets').select('*').eq('id', asset_id).execute()
-        if asset_response.data:
-            asset = asset_response.data[0]
-            pm_months = asset.get("pm_interval_months", 6)
-            next_pm = (datetime.now(timezone.utc) + timedelta(days=pm_months * 30)).isoformat()
-            supabase.table('assets').update({"last_service_date": now, "next_pm_due": next_pm}).eq('id', asset_id).execute()
-    
-    supabase.table('job_events').insert({
-        "id": str(uuid.uuid4()),
-        "job_id": job_id,
-        "event_type": "completed",
-        "user_id": user["id"],
-        "timestamp": now,
-        "details": {"travel_time": data.travel_time, "time_on_site": data.time_on_site}
-    }).execute()
-    
-    return {"message": "Job completed", "completion_id": completion_doc["id"]}
 
 
 @router.get("/{job_id}/completion")
@@ -205,6 +290,7 @@ async def upload_job_photo(job_id: str, file: UploadFile = File(...), user: dict
     async with aiofiles.open(file_path, "wb") as f:
         content = await file.read()
         await f.write(content)
+    record_upload("job_photo", len(content))
     
     photo_doc = {
         "id": file_id,
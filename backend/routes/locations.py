@@ -1,13 +1,16 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
+from fastapi.exceptions import RequestValidationError
 from typing import List, Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ValidationError
 import uuid
 import logging
 from datetime import datetime, timezone, timedelta
 from postgrest.exceptions import APIError
 
 from database import supabase
+from metrics import record_upload
 from services.auth import get_current_user
+from services.location_codec import LOCATION_BATCH_MEDIA_TYPE, decode_location_batch
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/locations", tags=["locations"])
@@ -44,25 +47,44 @@ class LocationBatch(BaseModel):
 
 
 @router.post("/track")
-async def track_location(data: LocationBatch, user: dict = Depends(get_current_user)):
-    """Store a batch of location points for the authenticated engineer."""
-    if not data.locations:
+async def track_location(request: Request, user: dict = Depends(get_current_user)):
+    """
+    Store a batch of location points for the authenticated engineer.
+
+    Accepts a JSON LocationBatch, or the compact binary format described in
+    services/location_codec.py when sent as application/vnd.fsm.location-batch.
+    """
+    body = await request.body()
+    record_upload("location_batch", len(body))
+    if request.headers.get("content-type", "").startswith(LOCATION_BATCH_MEDIA_TYPE):
+        points = decode_location_batch(body, request.headers.get("content-encoding"))
+    else:
+        try:
+            data = LocationBatch.model_validate_json(body)
+        except ValidationError as e:
+            raise RequestValidationError(e.errors())
+        points = [
+            (loc.latitude, loc.longitude, loc.accuracy, loc.job_id, loc.status, loc.recorded_at)
+            for loc in data.locations
+        ]
+    if not points:
         return {"message": "No locations to store", "count": 0}
 
     now = datetime.now(timezone.utc).isoformat()
-    docs = []
-    for loc in data.locations:
-        docs.append({
+    docs = [
+        {
             "id": str(uuid.uuid4()),
             "engineer_id": user["id"],
-            "latitude": loc.latitude,
-            "longitude": loc.longitude,
-            "accuracy": loc.accuracy,
-            "job_id": loc.job_id,
-            "status": loc.status or "travelling",
-            "recorded_at": loc.recorded_at or now,
+            "latitude": latitude,
+            "longitude": longitude,
+            "accuracy": accuracy,
+            "job_id": job_id,
+            "status": status or "travelling",
+            "recorded_at": recorded_at or now,
             "synced_at": now,
-        })
+        }
+        for latitude, longitude, accuracy, job_id, status, recorded_at in points
+    ]
 
     try:
         supabase.table(TABLE_NAME).insert(docs).execute()
@@ -197,3 +219,31 @@ async def get_engineer_latest_location(
         raise HTTPException(status_code=404, detail="No location data found")
 
     return response.data[0]
+
+
+@router.get("/engineer/{engineer_id}/daily")
+async def get_engineer_daily_summaries(
+    engineer_id: str,
+    days: int = 30,
+    user: dict = Depends(get_current_user),
+):
+    """
+    Per-day distance, duration and simplified track for an engineer, from the rollups
+    that outlive the raw points. Days are only summarised once they are complete.
+    """
+    since = (datetime.now(timezone.utc) - timedelta(days=days)).date().isoformat()
+
+    try:
+        response = (
+            supabase.table("engineer_location_daily")
+            .select("*")
+            .eq("engineer_id", engineer_id)
+            .gte("day", since)
+            .order("day", desc=False)
+            .limit(400)
+            .execute()
+        )
+    except APIError as e:
+        _handle_db_error(e)
+
+    return response.data
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Query
 from typing import List
 import uuid
 from datetime import datetime, timezone
@@ -6,6 +6,9 @@ from datetime import datetime, timezone
 from database import supabase
 from models.invoice import PartCreate, PartResponse
 from services.auth import get_current_user
+from services.parts_index import parts_index
+from services.parts_analytics import parts_usage_report
+from services.cache import parts_analytics_cache
 
 router = APIRouter(prefix="/parts", tags=["parts"])
 
@@ -19,6 +22,8 @@ async def create_part(data: PartCreate, user: dict = Depends(get_current_user)):
         "created_at": datetime.now(timezone.utc).isoformat()
     }
     supabase.table('parts').insert(doc).execute()
+    parts_index.upsert(doc)
+    parts_analytics_cache.invalidate()
     return doc
 
 
@@ -28,6 +33,31 @@ async def get_parts(user: dict = Depends(get_current_user)):
     return response.data
 
 
+@router.get("/suggest")
+async def suggest_parts(
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(10, ge=1, le=50),
+    user: dict = Depends(get_current_user)
+):
+    return parts_index.suggest(q, limit)
+
+
+@router.get("/low-stock")
+async def get_low_stock_parts(limit: int = Query(200, ge=1, le=1000), user: dict = Depends(get_current_user)):
+    response = supabase.table('low_stock_parts').select('*', count='exact').limit(limit).execute()
+    return {"count": response.count or 0, "parts": response.data or []}
+
+
+@router.get("/analytics")
+async def get_parts_analytics(days: int = Query(365, ge=30, le=1825), user: dict = Depends(get_current_user)):
+    cached = parts_analytics_cache.get(days)
+    if cached is not None:
+        return cached
+    result = parts_usage_report(days)
+    parts_analytics_cache.set(days, result)
+    return result
+
+
 @router.get("/{part_id}", response_model=PartResponse)
 async def get_part(part_id: str, user: dict = Depends(get_current_user)):
     response = supabase.table('parts').select('*').eq('id', part_id).execute()
@@ -41,6 +71,8 @@ async def update_part(part_id: str, data: PartCreate, user: dict = Depends(get_c
     response = supabase.table('parts').update(data.model_dump()).eq('id', part_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Part not found")
+    parts_index.upsert(response.data[0])
+    parts_analytics_cache.invalidate()
     return response.data[0]
 
 
@@ -49,4 +81,6 @@ async def delete_part(part_id: str, user: dict = Depends(get_current_user)):
     response = supabase.table('parts').delete().eq('id', part_id).execute()
     if not response.data:
         raise HTTPException(status_code=404, detail="Part not found")
+    parts_index.remove(part_id)
+    parts_analytics_cache.invalidate()
     return {"message": "Part deleted"}
@@ -1,77 +1,71 @@
 from fastapi import APIRouter, Depends
 from datetime import datetime, timezone, timedelta
-import uuid
 
 from database import supabase
 from services.auth import get_current_user
+from services.pm_schedule import recompute_pm_schedule, forecast_pm_workload, PM_JOB_ESTIMATED_DURATION
+from services.cache import forecast_cache
+from services.job_generation import assets_with_open_jobs, sites_by_id, insert_generated_jobs
 
 router = APIRouter(prefix="/pm", tags=["pm"])
 
 
-def generate_job_number():
-    response = supabase.table('jobs').select('*', count='exact').execute()
-    count = response.count if response.count else 0
-    return f"JOB-{str(count + 1).zfill(5)}"
-
-
 @router.post("/generate-jobs")
 async def generate_pm_jobs(user: dict = Depends(get_current_user)):
     now = datetime.now(timezone.utc)
     
-    assets_due_response = supabase.table('assets').select('*').lte('next_pm_due', now.isoformat()).limit(100).execute()
+    assets_due_response = supabase.table('assets').select('id, site_id, name, make, model').lte('next_pm_due', now.isoformat()).limit(100).execute()
     assets_due = assets_due_response.data
     
-    jobs_created = []
+    asset_ids_with_open_pm = assets_with_open_jobs([a["id"] for a in assets_due], 'pm_service')
+    sites = sites_by_id(list({a["site_id"] for a in assets_due if a.get("site_id")}))
+    
+    job_docs = []
+    event_details = []
+    asset_names = []
     for asset in assets_due:
-        existing_job_response = supabase.table('jobs').select('*').contains('asset_ids', [asset["id"]]).eq('job_type', 'pm_service').in_('status', ['pending', 'in_progress', 'travelling']).execute()
-        
-        if existing_job_response.data:
+        site = sites.get(asset.get("site_id"))
+        if asset["id"] in asset_ids_with_open_pm or not site:
             continue
-        
-        site_response = supabase.table('sites').select('*').eq('id', asset.get("site_id")).execute()
-        if not site_response.data:
-            continue
-        site = site_response.data[0]
-        
-        job_id = str(uuid.uuid4())
-        job_number = generate_job_number()
-        
-        job_doc = {
-            "id": job_id,
-            "job_number": job_number,
+        job_docs.append({
             "customer_id": site.get("customer_id"),
             "site_id": asset.get("site_id"),
             "asset_ids": [asset["id"]],
             "job_type": "pm_service",
             "priority": "medium",
-            "status": "pending",
             "description": f"Scheduled PM Service for {asset.get('name')} - {asset.get('make', '')} {asset.get('model', '')}",
-            "assigned_engineer_id": None,
-            "scheduled_date": None,
-            "scheduled_time": None,
-            "estimated_duration": 60,
-            "sla_hours": None,
-            "created_at": now.isoformat(),
-            "updated_at": now.isoformat(),
-            "created_by": "system",
-            "auto_generated": True
-        }
-        
-        supabase.table('jobs').insert(job_doc).execute()
-        jobs_created.append({"job_number": job_number, "asset": asset.get("name")})
-        
-        supabase.table('job_events').insert({
-            "id": str(uuid.uuid4()),
-            "job_id": job_id,
-            "event_type": "auto_generated",
-            "user_id": "system",
-            "timestamp": now.isoformat(),
-            "details": {"reason": "PM due", "asset_id": asset["id"]}
-        }).execute()
+            "estimated_duration": PM_JOB_ESTIMATED_DURATION
+        })
+        event_details.append({"reason": "PM due", "asset_id": asset["id"]})
+        asset_names.append(asset.get("name"))
+    
+    created = insert_generated_jobs(job_docs, event_details, now)
+    jobs_created = [
+        {"job_number": job["job_number"], "asset": asset_name}
+        for job, asset_name in zip(created, asset_names)
+    ]
     
     return {"jobs_created": len(jobs_created), "details": jobs_created}
 
 
+@router.post("/recompute-schedule")
+async def recompute_schedule(user: dict = Depends(get_current_user)):
+    result = recompute_pm_schedule()
+    forecast_cache.invalidate()
+    return result
+
+
+@router.get("/forecast")
+async def get_pm_forecast(months: int = 12, user: dict = Depends(get_current_user)):
+    months = max(1, min(months, 24))
+    cached = forecast_cache.get(months)
+    if cached is not None:
+        return cached
+    result = forecast_pm_workload(months)
+    forecast_cache.set(months, result)
+    return result
+
+
 @router.get("/status")
 async def get_pm_status(user: dict = Depends(get_current_user)):
     now = datetime.now(timezone.utc)
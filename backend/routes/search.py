@@ -0,0 +1,44 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from typing import Optional
+
+from database import supabase
+from services.auth import get_current_user
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+SEARCH_ENTITY_TYPES = {"customer", "site", "asset", "job"}
+
+
+@router.get("")
+async def search(
+    q: str = Query(..., min_length=1, max_length=200),
+    types: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    user: dict = Depends(get_current_user)
+):
+    """
+    Ranked prefix search over customers, sites, assets and jobs.
+    `types` is an optional comma-separated subset of customer,site,asset,job.
+    """
+    entity_types = None
+    if types:
+        entity_types = [t.strip() for t in types.split(",") if t.strip()]
+        unknown = set(entity_types) - SEARCH_ENTITY_TYPES
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown search type(s): {', '.join(sorted(unknown))}")
+
+    rows = supabase.rpc('search_all', {
+        "p_query": q,
+        "p_types": entity_types,
+        "p_limit": limit,
+        "p_offset": offset
+    }).execute().data or []
+
+    return {
+        "query": q,
+        "total": rows[0]["total_count"] if rows else 0,
+        "limit": limit,
+        "offset": offset,
+        "results": [{k: v for k, v in row.items() if k != "total_count"} for row in rows]
+    }
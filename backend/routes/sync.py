@@ -0,0 +1,12 @@
+from fastapi import APIRouter, Depends
+from typing import Optional
+
+from services.auth import get_current_user
+from services.sync import sync_changes
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+
+@router.get("")
+async def sync(cursor: Optional[str] = None, user: dict = Depends(get_current_user)):
+    return sync_changes(user, cursor)
@@ -9,6 +9,7 @@ from pathlib import Path
 from database import supabase
 from services.auth import get_current_user
 from config import UPLOAD_DIR
+from metrics import record_upload
 
 router = APIRouter(prefix="/upload", tags=["uploads"])
 
@@ -22,6 +23,7 @@ async def upload_photo(file: UploadFile = File(...), user: dict = Depends(get_cu
     async with aiofiles.open(file_path, "wb") as f:
         content = await file.read()
         await f.write(content)
+    record_upload("photo", len(content))
     
     photo_doc = {
         "id": file_id,
@@ -1,15 +1,21 @@
-from fastapi import FastAPI, APIRouter, Depends
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Request, Response
 from fastapi.responses import FileResponse
 from fastapi.staticfiles import StaticFiles
 from starlette.middleware.cors import CORSMiddleware
+from starlette.middleware.gzip import GZipMiddleware
 import os
+import asyncio
 import logging
+import random
 from datetime import datetime, timezone
 
-from config import FRONTEND_BUILD_DIR
+from config import FRONTEND_BUILD_DIR, SLA_CHECK_INTERVAL_SECONDS, LOCATION_RETENTION_MONTHS, LOCATION_RETENTION_INTERVAL_SECONDS, LOCATION_RETENTION_INITIAL_DELAY_SECONDS, METRICS_TOKEN
 from database import supabase
+from metrics import MetricsMiddleware, render_metrics
 from services.auth import get_current_user
 from services.ai import summarize_notes
+from services.sla import sla_monitor
+from services.idempotency import IdempotencyMiddleware
 from routes import (
     auth_router,
     users_router,
@@ -28,6 +34,11 @@ from routes import (
     portal_router,
     fgas_router,
     locations_router,
+    search_router,
+    export_router,
+    import_router,
+    batch_router,
+    sync_router,
 )
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
@@ -53,6 +64,11 @@ api_router.include_router(pm_router)
 api_router.include_router(portal_router)
 api_router.include_router(fgas_router)
 api_router.include_router(locations_router)
+api_router.include_router(search_router)
+api_router.include_router(export_router)
+api_router.include_router(import_router)
+api_router.include_router(batch_router)
+api_router.include_router(sync_router)
 
 
 @api_router.post("/ai/summarize-notes")
@@ -70,6 +86,58 @@ async def health_check():
 
 app.include_router(api_router)
 
+
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics(request: Request):
+    if not METRICS_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if request.headers.get("authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    content, content_type = render_metrics()
+    return Response(content=content, media_type=content_type)
+
+
+async def run_sla_monitor():
+    while True:
+        try:
+            if sla_monitor.needs_reload():
+                await asyncio.to_thread(sla_monitor.load)
+            await asyncio.to_thread(sla_monitor.check)
+        except Exception as e:
+            logger.error(f"SLA monitor error: {e}")
+        await asyncio.sleep(SLA_CHECK_INTERVAL_SECONDS)
+
+
+def apply_location_retention():
+    # Each call drops at most one expired partition to stay within the statement timeout
+    while True:
+        result = supabase.rpc('apply_engineer_location_retention', {
+            "p_retention_months": LOCATION_RETENTION_MONTHS
+        }).execute().data
+        if result and not result.get("skipped"):
+            logger.info(f"Location retention: {result}")
+        if not result or not result.get("more"):
+            return
+
+
+async def run_location_retention():
+    await asyncio.sleep(LOCATION_RETENTION_INITIAL_DELAY_SECONDS * (1 + random.random()))
+    while True:
+        try:
+            await asyncio.to_thread(apply_location_retention)
+        except Exception as e:
+            logger.error(f"Location retention error: {e}")
+        await asyncio.sleep(LOCATION_RETENTION_INTERVAL_SECONDS)
+
+
+@app.on_event("startup")
+async def start_background_tasks():
+    asyncio.create_task(run_sla_monitor())
+    asyncio.create_task(run_location_retention())
+
+app.add_middleware(IdempotencyMiddleware)
+app.add_middleware(GZipMiddleware, minimum_size=1024)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
@@ -78,6 +146,8 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(MetricsMiddleware)
+
 if FRONTEND_BUILD_DIR.exists():
     app.mount("/static", StaticFiles(directory=str(FRONTEND_BUILD_DIR / "static")), name="static")
     
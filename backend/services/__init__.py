@@ -12,10 +12,12 @@ from services.pdf import (
     generate_job_pdf_content
 )
 from services.ai import summarize_notes
+from services.sla import sla_monitor
 
 __all__ = [
     "hash_password", "verify_password", "create_token", 
     "get_current_user", "get_portal_user", "security",
     "generate_quote_pdf_content", "generate_invoice_pdf_content", "generate_job_pdf_content",
     "summarize_notes",
+    "sla_monitor",
 ]
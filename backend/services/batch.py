@@ -0,0 +1,180 @@
+import asyncio
+import base64
+import hashlib
+import json
+import logging
+from typing import Dict, List
+from urllib.parse import urlsplit
+
+import anyio
+from fastapi import HTTPException
+
+from config import BATCH_MAX_OPERATIONS, BATCH_CONCURRENCY
+from models.batch import BatchOperation
+
+logger = logging.getLogger(__name__)
+
+API_PREFIX = "/api"
+BATCH_METHODS = {"GET", "POST", "PUT", "PATCH", "DELETE"}
+FORWARDED_HEADERS = {b"authorization", b"user-agent", b"accept-language"}
+IDEMPOTENCY_HEADER = b"idempotency-key"
+
+
+def plan_waves(operations: List[BatchOperation]) -> List[List[BatchOperation]]:
+    """
+    Group operations into waves that can run concurrently: each operation runs in the
+    first wave after all of its depends_on operations. Rejects unknown ids and cycles.
+    """
+    if len(operations) > BATCH_MAX_OPERATIONS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_MAX_OPERATIONS} operations")
+    by_id = {op.id: op for op in operations}
+    if len(by_id) != len(operations):
+        raise HTTPException(status_code=400, detail="Operation ids must be unique")
+    for op in operations:
+        if op.method.upper() not in BATCH_METHODS:
+            raise HTTPException(status_code=400, detail=f"Operation {op.id}: unsupported method {op.method}")
+        if not op.path.startswith("/") or urlsplit(op.path).path.rstrip("/") in ("/batch", API_PREFIX + "/batch"):
+            raise HTTPException(status_code=400, detail=f"Operation {op.id}: invalid path")
+        missing = [dep for dep in op.depends_on if dep not in by_id]
+        if missing:
+            raise HTTPException(status_code=400, detail=f"Operation {op.id}: unknown dependency {', '.join(missing)}")
+
+    waves = []
+    done = set()
+    remaining = list(operations)
+    while remaining:
+        wave = [op for op in remaining if all(dep in done for dep in op.depends_on)]
+        if not wave:
+            raise HTTPException(status_code=400, detail="Operation dependencies contain a cycle")
+        waves.append(wave)
+        done.update(op.id for op in wave)
+        remaining = [op for op in remaining if op.id not in done]
+    return waves
+
+
+async def _call_app(app, operation: BatchOperation, headers: List[tuple], user: dict) -> dict:
+    """Run one operation through the ASGI app in-process and collect its response."""
+    url = urlsplit(operation.path)
+    path = url.path if url.path.startswith(API_PREFIX + "/") else API_PREFIX + url.path
+    body = b"" if operation.body is None else json.dumps(operation.body).encode()
+    request_headers = list(headers)
+    if operation.body is not None:
+        request_headers += [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())]
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": operation.method.upper(),
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": url.query.encode(),
+        "headers": request_headers,
+        "client": None,
+        "server": None,
+        # Read by get_current_user so sub-requests reuse the batch's authenticated user
+        "batch_user": user,
+    }
+    response = {"status": 500, "headers": {}, "chunks": []}
+    finished = asyncio.Event()
+    request_sent = False
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await finished.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                k.decode("latin-1"): v.decode("latin-1")
+                for k, v in message.get("headers", [])
+                if k.lower() != b"content-length"
+            }
+        elif message["type"] == "http.response.body":
+            response["chunks"].append(message.get("body", b""))
+            if not message.get("more_body", False):
+                finished.set()
+
+    await app(scope, receive, send)
+    return _result(operation.id, response["status"], response["headers"], b"".join(response["chunks"]))
+
+
+def _result(operation_id: str, status: int, headers: Dict[str, str], content: bytes) -> dict:
+    content_type = headers.get("content-type", "")
+    if not content:
+        body = None
+    elif content_type.startswith("application/json"):
+        body = json.loads(content)
+    elif content_type.startswith("text/"):
+        body = content.decode("utf-8", errors="replace")
+    else:
+        body = base64.b64encode(content).decode()
+        headers = {**headers, "content-transfer-encoding": "base64"}
+    return {"id": operation_id, "status": status, "headers": headers, "body": body}
+
+
+def operation_idempotency_key(batch_key: str, operation_id: str) -> str:
+    """Idempotency-Key for one operation of a batch, stable across retries of the batch."""
+    return hashlib.sha256(f"{batch_key}\0{operation_id}".encode()).hexdigest()
+
+
+def _call_app_in_thread(app, operation: BatchOperation, headers: List[tuple], user: dict) -> dict:
+    return asyncio.run(_call_app(app, operation, headers, user))
+
+
+async def run_batch(app, operations: List[BatchOperation], headers: List[tuple], user: dict) -> List[dict]:
+    """
+    Execute operations wave by wave and return their results in request order.
+
+    Route handlers make blocking database calls, so gathering them on this event loop
+    would run them one after another; each operation instead runs on a worker thread
+    with its own loop, at most BATCH_CONCURRENCY at a time. An operation that raises
+    gets a 500 result without losing the others, and operations whose dependencies
+    failed are skipped with status 424.
+
+    When the batch carries an Idempotency-Key, each operation is sent with a key
+    derived from it and the operation id, so a retried batch that failed part way
+    replays the operations that already ran instead of executing them again.
+    """
+    forwarded = [(k.lower(), v) for k, v in headers if k.lower() in FORWARDED_HEADERS]
+    batch_key = next((v.decode("latin-1") for k, v in headers if k.lower() == IDEMPOTENCY_HEADER), None)
+    limiter = anyio.CapacityLimiter(BATCH_CONCURRENCY)
+    results: Dict[str, dict] = {}
+
+    async def run(operation: BatchOperation) -> dict:
+        failed = [dep for dep in operation.depends_on if results[dep]["status"] >= 400]
+        if failed:
+            return {
+                "id": operation.id,
+                "status": 424,
+                "headers": {},
+                "body": {"detail": f"Dependency failed: {', '.join(failed)}"}
+            }
+        operation_headers = forwarded
+        if batch_key:
+            key = operation_idempotency_key(batch_key, operation.id)
+            operation_headers = [*forwarded, (IDEMPOTENCY_HEADER, key.encode())]
+        try:
+            return await anyio.to_thread.run_sync(
+                _call_app_in_thread, app, operation, operation_headers, user, limiter=limiter
+            )
+        except Exception as e:
+            logger.exception("Batch operation %s (%s %s) failed", operation.id, operation.method, operation.path)
+            return {
+                "id": operation.id,
+                "status": 500,
+                "headers": {},
+                "body": {"detail": f"Operation failed: {type(e).__name__}"}
+            }
+
+    for wave in plan_waves(operations):
+        for operation, result in zip(wave, await asyncio.gather(*(run(op) for op in wave))):
+            results[operation.id] = result
+    return [results[op.id] for op in operations]
@@ -0,0 +1,48 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+
+class QueryCache:
+    """
+    Small in-process LRU cache for computed read models.
+
+    Entries expire after ttl_seconds as a safety net, but callers are expected to
+    call invalidate() from the write paths that change the underlying rows.
+    """
+
+    def __init__(self, maxsize: int = 64, ttl_seconds: int = 300):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self):
+        with self._lock:
+            self._data.clear()
+
+
+# Keyed by calendar_version(), so other workers' job writes are picked up immediately
+calendar_cache = QueryCache(maxsize=32, ttl_seconds=600)
+forecast_cache = QueryCache(maxsize=8, ttl_seconds=3600)
+parts_analytics_cache = QueryCache(maxsize=8, ttl_seconds=3600)
@@ -0,0 +1,86 @@
+from typing import Dict, List, Optional, Tuple
+
+from database import supabase
+
+UNASSIGNED_KEY = "unassigned"
+DEFAULT_START_MINUTES = 9 * 60
+
+CALENDAR_JOB_COLUMNS = (
+    "id, job_number, customer_id, site_id, job_type, priority, status, description, "
+    "assigned_engineer_id, scheduled_date, scheduled_time, estimated_duration, sla_hours, version"
+)
+
+
+def calendar_version() -> Tuple[Optional[str], Optional[int]]:
+    """
+    The latest job write and job delete, from two index lookups. Calendars are cached per
+    worker under this version, so a write through any worker or RPC is seen by all.
+    """
+    latest_job = supabase.table('jobs').select('updated_at').order('updated_at', desc=True).limit(1).execute().data
+    latest_delete = (
+        supabase.table('sync_tombstones').select('id')
+        .eq('entity', 'jobs')
+        .order('id', desc=True)
+        .limit(1)
+        .execute()
+        .data
+    )
+    return (
+        latest_job[0]["updated_at"] if latest_job else None,
+        latest_delete[0]["id"] if latest_delete else None,
+    )
+
+
+def _start_minutes(scheduled_time: Optional[str]) -> int:
+    if not scheduled_time:
+        return DEFAULT_START_MINUTES
+    try:
+        hours, minutes = scheduled_time.split(":")[:2]
+        return int(hours) * 60 + int(minutes)
+    except ValueError:
+        return DEFAULT_START_MINUTES
+
+
+def _flag_overlaps(day_jobs: List[dict]):
+    """Sort a day's jobs by start time and flag every pair of overlapping intervals."""
+    day_jobs.sort(key=lambda j: j["start_minute"])
+    active: List[dict] = []
+    for job in day_jobs:
+        active = [a for a in active if a["end_minute"] > job["start_minute"]]
+        for other in active:
+            other["conflicts_with"].append(job["id"])
+            job["conflicts_with"].append(other["id"])
+        active.append(job)
+    for job in day_jobs:
+        job["conflict"] = bool(job["conflicts_with"])
+
+
+def build_engineer_calendar(jobs: List[dict]) -> Dict[str, Dict[str, List[dict]]]:
+    """
+    Bucket scheduled jobs into {engineer_id: {scheduled_date: [jobs]}}.
+
+    Each job gets start_minute/end_minute from scheduled_time + estimated_duration and a
+    conflict flag when it overlaps another job for the same engineer on the same day.
+    Jobs without an engineer are grouped under "unassigned" and never flagged.
+    """
+    calendar: Dict[str, Dict[str, List[dict]]] = {}
+    for job in jobs:
+        start = _start_minutes(job.get("scheduled_time"))
+        entry = {
+            **job,
+            "start_minute": start,
+            "end_minute": start + (job.get("estimated_duration") or 60),
+            "conflicts_with": [],
+            "conflict": False,
+        }
+        engineer_key = job.get("assigned_engineer_id") or UNASSIGNED_KEY
+        day_key = (job.get("scheduled_date") or "")[:10]
+        calendar.setdefault(engineer_key, {}).setdefault(day_key, []).append(entry)
+
+    for engineer_key, days in calendar.items():
+        for day_jobs in days.values():
+            if engineer_key == UNASSIGNED_KEY:
+                day_jobs.sort(key=lambda j: j["start_minute"])
+            else:
+                _flag_overlaps(day_jobs)
+    return calendar
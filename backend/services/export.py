@@ -0,0 +1,97 @@
+import csv
+import io
+import json
+import os
+import tempfile
+from typing import Iterable, List, Tuple
+
+from fastapi import HTTPException
+
+XLSX_MEDIA_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+FILE_CHUNK_SIZE = 64 * 1024
+XLSX_MAX_ROWS = 200_000
+
+
+def _cell(value):
+    if value is None:
+        return ""
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def csv_stream(columns: List[str], pages: Iterable[List[dict]]):
+    """Yield a CSV header, then one chunk of CSV text per page of row dicts."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    yield buffer.getvalue()
+    for page in pages:
+        buffer.seek(0)
+        buffer.truncate(0)
+        for row in page:
+            writer.writerow([_cell(row.get(column)) for column in columns])
+        yield buffer.getvalue()
+
+
+def ndjson_stream(columns: List[str], pages: Iterable[List[dict]]):
+    """Yield one chunk of newline-delimited JSON per page of row dicts."""
+    for page in pages:
+        yield "".join(
+            json.dumps({column: row.get(column) for column in columns}, default=str) + "\n"
+            for row in page
+        )
+
+
+def write_xlsx(sheets: List[Tuple[str, List[str], Iterable[List[dict]]]], max_rows: int = XLSX_MAX_ROWS) -> str:
+    """
+    Write each (title, columns, pages) sheet to a temporary .xlsx file and return its path.
+    Unlike CSV, a workbook can only be sent once it is complete, so this runs before the
+    response starts and raises 413 once the sheets hold more than `max_rows` rows.
+    openpyxl's write-only mode spools rows to disk rather than RAM.
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise HTTPException(status_code=500, detail="XLSX export requires the openpyxl package")
+
+    workbook = Workbook(write_only=True)
+    rows = 0
+    for title, columns, pages in sheets:
+        sheet = workbook.create_sheet(title=title)
+        sheet.append(columns)
+        for page in pages:
+            rows += len(page)
+            if rows > max_rows:
+                break
+            for row in page:
+                sheet.append([_cell(row.get(column)) for column in columns])
+        if rows > max_rows:
+            break
+
+    # Saving also closes the sheets' spool files, so it happens even when the export is refused
+    handle, path = tempfile.mkstemp(suffix=".xlsx")
+    os.close(handle)
+    try:
+        workbook.save(path)
+    except Exception:
+        os.unlink(path)
+        raise
+    if rows > max_rows:
+        os.unlink(path)
+        raise HTTPException(
+            status_code=413,
+            detail=f"Export exceeds {max_rows} rows for XLSX; narrow the years or use format=csv"
+        )
+    return path
+
+
+def file_stream(path: str):
+    """Yield a file in chunks and delete it once it has been sent."""
+    try:
+        with open(path, "rb") as f:
+            while chunk := f.read(FILE_CHUNK_SIZE):
+                yield chunk
+    finally:
+        os.unlink(path)
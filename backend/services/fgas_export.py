@@ -0,0 +1,81 @@
+from typing import Iterator, List
+
+from database import supabase, iter_pages
+
+ASSET_TOTAL_COLUMNS = [
+    "year", "asset_id", "asset_name", "serial_number", "site_id", "refrigerant_type",
+    "refrigerant_charge", "fgas_category", "log_count",
+    "refrigerant_added_kg", "refrigerant_recovered_kg", "refrigerant_lost_kg",
+]
+REFRIGERANT_TOTAL_COLUMNS = [
+    "year", "refrigerant_type", "asset_count", "log_count",
+    "refrigerant_added_kg", "refrigerant_recovered_kg", "refrigerant_lost_kg",
+]
+LOG_COLUMNS = [
+    "created_at", "id", "asset_id", "asset_name", "serial_number", "refrigerant_type", "job_id",
+    "log_type", "refrigerant_added", "refrigerant_recovered", "refrigerant_lost",
+    "technician_certification", "leak_test_result", "test_pressure", "test_method", "notes",
+]
+LOG_PAGE_SIZE = 1000
+MAX_EXPORT_YEARS = 10
+ASSET_EMBED = "assets(name, serial_number, site_id, refrigerant_type, refrigerant_charge, fgas_category)"
+
+
+def _flatten_asset(row: dict) -> dict:
+    asset = row.pop("assets", None) or {}
+    row["asset_name"] = asset.get("name")
+    row["serial_number"] = asset.get("serial_number")
+    for column in ("site_id", "refrigerant_type", "refrigerant_charge", "fgas_category"):
+        row.setdefault(column, asset.get(column))
+    return row
+
+
+def asset_total_pages(from_year: int, to_year: int) -> Iterator[List[dict]]:
+    for year in range(from_year, to_year + 1):
+        pages = iter_pages(
+            'fgas_asset_annual_summary',
+            f"year, asset_id, log_count, refrigerant_added_kg, refrigerant_recovered_kg, refrigerant_lost_kg, {ASSET_EMBED}",
+            filters=lambda query, year=year: query.eq('year', year),
+            key='asset_id',
+        )
+        for page in pages:
+            yield [_flatten_asset(row) for row in page]
+
+
+def refrigerant_total_pages(from_year: int, to_year: int) -> Iterator[List[dict]]:
+    response = (
+        supabase.table('fgas_refrigerant_annual_totals')
+        .select('*')
+        .gte('year', from_year)
+        .lte('year', to_year)
+        .order('year')
+        .order('refrigerant_type')
+        .execute()
+    )
+    yield response.data or []
+
+
+def log_pages(from_year: int, to_year: int) -> Iterator[List[dict]]:
+    """Logs in (created_at, id) keyset order, so the sheet reads chronologically."""
+    start = f"{from_year}-01-01T00:00:00+00:00"
+    end = f"{to_year + 1}-01-01T00:00:00+00:00"
+    last = None
+    while True:
+        query = supabase.table('fgas_logs').select(f"*, {ASSET_EMBED}").gte('created_at', start).lt('created_at', end)
+        if last:
+            created_at, last_id = last
+            query = query.or_(f'created_at.gt."{created_at}",and(created_at.eq."{created_at}",id.gt.{last_id})')
+        rows = query.order('created_at').order('id').limit(LOG_PAGE_SIZE).execute().data or []
+        if not rows:
+            return
+        last = (rows[-1]["created_at"], rows[-1]["id"])
+        yield [_flatten_asset(row) for row in rows]
+        if len(rows) < LOG_PAGE_SIZE:
+            return
+
+
+EXPORT_REPORTS = {
+    "assets": ("Asset totals", ASSET_TOTAL_COLUMNS, asset_total_pages),
+    "refrigerants": ("Refrigerant totals", REFRIGERANT_TOTAL_COLUMNS, refrigerant_total_pages),
+    "logs": ("F-Gas log", LOG_COLUMNS, log_pages),
+}
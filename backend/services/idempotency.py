@@ -0,0 +1,259 @@
+import base64
+import hashlib
+import json
+import re
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import List, Optional, Tuple
+
+import jwt
+from postgrest.exceptions import APIError
+
+from config import JWT_SECRET, JWT_ALGORITHM, IDEMPOTENCY_STORE, IDEMPOTENCY_TTL_SECONDS, IDEMPOTENCY_MAX_KEYS
+
+# POST endpoints that mobile clients retry; a request to one of them carrying an
+# Idempotency-Key header is executed once and later retries replay the first response
+IDEMPOTENT_ROUTES = [
+    re.compile(r"^/api/jobs/[^/]+/complete/?$"),
+    re.compile(r"^/api/jobs/[^/]+/photos/?$"),
+    re.compile(r"^/api/fgas/logs/?$"),
+    re.compile(r"^/api/locations/track/?$"),
+    re.compile(r"^/api/batch/?$"),
+]
+MAX_KEY_LENGTH = 255
+REPLAY_HEADER = (b"idempotent-replayed", b"true")
+
+
+class IdempotencyRecord:
+    """A claimed key: the request fingerprint and, once finished, the response to replay."""
+
+    def __init__(self, fingerprint: str, status: Optional[int] = None, headers: Optional[List[Tuple[bytes, bytes]]] = None, body: bytes = b""):
+        self.fingerprint = fingerprint
+        self.status = status
+        self.headers = headers or []
+        self.body = body
+
+    @property
+    def in_progress(self) -> bool:
+        return self.status is None
+
+
+class MemoryIdempotencyStore:
+    """
+    Bounded in-process store of idempotency records, oldest evicted first.
+    Records expire after ttl_seconds; replays only work within one API process.
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl_seconds: int = 86400):
+        self.maxsize = maxsize
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[bool, Optional[IdempotencyRecord]]:
+        """Claim key for a new request, or return (False, record) if it is already taken."""
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] >= time.monotonic():
+                return False, item[1]
+            self._put(key, IdempotencyRecord(fingerprint))
+            return True, None
+
+    def complete(self, key: str, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        with self._lock:
+            self._put(key, IdempotencyRecord(fingerprint, status, headers, body))
+
+    def _put(self, key: str, record: IdempotencyRecord):
+        self._data[key] = (time.monotonic() + self.ttl_seconds, record)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def release(self, key: str):
+        with self._lock:
+            self._data.pop(key, None)
+
+
+class DatabaseIdempotencyStore:
+    """Idempotency records in the idempotency_keys table, shared by every API process."""
+
+    TABLE_NAME = 'idempotency_keys'
+
+    def __init__(self, ttl_seconds: int = 86400):
+        self.ttl_seconds = ttl_seconds
+
+    def _table(self):
+        from database import supabase
+        return supabase.table(self.TABLE_NAME)
+
+    def _expires_at(self) -> str:
+        return (datetime.now(timezone.utc) + timedelta(seconds=self.ttl_seconds)).isoformat()
+
+    def claim(self, key: str, fingerprint: str) -> Tuple[bool, Optional[IdempotencyRecord]]:
+        now = datetime.now(timezone.utc).isoformat()
+        for _ in range(2):
+            try:
+                # The primary key makes the insert the claim: only one request can win it
+                self._table().insert({"key": key, "fingerprint": fingerprint, "expires_at": self._expires_at()}).execute()
+                return True, None
+            except APIError as e:
+                if e.code != '23505':
+                    raise
+            rows = self._table().select('*').eq('key', key).gt('expires_at', now).execute().data
+            if rows:
+                return False, self._record(rows[0])
+            self._table().delete().eq('key', key).lte('expires_at', now).execute()
+        raise RuntimeError(f"Could not claim idempotency key {key}")
+
+    def complete(self, key: str, fingerprint: str, status: int, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self._table().update({
+            "status_code": status,
+            "response_headers": [[k.decode("latin-1"), v.decode("latin-1")] for k, v in headers],
+            "response_body": base64.b64encode(body).decode(),
+            "expires_at": self._expires_at(),
+        }).eq('key', key).execute()
+
+    def release(self, key: str):
+        self._table().delete().eq('key', key).execute()
+
+    @staticmethod
+    def _record(row: dict) -> IdempotencyRecord:
+        return IdempotencyRecord(
+            row["fingerprint"],
+            row.get("status_code"),
+            [(k.encode("latin-1"), v.encode("latin-1")) for k, v in row.get("response_headers") or []],
+            base64.b64decode(row.get("response_body") or ""),
+        )
+
+
+def create_store():
+    if IDEMPOTENCY_STORE == "database":
+        return DatabaseIdempotencyStore(ttl_seconds=IDEMPOTENCY_TTL_SECONDS)
+    return MemoryIdempotencyStore(maxsize=IDEMPOTENCY_MAX_KEYS, ttl_seconds=IDEMPOTENCY_TTL_SECONDS)
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for k, v in scope.get("headers", []):
+        if k.lower() == name:
+            return v.decode("latin-1")
+    return None
+
+
+def _user_id(scope) -> Optional[str]:
+    authorization = _header(scope, b"authorization") or ""
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return jwt.decode(token, JWT_SECRET, algorithms=[JWT_ALGORITHM]).get("sub")
+    except jwt.InvalidTokenError:
+        return None
+
+
+def request_fingerprint(scope, body: bytes) -> str:
+    """
+    Hash of what the request asks for. Multipart boundaries are random per attempt,
+    so they are removed before hashing to let a re-sent upload match the original.
+    """
+    content_type = _header(scope, b"content-type") or ""
+    match = re.search(r'boundary="?([^";]+)"?', content_type)
+    if content_type.startswith("multipart/") and match:
+        body = body.replace(match.group(1).encode("latin-1"), b"")
+        content_type = content_type[:match.start()]
+    digest = hashlib.sha256()
+    for part in (scope["method"], scope["path"], scope.get("query_string", b"").decode("latin-1"), content_type):
+        digest.update(part.encode() + b"\0")
+    digest.update(body)
+    return digest.hexdigest()
+
+
+class IdempotencyMiddleware:
+    """
+    Replays the stored response for a retried request to an IDEMPOTENT_ROUTES endpoint
+    that repeats a client's Idempotency-Key instead of executing it again.
+
+    Keys are scoped to the authenticated user. Reusing a key for a different request
+    is rejected with 422, and a retry that arrives while the first attempt is still
+    running gets 409. Server errors are not stored, so the client can retry them.
+    """
+
+    def __init__(self, app, store=None):
+        self.app = app
+        self.store = store or create_store()
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or not any(route.match(scope["path"]) for route in IDEMPOTENT_ROUTES)
+        ):
+            return await self.app(scope, receive, send)
+        idempotency_key = _header(scope, b"idempotency-key")
+        user_id = _user_id(scope)
+        if not idempotency_key or not user_id:
+            return await self.app(scope, receive, send)
+        if len(idempotency_key) > MAX_KEY_LENGTH:
+            return await _send_json(send, 400, {"detail": f"Idempotency-Key may be at most {MAX_KEY_LENGTH} characters"})
+
+        chunks = []
+        while True:
+            message = await receive()
+            if message["type"] != "http.request":
+                return
+            chunks.append(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body = b"".join(chunks)
+
+        key = f"{user_id}:{idempotency_key}"
+        fingerprint = request_fingerprint(scope, body)
+        claimed, record = self.store.claim(key, fingerprint)
+        if not claimed:
+            if record.fingerprint != fingerprint:
+                return await _send_json(send, 422, {"detail": "Idempotency-Key was already used for a different request"})
+            if record.in_progress:
+                return await _send_json(send, 409, {"detail": "A request with this Idempotency-Key is still in progress"})
+            await send({"type": "http.response.start", "status": record.status, "headers": [*record.headers, REPLAY_HEADER]})
+            await send({"type": "http.response.body", "body": record.body})
+            return
+
+        body_sent = False
+
+        async def replay_receive():
+            nonlocal body_sent
+            if not body_sent:
+                body_sent = True
+                return {"type": "http.request", "body": body, "more_body": False}
+            return await receive()
+
+        response = {"status": 500, "headers": [], "chunks": []}
+
+        async def capture_send(message):
+            if message["type"] == "http.response.start":
+                response["status"] = message["status"]
+                response["headers"] = list(message.get("headers", []))
+            elif message["type"] == "http.response.body":
+                response["chunks"].append(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, replay_receive, capture_send)
+        except BaseException:
+            self.store.release(key)
+            raise
+        if response["status"] >= 500:
+            self.store.release(key)
+        else:
+            self.store.complete(key, fingerprint, response["status"], response["headers"], b"".join(response["chunks"]))
+
+
+async def _send_json(send, status: int, content: dict):
+    body = json.dumps(content).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+    })
+    await send({"type": "http.response.body", "body": body})
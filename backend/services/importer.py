@@ -0,0 +1,212 @@
+import csv
+import io
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import BinaryIO, Dict, Iterator, List, Tuple
+
+import numpy as np
+import pandas as pd
+from fastapi import HTTPException
+from postgrest.exceptions import APIError
+from pydantic import ValidationError
+
+from database import supabase, batched
+from models.asset import AssetCreate
+from models.customer import CustomerCreate, SiteCreate
+from services.pm_schedule import parse_timestamps, add_months, format_timestamps, DEFAULT_PM_INTERVAL_MONTHS
+from services.refrigerants import compute_fgas_fields
+
+logger = logging.getLogger(__name__)
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+
+
+def check_csv(file: BinaryIO):
+    """
+    Read the whole upload once before anything is inserted, so an encoding or CSV syntax
+    error late in the file rejects the import instead of surfacing after earlier chunks
+    were committed. Rewinds the file for read_csv_chunks.
+    """
+    text = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    reader = csv.reader(text)
+    try:
+        for _ in reader:
+            pass
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+    except csv.Error as e:
+        raise HTTPException(status_code=400, detail=f"Invalid CSV at line {reader.line_num}: {e}")
+    finally:
+        # Detach so closing the wrapper does not close the upload
+        text.detach()
+    file.seek(0)
+
+
+def read_csv_chunks(file: BinaryIO, chunk_size: int = IMPORT_CHUNK_SIZE) -> Iterator[List[Tuple[int, dict]]]:
+    """
+    Yield lists of (line number, row) from an uploaded CSV without reading it all into
+    memory. Keys and values are stripped and empty cells dropped so model defaults apply.
+    """
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    chunk = []
+    for row in reader:
+        cleaned = {
+            key.strip(): value.strip()
+            for key, value in row.items()
+            if key and isinstance(value, str) and value.strip()
+        }
+        if cleaned:
+            chunk.append((reader.line_num, cleaned))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _is_uuid(value: str) -> bool:
+    try:
+        uuid.UUID(value)
+        return True
+    except ValueError:
+        return False
+
+
+def _resolve_parents(
+    rows: List[Tuple[int, dict]],
+    errors: Dict[int, List[str]],
+    id_field: str,
+    name_field: str,
+    table: str,
+    table_name_column: str,
+    label: str
+):
+    """
+    Fill rows[id_field] from an id or a unique name with one query per kind, recording
+    a row error for unknown ids and for names that match no row or several rows.
+    """
+    ids = {row[id_field] for _, row in rows if row.get(id_field) and _is_uuid(row[id_field])}
+    names = {row[name_field] for _, row in rows if not row.get(id_field) and row.get(name_field)}
+
+    known_ids = set()
+    for batch in batched(sorted(ids)):
+        response = supabase.table(table).select('id').in_('id', batch).execute()
+        known_ids.update(r["id"] for r in response.data)
+
+    ids_by_name: Dict[str, List[str]] = {}
+    for batch in batched(sorted(names)):
+        response = supabase.table(table).select(f'id, {table_name_column}').in_(table_name_column, batch).execute()
+        for r in response.data:
+            ids_by_name.setdefault(r[table_name_column], []).append(r["id"])
+
+    for line, row in rows:
+        if row.get(id_field):
+            if row[id_field] not in known_ids:
+                errors.setdefault(line, []).append(f"{id_field}: {label} not found")
+        elif row.get(name_field):
+            matches = ids_by_name.get(row[name_field], [])
+            if len(matches) == 1:
+                row[id_field] = matches[0]
+            elif matches:
+                errors.setdefault(line, []).append(f"{name_field}: matches {len(matches)} {label}s, use {id_field}")
+            else:
+                errors.setdefault(line, []).append(f"{name_field}: {label} not found")
+
+
+def _customer_docs(models: List[CustomerCreate], now: str) -> List[dict]:
+    return [{"id": str(uuid.uuid4()), **m.model_dump(), "created_at": now} for m in models]
+
+
+def _site_docs(models: List[SiteCreate], now: str) -> List[dict]:
+    return [{"id": str(uuid.uuid4()), **m.model_dump(), "created_at": now} for m in models]
+
+
+def _asset_docs(models: List[AssetCreate], now: str) -> List[dict]:
+    """Build asset rows for a chunk, computing PM, leak-check and CO2e fields column-wise."""
+    assets = pd.DataFrame([m.model_dump() for m in models])
+    installed = parse_timestamps(assets["install_date"])
+    months = assets["pm_interval_months"].fillna(DEFAULT_PM_INTERVAL_MONTHS).astype(np.int64).to_numpy()
+    leak_check_months = assets["fgas_leak_check_interval"].fillna(0).astype(np.int64).to_numpy()
+
+    assets["next_pm_due"] = format_timestamps(add_months(installed, months))
+    assets["fgas_next_leak_check_due"] = format_timestamps(
+        np.where(leak_check_months > 0, add_months(installed, leak_check_months), np.datetime64("NaT"))
+    )
+    fgas = compute_fgas_fields(assets.assign(id=None))
+    assets["refrigerant_charge_kg"] = fgas["refrigerant_charge_kg"]
+    assets["fgas_co2_equivalent"] = fgas["fgas_co2_equivalent"]
+    assets["fgas_category"] = fgas["fgas_category"]
+    assets["id"] = [str(uuid.uuid4()) for _ in range(len(assets))]
+    assets["last_service_date"] = None
+    assets["fgas_last_leak_check"] = None
+    assets["created_at"] = now
+    return assets.astype(object).where(assets.notna(), None).to_dict("records")
+
+
+# entity -> (table, create model, parent resolution args or None, doc builder)
+IMPORT_ENTITIES = {
+    "customers": ('customers', CustomerCreate, None, _customer_docs),
+    "sites": ('sites', SiteCreate, ("customer_id", "customer_name", 'customers', 'company_name', "customer"), _site_docs),
+    "assets": ('assets', AssetCreate, ("site_id", "site_name", 'sites', 'name', "site"), _asset_docs),
+}
+
+
+def _format_validation_error(e: ValidationError) -> List[str]:
+    return [f"{'.'.join(str(p) for p in err['loc']) or 'row'}: {err['msg']}" for err in e.errors()]
+
+
+def import_csv(entity: str, file: BinaryIO, dry_run: bool = False) -> dict:
+    """
+    Validate and insert a CSV of customers, sites or assets chunk by chunk. Valid rows
+    of each chunk go in with one insert; invalid rows are reported by CSV line number.
+    """
+    table, model, parent, build_docs = IMPORT_ENTITIES[entity]
+    check_csv(file)
+    now = datetime.now(timezone.utc).isoformat()
+    total = imported = 0
+    report: List[dict] = []
+    failed = 0
+
+    for chunk in read_csv_chunks(file):
+        total += len(chunk)
+        errors: Dict[int, List[str]] = {}
+        if parent:
+            _resolve_parents(chunk, errors, *parent)
+
+        valid_lines, valid_models = [], []
+        for line, row in chunk:
+            if line in errors:
+                continue
+            try:
+                valid_models.append(model(**row))
+                valid_lines.append(line)
+            except ValidationError as e:
+                errors[line] = _format_validation_error(e)
+
+        if valid_models and not dry_run:
+            try:
+                supabase.table(table).insert(build_docs(valid_models, now)).execute()
+                imported += len(valid_models)
+            except APIError as e:
+                for line in valid_lines:
+                    errors[line] = [f"insert failed: {e.message}"]
+        elif valid_models:
+            imported += len(valid_models)
+
+        failed += len(errors)
+        for line in sorted(errors):
+            if len(report) < MAX_REPORTED_ERRORS:
+                report.append({"line": line, "errors": errors[line]})
+
+    logger.info("CSV import of %s: %d rows, %d imported, %d failed", entity, total, imported, failed)
+    return {
+        "entity": entity,
+        "dry_run": dry_run,
+        "rows": total,
+        "imported": imported,
+        "failed": failed,
+        "errors": report,
+        "errors_truncated": failed > len(report),
+    }
@@ -0,0 +1,76 @@
+import uuid
+from datetime import datetime
+from typing import Dict, List, Set
+
+from database import supabase, batched
+from services.cache import calendar_cache
+
+OPEN_JOB_STATUSES = ['pending', 'in_progress', 'travelling']
+
+
+def next_job_numbers(count: int) -> List[str]:
+    """Reserve `count` job numbers from the job_number_seq sequence in one call."""
+    return supabase.rpc('reserve_job_numbers', {"p_count": count}).execute().data
+
+
+def assets_with_open_jobs(asset_ids: List[str], job_type: str) -> Set[str]:
+    """Return the subset of asset_ids already linked to an open job of job_type."""
+    found = set()
+    # Chunked so the in() filter keeps the GET URL within proxy limits
+    for chunk in batched(asset_ids):
+        response = (
+            supabase.table('job_assets')
+            .select('asset_id, jobs!inner(job_type, status)')
+            .in_('asset_id', chunk)
+            .eq('jobs.job_type', job_type)
+            .in_('jobs.status', OPEN_JOB_STATUSES)
+            .execute()
+        )
+        found.update(row["asset_id"] for row in response.data)
+    return found
+
+
+def sites_by_id(site_ids: List[str]) -> Dict[str, dict]:
+    if not site_ids:
+        return {}
+    response = supabase.table('sites').select('id, customer_id, name').in_('id', site_ids).execute()
+    return {site["id"]: site for site in response.data}
+
+
+def insert_generated_jobs(job_docs: List[dict], event_details: List[dict], now: datetime) -> List[dict]:
+    """
+    Number and insert system-generated jobs with one bulk insert, then record their
+    auto_generated events with a second. event_details[i] belongs to job_docs[i].
+    Cached calendars are invalidated, as for any other job write.
+    """
+    if not job_docs:
+        return []
+    for job_doc, job_number in zip(job_docs, next_job_numbers(len(job_docs))):
+        job_doc.update({
+            "id": str(uuid.uuid4()),
+            "job_number": job_number,
+            "status": "pending",
+            "assigned_engineer_id": None,
+            "scheduled_date": None,
+            "scheduled_time": None,
+            "sla_hours": None,
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat(),
+            "created_by": "system",
+            "auto_generated": True
+        })
+    supabase.table('jobs').insert(job_docs).execute()
+    calendar_cache.invalidate()
+
+    supabase.table('job_events').insert([
+        {
+            "id": str(uuid.uuid4()),
+            "job_id": job_doc["id"],
+            "event_type": "auto_generated",
+            "user_id": "system",
+            "timestamp": now.isoformat(),
+            "details": details
+        }
+        for job_doc, details in zip(job_docs, event_details)
+    ]).execute()
+    return job_docs
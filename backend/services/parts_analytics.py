@@ -0,0 +1,126 @@
+import logging
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pandas as pd
+
+from database import iter_pages
+from services.pm_schedule import parse_timestamps
+
+logger = logging.getLogger(__name__)
+
+USAGE_COLUMNS = "id, part_id, quantity, used_at"
+PART_COLUMNS = "id, part_number, name, unit_price, stock_quantity, min_stock_level, lead_time_days"
+
+DEFAULT_LEAD_TIME_DAYS = 7
+# Order enough to cover demand for this many days beyond the reorder point
+REVIEW_PERIOD_DAYS = 30
+# z-score for a 95% cycle service level
+SERVICE_LEVEL_Z = 1.65
+
+
+def _load_usage(since: datetime) -> pd.DataFrame:
+    frames = [
+        pd.DataFrame(page)
+        for page in iter_pages(
+            'part_usage',
+            USAGE_COLUMNS,
+            filters=lambda q: q.gte('used_at', since.isoformat()).not_.is_('part_id', 'null')
+        )
+    ]
+    if not frames:
+        return pd.DataFrame(columns=["part_id", "quantity", "used_at"])
+    return pd.concat(frames, ignore_index=True)
+
+
+def _load_parts() -> pd.DataFrame:
+    frames = [pd.DataFrame(page) for page in iter_pages('parts', PART_COLUMNS)]
+    if not frames:
+        return pd.DataFrame(columns=[c.strip() for c in PART_COLUMNS.split(",")])
+    return pd.concat(frames, ignore_index=True)
+
+
+def compute_reorder_plan(parts: pd.DataFrame, usage: pd.DataFrame, since: datetime, days: int) -> pd.DataFrame:
+    """
+    Per-part consumption rate, weekly demand variability, lead-time reorder point and
+    suggested order quantity. Demand during the lead time is daily_rate * lead_time plus
+    safety stock of z * weekly std * sqrt(lead_time / 7); the reorder point never drops
+    below the part's min_stock_level.
+    """
+    n_weeks = max(1, int(np.ceil(days / 7)))
+    used_at = parse_timestamps(usage["used_at"])
+    week = ((used_at - np.datetime64(since.replace(tzinfo=None), "ns")) // np.timedelta64(7, "D")).astype(np.int64)
+    weekly = (
+        pd.DataFrame({
+            "part_id": usage["part_id"].to_numpy(),
+            "week": np.clip(week, 0, n_weeks - 1),
+            "quantity": pd.to_numeric(usage["quantity"], errors="coerce").fillna(0).to_numpy(),
+        })
+        .groupby(["part_id", "week"])["quantity"].sum()
+        .unstack(fill_value=0)
+        .reindex(columns=range(n_weeks), fill_value=0)
+    )
+    demand = pd.DataFrame({
+        "used_quantity": weekly.sum(axis=1),
+        "weekly_std": weekly.std(axis=1, ddof=0),
+    })
+
+    plan = parts.set_index("id").join(demand, how="left")
+    plan["used_quantity"] = plan["used_quantity"].fillna(0).astype(np.int64)
+    plan["weekly_std"] = plan["weekly_std"].fillna(0)
+    stock = pd.to_numeric(plan["stock_quantity"], errors="coerce").fillna(0)
+    min_stock = pd.to_numeric(plan["min_stock_level"], errors="coerce").fillna(0)
+    lead_time = pd.to_numeric(plan["lead_time_days"], errors="coerce").fillna(DEFAULT_LEAD_TIME_DAYS).clip(lower=0)
+
+    daily_rate = plan["used_quantity"] / days
+    safety_stock = SERVICE_LEVEL_Z * plan["weekly_std"] * np.sqrt(lead_time / 7)
+    reorder_point = np.maximum(np.ceil(daily_rate * lead_time + safety_stock), min_stock)
+    order_up_to = reorder_point + np.ceil(daily_rate * REVIEW_PERIOD_DAYS)
+    suggested = np.where(stock <= reorder_point, np.maximum(order_up_to - stock, 0), 0)
+
+    plan["daily_rate"] = daily_rate.round(3)
+    plan["safety_stock"] = safety_stock.round(1)
+    plan["reorder_point"] = reorder_point.astype(np.int64)
+    plan["days_of_cover"] = (stock / daily_rate.where(daily_rate > 0)).round(1)
+    plan["suggested_order_quantity"] = suggested.astype(np.int64)
+    plan["lead_time_days"] = lead_time.astype(np.int64)
+    plan["estimated_cost"] = (plan["suggested_order_quantity"] * pd.to_numeric(plan["unit_price"], errors="coerce").fillna(0)).round(2)
+    return plan.reset_index()
+
+
+def parts_usage_report(days: int = 365) -> dict:
+    now = datetime.now(timezone.utc)
+    since = now - timedelta(days=days)
+    plan = compute_reorder_plan(_load_parts(), _load_usage(since), since, days)
+
+    records = (
+        plan.sort_values(["used_quantity", "part_number"], ascending=[False, True])
+        .astype(object)
+        .where(plan.notna(), None)
+        .to_dict("records")
+    )
+    purchase_list = sorted(
+        (r for r in records if r["suggested_order_quantity"] > 0),
+        key=lambda r: (r["days_of_cover"] is None, r["days_of_cover"] or 0, r["part_number"] or "")
+    )
+    logger.info("Parts usage report: %d parts, %d to reorder", len(records), len(purchase_list))
+    return {
+        "window_start": since.isoformat(),
+        "window_end": now.isoformat(),
+        "days": days,
+        "parts": records,
+        "purchase_list": [
+            {
+                "id": r["id"],
+                "part_number": r["part_number"],
+                "name": r["name"],
+                "stock_quantity": r["stock_quantity"],
+                "reorder_point": r["reorder_point"],
+                "days_of_cover": r["days_of_cover"],
+                "suggested_order_quantity": r["suggested_order_quantity"],
+                "estimated_cost": r["estimated_cost"],
+            }
+            for r in purchase_list
+        ],
+        "purchase_total": round(sum(r["estimated_cost"] for r in purchase_list), 2),
+    }
@@ -0,0 +1,114 @@
+import bisect
+import logging
+import re
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import PARTS_INDEX_MAX_AGE_SECONDS
+from database import iter_pages
+
+logger = logging.getLogger(__name__)
+
+PARTS_INDEX_COLUMNS = "id, part_number, name, unit_price, stock_quantity"
+
+# Match kinds, in suggestion order: part number prefix, name prefix, prefix of a later word in the name
+MATCH_PART_NUMBER, MATCH_NAME, MATCH_WORD = 0, 1, 2
+
+# Bound the walk along the sorted keys for very short queries such as a single letter
+MAX_SCAN = 500
+
+
+def _index_keys(part: dict) -> List[Tuple[str, int]]:
+    part_number = (part.get("part_number") or "").strip().lower()
+    name = (part.get("name") or "").strip().lower()
+    keys = []
+    if part_number:
+        keys.append((part_number, MATCH_PART_NUMBER))
+    if name:
+        keys.append((name, MATCH_NAME))
+        keys.extend((word, MATCH_WORD) for word in re.split(r"[^0-9a-z]+", name)[1:] if word)
+    return keys
+
+
+class PartsIndex:
+    """
+    Sorted-array prefix index over the parts catalogue for autocomplete.
+
+    Entries are (key, match kind, part id) tuples kept in order, so all keys starting
+    with a prefix form one contiguous run found with bisect. The index is loaded on
+    first use, patched by the part write paths, and reloaded after max_age_seconds so
+    other workers' writes are eventually picked up.
+    """
+
+    def __init__(self, max_age_seconds: int = PARTS_INDEX_MAX_AGE_SECONDS):
+        self.max_age_seconds = max_age_seconds
+        self._entries: List[Tuple[str, int, str]] = []
+        self._parts: Dict[str, dict] = {}
+        self._loaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    def load(self):
+        parts = {}
+        for page in iter_pages('parts', PARTS_INDEX_COLUMNS):
+            for part in page:
+                parts[part["id"]] = part
+        entries = sorted(
+            (key, kind, part_id)
+            for part_id, part in parts.items()
+            for key, kind in _index_keys(part)
+        )
+        with self._lock:
+            self._parts = parts
+            self._entries = entries
+            self._loaded_at = time.monotonic()
+        logger.info("Parts index loaded: %d parts, %d keys", len(parts), len(entries))
+
+    def _ensure_loaded(self):
+        if self._loaded_at is None or time.monotonic() - self._loaded_at > self.max_age_seconds:
+            self.load()
+
+    def _remove_locked(self, part_id: str):
+        part = self._parts.pop(part_id, None)
+        if not part:
+            return
+        for key, kind in _index_keys(part):
+            i = bisect.bisect_left(self._entries, (key, kind, part_id))
+            if i < len(self._entries) and self._entries[i] == (key, kind, part_id):
+                del self._entries[i]
+
+    def upsert(self, part: dict):
+        if self._loaded_at is None:
+            return
+        summary = {column.strip(): part.get(column.strip()) for column in PARTS_INDEX_COLUMNS.split(",")}
+        with self._lock:
+            self._remove_locked(summary["id"])
+            self._parts[summary["id"]] = summary
+            for key, kind in _index_keys(summary):
+                bisect.insort(self._entries, (key, kind, summary["id"]))
+
+    def remove(self, part_id: str):
+        if self._loaded_at is None:
+            return
+        with self._lock:
+            self._remove_locked(part_id)
+
+    def suggest(self, prefix: str, limit: int = 10) -> List[dict]:
+        self._ensure_loaded()
+        prefix = prefix.strip().lower()
+        if not prefix:
+            return []
+        best: Dict[str, Tuple[int, str]] = {}
+        with self._lock:
+            i = bisect.bisect_left(self._entries, (prefix,))
+            end = min(len(self._entries), i + MAX_SCAN)
+            while i < end and self._entries[i][0].startswith(prefix):
+                key, kind, part_id = self._entries[i]
+                if part_id not in best or (kind, key) < best[part_id]:
+                    best[part_id] = (kind, key)
+                i += 1
+            ranked = sorted(best, key=lambda part_id: (*best[part_id], self._parts[part_id].get("name") or ""))[:limit]
+            return [dict(self._parts[part_id]) for part_id in ranked]
+
+
+parts_index = PartsIndex()
@@ -6,6 +6,8 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.units import inch
 
+from metrics import PDF_RENDER_DURATION
+
 
 def create_pdf_document(buffer: BytesIO):
     return SimpleDocTemplate(
@@ -32,6 +34,7 @@ def get_styles():
     return getSampleStyleSheet()
 
 
+@PDF_RENDER_DURATION.labels("quote").time()
 def generate_quote_pdf_content(quote: dict, customer: dict = None):
     buffer = BytesIO()
     doc = create_pdf_document(buffer)
@@ -107,6 +110,7 @@ def generate_quote_pdf_content(quote: dict, customer: dict = None):
     return buffer
 
 
+@PDF_RENDER_DURATION.labels("invoice").time()
 def generate_invoice_pdf_content(invoice: dict, customer: dict = None):
     buffer = BytesIO()
     doc = create_pdf_document(buffer)
@@ -182,6 +186,7 @@ def generate_invoice_pdf_content(invoice: dict, customer: dict = None):
     return buffer
 
 
+@PDF_RENDER_DURATION.labels("job").time()
 def generate_job_pdf_content(job: dict, customer: dict = None, site: dict = None, completion: dict = None):
     buffer = BytesIO()
     doc = create_pdf_document(buffer)
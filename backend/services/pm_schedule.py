@@ -0,0 +1,204 @@
+import logging
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from database import supabase, iter_pages
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PM_INTERVAL_MONTHS = 6
+SCHEDULE_COLUMNS = "id, install_date, last_service_date, pm_interval_months, next_pm_due"
+WRITE_BATCH_SIZE = 500
+
+# Fallback minutes per asset when there is no job history to take a median from
+PM_JOB_ESTIMATED_DURATION = 60
+LEAK_CHECK_ESTIMATED_DURATION = 30
+DURATION_SAMPLE_SIZE = 500
+FORECAST_COLUMNS = "id, next_pm_due, pm_interval_months, refrigerant_type, fgas_next_leak_check_due, fgas_leak_check_interval"
+
+
+def parse_timestamps(values) -> np.ndarray:
+    """Parse ISO date/datetime strings to naive UTC datetime64[ns]; blanks and bad values become NaT."""
+    parsed = pd.to_datetime(pd.Series(values, dtype="object"), utc=True, errors="coerce", format="ISO8601")
+    return parsed.dt.tz_localize(None).to_numpy(dtype="datetime64[ns]")
+
+
+def add_months(dates: np.ndarray, months: np.ndarray) -> np.ndarray:
+    """
+    Add whole calendar months to datetime64[ns] values, clamping to the last day of
+    shorter months (31 Jan + 1 month = 28/29 Feb). Time of day is preserved; NaT stays NaT.
+    """
+    days = dates.astype("datetime64[D]")
+    time_of_day = dates - days.astype("datetime64[ns]")
+    month_start = dates.astype("datetime64[M]")
+    day_of_month = days - month_start.astype("datetime64[D]")
+
+    target_month = month_start + months.astype("timedelta64[M]")
+    target_start = target_month.astype("datetime64[D]")
+    target_length = (target_month + np.timedelta64(1, "M")).astype("datetime64[D]") - target_start
+    target_day = np.minimum(day_of_month, target_length - np.timedelta64(1, "D"))
+
+    return (target_start + target_day).astype("datetime64[ns]") + time_of_day
+
+
+def format_timestamps(values: np.ndarray) -> list:
+    """Format datetime64[ns] values the way the API stores timestamps (isoformat with +00:00)."""
+    formatted = np.char.add(np.datetime_as_string(values, unit="us"), "+00:00").astype(object)
+    formatted[np.isnat(values)] = None
+    return formatted.tolist()
+
+
+def next_pm_due_from(base_date: Optional[str], pm_interval_months: Optional[int]) -> Optional[str]:
+    """Scalar helper for single-asset writes; uses the same calendar-month rule as the bulk job."""
+    if not base_date:
+        return None
+    base = parse_timestamps([base_date])
+    if pd.isna(base[0]):
+        return None
+    months = np.array([pm_interval_months or DEFAULT_PM_INTERVAL_MONTHS], dtype=np.int64)
+    return format_timestamps(add_months(base, months))[0]
+
+
+def compute_pm_schedule(assets: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute next_pm_due for every asset from last_service_date (falling back to
+    install_date) plus pm_interval_months, and return only the rows whose due date changed.
+    """
+    last_service = parse_timestamps(assets["last_service_date"])
+    installed = parse_timestamps(assets["install_date"])
+    base = np.where(np.isnat(last_service), installed, last_service)
+
+    months = (
+        pd.to_numeric(assets["pm_interval_months"], errors="coerce")
+        .fillna(DEFAULT_PM_INTERVAL_MONTHS)
+        .astype(np.int64)
+        .to_numpy()
+    )
+    due = add_months(base, months)
+    current = parse_timestamps(assets["next_pm_due"])
+
+    changed = ~np.isnat(due) & (due != current)
+    return pd.DataFrame({
+        "id": assets["id"].to_numpy()[changed],
+        "next_pm_due": format_timestamps(due[changed]),
+    })
+
+
+def recompute_pm_schedule() -> dict:
+    """Re-plan next_pm_due for the whole estate, writing back only changed rows in batches."""
+    frames = [pd.DataFrame(page) for page in iter_pages('assets', SCHEDULE_COLUMNS)]
+    if not frames:
+        return {"assets_scanned": 0, "assets_updated": 0}
+    assets = pd.concat(frames, ignore_index=True)
+
+    changed = compute_pm_schedule(assets)
+    rows = changed.to_dict("records")
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        supabase.rpc('bulk_update_assets', {"p_rows": rows[start:start + WRITE_BATCH_SIZE]}).execute()
+
+    logger.info("PM schedule recomputed: %d of %d assets changed", len(rows), len(assets))
+    return {"assets_scanned": len(assets), "assets_updated": len(rows)}
+
+
+def _project_occurrences(first_due: np.ndarray, interval_months: np.ndarray, now: np.datetime64, horizon_end: np.datetime64) -> np.ndarray:
+    """
+    Expand each asset's first due date into every occurrence up to horizon_end,
+    stepping by its interval in calendar months. Overdue work is assumed to be done
+    `now` (completion resets the schedule), so it lands in the first week as backlog.
+    """
+    valid = ~np.isnat(first_due) & (interval_months > 0)
+    first_due = np.maximum(first_due[valid], now)
+    interval_months = interval_months[valid]
+    if not len(first_due):
+        return np.array([], dtype="datetime64[ns]")
+
+    horizon_months = int((horizon_end.astype("datetime64[M]") - now.astype("datetime64[M]")).astype(int))
+    steps = int((horizon_months // interval_months).max()) + 1
+
+    step_index = np.tile(np.arange(steps), len(first_due))
+    dates = add_months(np.repeat(first_due, steps), np.repeat(interval_months, steps) * step_index)
+    return dates[dates <= horizon_end]
+
+
+def estimated_minutes_per_asset(job_type: str, fallback: int) -> float:
+    """
+    Median estimated_duration per asset over the last DURATION_SAMPLE_SIZE completed jobs
+    of `job_type` (a leak-check job covers every due asset on its site), or `fallback`
+    when there are none.
+    """
+    response = (
+        supabase.table('jobs')
+        .select('estimated_duration, asset_ids')
+        .eq('job_type', job_type)
+        .eq('status', 'completed')
+        .order('created_at', desc=True)
+        .limit(DURATION_SAMPLE_SIZE)
+        .execute()
+    )
+    per_asset = [
+        job["estimated_duration"] / max(len(job.get("asset_ids") or []), 1)
+        for job in response.data or []
+        if job.get("estimated_duration")
+    ]
+    return float(np.median(per_asset)) if per_asset else float(fallback)
+
+
+def forecast_pm_workload(months: int = 12) -> dict:
+    """
+    Project PM services and F-Gas leak checks over the next `months` and aggregate
+    them into weekly counts and engineer-hours demand, using the median duration of
+    past jobs of each type.
+    """
+    now = np.datetime64(pd.Timestamp.now(tz="UTC").tz_localize(None).normalize(), "ns")
+    week_start = now - (now.astype("datetime64[D]").view("int64") - 4) % 7 * np.timedelta64(1, "D")
+    horizon_end = add_months(np.array([now]), np.array([months]))[0]
+
+    frames = [pd.DataFrame(page) for page in iter_pages('assets', FORECAST_COLUMNS)]
+    assets = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=FORECAST_COLUMNS.split(", "))
+
+    pm_dates = _project_occurrences(
+        parse_timestamps(assets["next_pm_due"]),
+        pd.to_numeric(assets["pm_interval_months"], errors="coerce").fillna(DEFAULT_PM_INTERVAL_MONTHS).astype(np.int64).to_numpy(),
+        now,
+        horizon_end,
+    )
+    fgas = assets["refrigerant_type"].fillna("").astype(bool).to_numpy()
+    leak_dates = _project_occurrences(
+        parse_timestamps(assets["fgas_next_leak_check_due"])[fgas],
+        pd.to_numeric(assets["fgas_leak_check_interval"], errors="coerce").fillna(12).astype(np.int64).to_numpy()[fgas],
+        now,
+        horizon_end,
+    )
+
+    week_count = int((horizon_end - week_start) // np.timedelta64(7, "D")) + 1
+    pm_weeks = np.bincount(((pm_dates - week_start) // np.timedelta64(7, "D")).astype(np.int64), minlength=week_count)
+    leak_weeks = np.bincount(((leak_dates - week_start) // np.timedelta64(7, "D")).astype(np.int64), minlength=week_count)
+    pm_minutes = estimated_minutes_per_asset('pm_service', PM_JOB_ESTIMATED_DURATION)
+    leak_minutes = estimated_minutes_per_asset('leak_check', LEAK_CHECK_ESTIMATED_DURATION)
+    hours = (pm_weeks * pm_minutes + leak_weeks * leak_minutes) / 60
+
+    week_starts = np.datetime_as_string(week_start + np.arange(week_count) * np.timedelta64(7, "D"), unit="D")
+    return {
+        "horizon_start": str(np.datetime_as_string(now, unit="D")),
+        "horizon_end": str(np.datetime_as_string(horizon_end, unit="D")),
+        "weeks": [
+            {
+                "week_start": str(week_starts[i]),
+                "pm_count": int(pm_weeks[i]),
+                "leak_check_count": int(leak_weeks[i]),
+                "engineer_hours": round(float(hours[i]), 2),
+            }
+            for i in range(week_count)
+        ],
+        "minutes_per_asset": {
+            "pm_service": round(pm_minutes, 1),
+            "leak_check": round(leak_minutes, 1),
+        },
+        "totals": {
+            "pm_count": int(pm_weeks.sum()),
+            "leak_check_count": int(leak_weeks.sum()),
+            "engineer_hours": round(float(hours.sum()), 2),
+        },
+    }
@@ -0,0 +1,152 @@
+import logging
+import re
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from database import supabase, iter_pages
+
+logger = logging.getLogger(__name__)
+
+# 100-year GWP values (IPCC AR4) as used by the UK F-Gas Regulation for CO2e calculations
+REFRIGERANT_GWP = {
+    "R23": 14800,
+    "R32": 675,
+    "R125": 3500,
+    "R134A": 1430,
+    "R143A": 4470,
+    "R227EA": 3220,
+    "R404A": 3922,
+    "R407A": 2107,
+    "R407C": 1774,
+    "R407F": 1825,
+    "R407H": 1495,
+    "R410A": 2088,
+    "R417A": 2346,
+    "R422A": 3143,
+    "R422D": 2729,
+    "R427A": 2138,
+    "R434A": 3245,
+    "R437A": 1805,
+    "R438A": 2265,
+    "R442A": 1888,
+    "R448A": 1387,
+    "R449A": 1397,
+    "R452A": 2140,
+    "R452B": 698,
+    "R454A": 239,
+    "R454B": 466,
+    "R454C": 148,
+    "R455A": 148,
+    "R507A": 3985,
+    "R508B": 13396,
+    "R513A": 631,
+    "R1234YF": 4,
+    "R1234ZE": 7,
+    "R290": 3,
+    "R600A": 3,
+    "R744": 1,
+    "R717": 0,
+}
+
+# fgas_category values used by the asset form: tonnes CO2e thresholds for leak-check duty
+FGAS_CATEGORY_THRESHOLDS = [(500, "3"), (50, "2"), (5, "1")]
+# Only empty and threshold categories are derived from CO2e; the hand-picked ones
+# (4 hermetically sealed, 5 fire protection, 6 switchgear) are kept as entered
+DERIVED_FGAS_CATEGORIES = {"", *(label for _, label in FGAS_CATEGORY_THRESHOLDS)}
+
+FGAS_COLUMNS = "id, refrigerant_type, refrigerant_charge, refrigerant_charge_kg, fgas_co2_equivalent, fgas_category"
+WRITE_BATCH_SIZE = 500
+
+_CHARGE_PATTERN = r"^\s*([0-9]+(?:[.,][0-9]+)?)\s*(kg|g)?\s*$"
+
+
+def normalize_refrigerant(values: pd.Series) -> pd.Series:
+    return values.fillna("").astype(str).str.upper().str.replace(r"[\s\-]", "", regex=True)
+
+
+def parse_charge_kg(values: pd.Series) -> pd.Series:
+    """Parse free-text charges such as '2.5', '2,5 kg' or '800g' into kilograms; anything else is NaN."""
+    parts = values.fillna("").astype(str).str.extract(_CHARGE_PATTERN, flags=re.IGNORECASE)
+    amount = pd.to_numeric(parts[0].str.replace(",", ".", regex=False), errors="coerce")
+    return amount.where(parts[1].str.lower() != "g", amount / 1000)
+
+
+def fgas_category_for(co2e_tonnes: pd.Series) -> pd.Series:
+    category = pd.Series("", index=co2e_tonnes.index, dtype=object)
+    for threshold, label in reversed(FGAS_CATEGORY_THRESHOLDS):
+        category = category.mask(co2e_tonnes >= threshold, label)
+    return category
+
+
+def compute_fgas_fields(assets: pd.DataFrame) -> pd.DataFrame:
+    """
+    Compute refrigerant_charge_kg, fgas_co2_equivalent (tCO2e) and fgas_category for
+    every asset. CO2e and category are only derived when the refrigerant is in the GWP
+    table and the charge parses, so hand-entered values for unknown gases are kept.
+    Categories outside DERIVED_FGAS_CATEGORIES are never overwritten.
+    """
+    charge_kg = parse_charge_kg(assets["refrigerant_charge"]).round(3)
+    gwp = normalize_refrigerant(assets["refrigerant_type"]).map(REFRIGERANT_GWP)
+    co2e = (charge_kg * gwp / 1000).round(2)
+    known = co2e.notna()
+
+    current_co2e = pd.to_numeric(assets["fgas_co2_equivalent"], errors="coerce").round(2)
+    current_category = assets["fgas_category"].fillna("")
+    co2e = co2e.where(known, current_co2e)
+    derive_category = known & current_category.astype(str).isin(DERIVED_FGAS_CATEGORIES)
+    category = fgas_category_for(co2e).where(derive_category, current_category)
+
+    return pd.DataFrame({
+        "id": assets["id"],
+        "refrigerant_charge_kg": charge_kg,
+        "fgas_co2_equivalent": co2e,
+        "fgas_category": category,
+    })
+
+
+def _changed(new: pd.Series, old: pd.Series) -> np.ndarray:
+    return ~((new == old) | (new.isna() & old.isna())).to_numpy()
+
+
+def fgas_fields_for(refrigerant_type: Optional[str], refrigerant_charge: Optional[str], fgas_co2_equivalent=None, fgas_category: Optional[str] = "") -> dict:
+    """Scalar helper for single-asset writes; uses the same rules as the bulk job."""
+    computed = compute_fgas_fields(pd.DataFrame([{
+        "id": None,
+        "refrigerant_type": refrigerant_type,
+        "refrigerant_charge": refrigerant_charge,
+        "fgas_co2_equivalent": fgas_co2_equivalent,
+        "fgas_category": fgas_category,
+    }])).iloc[0]
+    return {
+        "refrigerant_charge_kg": None if pd.isna(computed["refrigerant_charge_kg"]) else float(computed["refrigerant_charge_kg"]),
+        "fgas_co2_equivalent": None if pd.isna(computed["fgas_co2_equivalent"]) else float(computed["fgas_co2_equivalent"]),
+        "fgas_category": computed["fgas_category"],
+    }
+
+
+def recompute_fgas_equivalents() -> dict:
+    """Recompute charge, CO2e and category for all assets, writing back only changed rows in batches."""
+    frames = [pd.DataFrame(page) for page in iter_pages('assets', FGAS_COLUMNS)]
+    if not frames:
+        return {"assets_scanned": 0, "assets_updated": 0}
+    assets = pd.concat(frames, ignore_index=True)
+
+    computed = compute_fgas_fields(assets)
+    changed = (
+        _changed(computed["refrigerant_charge_kg"], pd.to_numeric(assets["refrigerant_charge_kg"], errors="coerce"))
+        | _changed(computed["fgas_co2_equivalent"], pd.to_numeric(assets["fgas_co2_equivalent"], errors="coerce"))
+        | _changed(computed["fgas_category"], assets["fgas_category"].fillna(""))
+    )
+    rows = (
+        computed[changed]
+        .astype(object)
+        .where(computed[changed].notna(), None)
+        .to_dict("records")
+    )
+    for start in range(0, len(rows), WRITE_BATCH_SIZE):
+        supabase.rpc('bulk_update_assets', {"p_rows": rows[start:start + WRITE_BATCH_SIZE]}).execute()
+
+    logger.info("F-Gas CO2e recomputed: %d of %d assets changed", len(rows), len(assets))
+    return {"assets_scanned": len(assets), "assets_updated": len(rows)}
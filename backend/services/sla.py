@@ -0,0 +1,281 @@
+import heapq
+import logging
+import threading
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from typing import Dict, List, Optional
+
+from config import SLA_AT_RISK_FRACTION, SLA_RELOAD_INTERVAL_SECONDS
+from postgrest.exceptions import APIError
+
+from database import supabase, iter_pages, batched
+
+logger = logging.getLogger(__name__)
+
+OPEN_JOB_STATUSES = ("pending", "in_progress", "travelling")
+SLA_STATE_OK = "ok"
+SLA_STATE_AT_RISK = "at_risk"
+SLA_STATE_BREACHED = "breached"
+SLA_JOB_COLUMNS = 'id, job_number, customer_id, site_id, priority, status, assigned_engineer_id, sla_hours, created_at'
+SLA_EVENT_TYPES = [f"sla_{SLA_STATE_AT_RISK}", f"sla_{SLA_STATE_BREACHED}"]
+_STATE_RANK = {SLA_STATE_OK: 0, SLA_STATE_AT_RISK: 1, SLA_STATE_BREACHED: 2}
+
+
+def _parse_timestamp(value) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        try:
+            parsed = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+        except ValueError:
+            return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed
+
+
+class SLAMonitor:
+    """
+    Tracks SLA deadlines for open jobs in a min-heap keyed by the next trigger time.
+
+    Each tracked job has two triggers: the at-risk point (once SLA_AT_RISK_FRACTION of
+    the SLA window remains) and the deadline itself. Job writes call track()/discard()
+    so the heap stays current without re-reading the jobs table. Superseded heap entries
+    are skipped lazily using a per-job generation counter.
+
+    Handlers run on worker threads (batch operations, threadpool endpoints), so heap
+    and entry changes happen under a lock; database calls are made outside it.
+
+    Each API worker has its own monitor and only sees the writes it serves, so the
+    monitor is rebuilt from the database every reload_interval_seconds; all workers
+    converge on the same jobs and states within that interval.
+    """
+
+    def __init__(self, reload_interval_seconds: int = SLA_RELOAD_INTERVAL_SECONDS):
+        self.reload_interval_seconds = reload_interval_seconds
+        self._heap: List[tuple] = []
+        self._entries: Dict[str, dict] = {}
+        self._generation = 0
+        self._lock = threading.RLock()
+        # track()/discard() calls made while load() reads the database, replayed onto the result
+        self._changes_during_load: Optional[Dict[str, Optional[dict]]] = None
+        self._loaded_at: Optional[float] = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def needs_reload(self) -> bool:
+        return self._loaded_at is None or time.monotonic() - self._loaded_at >= self.reload_interval_seconds
+
+    def load(self):
+        """
+        (Re)build the monitor from every open job that has an SLA. Each job resumes from
+        the sla_* events already recorded for its current deadline, so a restart, a reload
+        or another worker does not emit them again.
+        """
+        with self._lock:
+            self._changes_during_load = {}
+        try:
+            fresh = SLAMonitor(self.reload_interval_seconds)
+            pages = iter_pages(
+                'jobs',
+                SLA_JOB_COLUMNS,
+                filters=lambda q: q.in_('status', list(OPEN_JOB_STATUSES)).not_.is_('sla_hours', 'null')
+            )
+            for page in pages:
+                for job in page:
+                    fresh.track(job)
+            for job_id, state in fresh._recorded_states(list(fresh._entries)).items():
+                entry = fresh._entries[job_id]
+                if state != SLA_STATE_OK:
+                    fresh._generation += 1
+                    entry.update(state=state, generation=fresh._generation)
+                    fresh._push_next_trigger(job_id, entry)
+            with self._lock:
+                for job_id, job in self._changes_during_load.items():
+                    if job is None:
+                        fresh.discard(job_id)
+                    else:
+                        fresh.track(job)
+                self._heap, self._entries, self._generation = fresh._heap, fresh._entries, fresh._generation
+                self._loaded_at = time.monotonic()
+        finally:
+            with self._lock:
+                self._changes_during_load = None
+        logger.info("SLA monitor loaded %d open jobs", len(self._entries))
+
+    def _recorded_states(self, job_ids: List[str]) -> Dict[str, str]:
+        """The furthest SLA state already recorded in job_events for each job's current deadline."""
+        with self._lock:
+            deadlines = {job_id: self._entries[job_id]["deadline"] for job_id in job_ids if job_id in self._entries}
+        states: Dict[str, str] = {}
+        for batch in batched(job_ids):
+            response = (
+                supabase.table('job_events')
+                .select('job_id, event_type, details')
+                .in_('job_id', batch)
+                .in_('event_type', SLA_EVENT_TYPES)
+                .execute()
+            )
+            for event in response.data or []:
+                deadline = _parse_timestamp((event.get("details") or {}).get("deadline"))
+                if event["job_id"] not in deadlines or deadline != deadlines[event["job_id"]]:
+                    continue
+                state = event["event_type"][len("sla_"):]
+                if _STATE_RANK.get(state, 0) > _STATE_RANK[states.get(event["job_id"], SLA_STATE_OK)]:
+                    states[event["job_id"]] = state
+        return states
+
+    def track(self, job: dict):
+        """Add or refresh a job. Closed jobs and jobs without an SLA are dropped."""
+        job_id = job.get("id")
+        if not job_id:
+            return
+        with self._lock:
+            if self._changes_during_load is not None:
+                self._changes_during_load[job_id] = job
+            self._track(job_id, job)
+
+    def _track(self, job_id: str, job: dict):
+        existing = self._entries.get(job_id)
+        merged = {**existing["job"], **job} if existing else dict(job)
+
+        created_at = _parse_timestamp(merged.get("created_at"))
+        sla_hours = merged.get("sla_hours")
+        if merged.get("status") not in OPEN_JOB_STATUSES or not sla_hours or not created_at:
+            self.discard(job_id)
+            return
+
+        deadline = created_at + timedelta(hours=sla_hours)
+        at_risk_at = deadline - timedelta(hours=sla_hours * SLA_AT_RISK_FRACTION)
+        state = existing["state"] if existing and existing["deadline"] == deadline else SLA_STATE_OK
+
+        self._generation += 1
+        entry = {
+            "job": merged,
+            "deadline": deadline,
+            "at_risk_at": at_risk_at,
+            "state": state,
+            "generation": self._generation,
+        }
+        self._entries[job_id] = entry
+        self._push_next_trigger(job_id, entry)
+
+    def discard(self, job_id: str):
+        with self._lock:
+            if self._changes_during_load is not None:
+                self._changes_during_load[job_id] = None
+            self._entries.pop(job_id, None)
+
+    def _push_next_trigger(self, job_id: str, entry: dict):
+        if entry["state"] == SLA_STATE_OK:
+            heapq.heappush(self._heap, (entry["at_risk_at"], entry["generation"], job_id))
+        elif entry["state"] == SLA_STATE_AT_RISK:
+            heapq.heappush(self._heap, (entry["deadline"], entry["generation"], job_id))
+
+    def check(self, now: Optional[datetime] = None) -> List[dict]:
+        """
+        Pop every trigger that has come due, record its event and return the events written.
+        A job's state only advances once its event is stored; triggers whose insert fails
+        are retried on the next check.
+        """
+        now = now or datetime.now(timezone.utc)
+        due = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                trigger = heapq.heappop(self._heap)
+                entry = self._entries.get(trigger[2])
+                if not entry or entry["generation"] != trigger[1]:
+                    continue
+                if entry["state"] == SLA_STATE_OK and now < entry["deadline"]:
+                    state = SLA_STATE_AT_RISK
+                else:
+                    state = SLA_STATE_BREACHED
+                due.append((trigger, entry, state))
+        if not due:
+            return []
+
+        # Another worker may already have recorded some of these transitions
+        recorded = self._recorded_states([trigger[2] for trigger, _, _ in due])
+        pending = []
+        for trigger, entry, state in due:
+            if _STATE_RANK[recorded.get(trigger[2], SLA_STATE_OK)] >= _STATE_RANK[state]:
+                self._advance(trigger[2], entry, state)
+            else:
+                pending.append((trigger, entry, state, self._event(trigger[2], entry, state, now)))
+        retry = []
+
+        try:
+            if pending:
+                supabase.table('job_events').insert([event for *_, event in pending]).execute()
+            written = pending
+        except APIError as e:
+            logger.error("SLA monitor batch insert failed, retrying events one by one: %s", e)
+            written = []
+            for item in pending:
+                try:
+                    supabase.table('job_events').insert(item[3]).execute()
+                    written.append(item)
+                except APIError as item_error:
+                    if item_error.code == '23503':
+                        # The job was deleted; stop tracking it
+                        self.discard(item[0][2])
+                    else:
+                        logger.error("SLA monitor could not record %s for job %s: %s", item[2], item[0][2], item_error)
+                        retry.append(item[0])
+
+        with self._lock:
+            for trigger in retry:
+                heapq.heappush(self._heap, trigger)
+        for trigger, entry, state, _ in written:
+            self._advance(trigger[2], entry, state)
+        events = [event for *_, event in written]
+        if events:
+            logger.warning("SLA monitor emitted %d events", len(events))
+        return events
+
+    def _advance(self, job_id: str, entry: dict, state: str):
+        with self._lock:
+            # A track() since the trigger was popped replaced the entry; its own triggers stand
+            if self._entries.get(job_id) is not entry:
+                return
+            entry["state"] = state
+            self._push_next_trigger(job_id, entry)
+
+    @staticmethod
+    def _event(job_id: str, entry: dict, state: str, now: datetime) -> dict:
+        return {
+            "id": str(uuid.uuid4()),
+            "job_id": job_id,
+            "event_type": f"sla_{state}",
+            "user_id": "system",
+            "timestamp": now.isoformat(),
+            "details": {
+                "sla_hours": entry["job"].get("sla_hours"),
+                "deadline": entry["deadline"].isoformat(),
+            },
+        }
+
+    def at_risk(self, include_breached: bool = True) -> List[dict]:
+        """Return tracked jobs that are at risk (and optionally breached), soonest deadline first."""
+        now = datetime.now(timezone.utc)
+        states = {SLA_STATE_AT_RISK, SLA_STATE_BREACHED} if include_breached else {SLA_STATE_AT_RISK}
+        with self._lock:
+            flagged = [dict(e) for e in self._entries.values() if e["state"] in states]
+        flagged.sort(key=lambda e: e["deadline"])
+        return [
+            {
+                **entry["job"],
+                "sla_state": entry["state"],
+                "sla_deadline": entry["deadline"].isoformat(),
+                "minutes_remaining": int((entry["deadline"] - now).total_seconds() // 60),
+            }
+            for entry in flagged
+        ]
+
+
+sla_monitor = SLAMonitor()
@@ -0,0 +1,221 @@
+import base64
+import binascii
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import HTTPException
+
+from config import SYNC_PAGE_SIZE, SYNC_OVERLAP_SECONDS
+from database import supabase, batched
+from models.asset import AssetResponse
+from models.customer import SiteResponse
+from models.invoice import PartResponse
+from models.job import JobResponse
+from services.job_generation import OPEN_JOB_STATUSES
+
+
+def _columns(model) -> str:
+    return ", ".join([*model.model_fields, "updated_at"])
+
+
+# entity -> (table, columns)
+SYNC_ENTITIES = {
+    "jobs": ('jobs', _columns(JobResponse)),
+    "sites": ('sites', _columns(SiteResponse)),
+    "assets": ('assets', _columns(AssetResponse)),
+    "parts": ('parts', _columns(PartResponse)),
+    "checklist_templates": ('checklist_templates', "id, name, asset_type, items, created_at, updated_at"),
+}
+
+# entity -> (embedded resource, filter): a device gets its engineer's open jobs and only
+# the sites and assets those jobs reference. Sites and assets are inner-joined to the
+# jobs for filtering; the embedded rows are dropped from the response.
+SYNC_SCOPES = {
+    "jobs": (None, lambda q, user: q.eq('assigned_engineer_id', user["id"]).in_('status', OPEN_JOB_STATUSES)),
+    "sites": ("jobs!inner(id)", lambda q, user: (
+        q.eq('jobs.assigned_engineer_id', user["id"]).in_('jobs.status', OPEN_JOB_STATUSES)
+    )),
+    "assets": ("job_assets!inner(jobs!inner(id))", lambda q, user: (
+        q.eq('job_assets.jobs.assigned_engineer_id', user["id"]).in_('job_assets.jobs.status', OPEN_JOB_STATUSES)
+    )),
+}
+
+# Deletes of shared rows go to every device. Tombstones addressed to an engineer, written
+# when one of their jobs is deleted, reassigned or closed (for the job and the site and
+# assets it referenced), only go to that engineer.
+TOMBSTONE_STREAMS = {
+    "tombstones": lambda q, user: q.neq('entity', 'jobs').is_('engineer_id', 'null'),
+    "engineer_tombstones": lambda q, user: q.eq('engineer_id', user["id"]),
+}
+
+# A position is (timestamp, id). With an id it is an exact keyset position inside a
+# paged pass; without one it is a watermark that is re-read with SYNC_OVERLAP_SECONDS
+# of slack, because rows stamped by a transaction that commits late can land behind it.
+Position = Optional[Tuple[str, Optional[str]]]
+
+
+def encode_cursor(state: dict) -> str:
+    return base64.urlsafe_b64encode(json.dumps(state, separators=(",", ":")).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        state = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if state.get("v") != 1 or not isinstance(state.get("pos"), dict):
+            raise ValueError
+        return state
+    except (ValueError, binascii.Error, AttributeError):
+        raise HTTPException(status_code=400, detail="Invalid sync cursor")
+
+
+def _after(query, position: Position, column: str):
+    if not position:
+        return query
+    ts, last_id = position
+    if last_id is None:
+        since = datetime.fromisoformat(ts) - timedelta(seconds=SYNC_OVERLAP_SECONDS)
+        return query.gt(column, since.isoformat())
+    return query.or_(f'{column}.gt."{ts}",and({column}.eq."{ts}",id.gt.{last_id})')
+
+
+def _page(table: str, columns: str, position: Position, column: str = 'updated_at', filters=None) -> List[dict]:
+    query = supabase.table(table).select(columns)
+    if filters:
+        query = filters(query)
+    query = _after(query, position, column)
+    return query.order(column).order('id').limit(SYNC_PAGE_SIZE).execute().data or []
+
+
+def _scoped(entity: str, columns: str, user: dict):
+    """Select columns and a filter restricting entity to the engineer's scope, if it has one."""
+    if entity not in SYNC_SCOPES:
+        return columns, None
+    embed, scope = SYNC_SCOPES[entity]
+    return (f"{columns}, {embed}" if embed else columns), lambda q: scope(q, user)
+
+
+def _strip_embeds(entity: str, rows: List[dict]) -> List[dict]:
+    embed = SYNC_SCOPES.get(entity, (None,))[0]
+    if embed:
+        key = embed.split("!", 1)[0]
+        for row in rows:
+            row.pop(key, None)
+    return rows
+
+
+def _in_scope(entity: str, user: dict, ids: List[str]) -> set:
+    table = SYNC_ENTITIES[entity][0]
+    columns, filters = _scoped(entity, 'id', user)
+    found = set()
+    for chunk in batched(sorted(set(ids))):
+        query = supabase.table(table).select(columns).in_('id', chunk)
+        found.update(row["id"] for row in filters(query).execute().data or [])
+    return found
+
+
+def _out_of_scope(entity: str, user: dict, ids: List[str]) -> List[str]:
+    """Drop tombstoned ids that are back in the engineer's scope, e.g. a job handed back."""
+    if not ids or entity not in SYNC_SCOPES:
+        return sorted(set(ids))
+    current = _in_scope(entity, user, ids)
+    return sorted({entity_id for entity_id in ids if entity_id not in current})
+
+
+def _is_uuid(value) -> bool:
+    try:
+        uuid.UUID(str(value))
+        return True
+    except ValueError:
+        return False
+
+
+def _rows_by_id(entity: str, ids) -> List[dict]:
+    table, columns = SYNC_ENTITIES[entity]
+    rows = []
+    for chunk in batched(sorted(ids)):
+        rows.extend(supabase.table(table).select(columns).in_('id', chunk).execute().data or [])
+    return rows
+
+
+def _add_referenced(changes: Dict[str, List[dict]]):
+    """
+    Add the sites and assets of changed jobs that were not sent with this page. A job
+    newly assigned to the engineer brings them into scope although they did not change.
+    """
+    jobs = changes["jobs"]
+    site_ids = {job["site_id"] for job in jobs if job.get("site_id")}
+    asset_ids = {asset_id for job in jobs for asset_id in job.get("asset_ids") or [] if _is_uuid(asset_id)}
+    for entity, ids in (("sites", site_ids), ("assets", asset_ids)):
+        missing = ids - {row["id"] for row in changes[entity]}
+        if missing:
+            changes[entity].extend(_rows_by_id(entity, missing))
+
+
+def sync_changes(user: dict, cursor: Optional[str]) -> dict:
+    """
+    Return one page of changes for an engineer device.
+
+    Without a cursor this starts a full pass: the engineer's open jobs, the sites and
+    assets they reference, and every part and checklist template. With a cursor it
+    returns rows changed since then and ids deleted since then. Jobs that were
+    reassigned away from the engineer or closed, and sites and assets no open job of
+    theirs references any more, come back as deletions, recorded as tombstones by a
+    trigger on jobs. Call again with the returned cursor while has_more is true.
+    """
+    if cursor:
+        state = decode_cursor(cursor)
+    else:
+        state = {"v": 1, "full": datetime.now(timezone.utc).isoformat(), "pos": {}}
+    full_pass_started = state.get("full")
+    positions: Dict[str, Position] = {k: tuple(v) if v else None for k, v in state["pos"].items()}
+
+    changes: Dict[str, List[dict]] = {}
+    deleted: Dict[str, List[str]] = {}
+    has_more = False
+
+    for entity, (table, columns) in SYNC_ENTITIES.items():
+        select, filters = _scoped(entity, columns, user)
+        rows = _strip_embeds(entity, _page(table, select, positions.get(entity), filters=filters))
+        if rows:
+            positions[entity] = (rows[-1]["updated_at"], rows[-1]["id"])
+        has_more = has_more or len(rows) == SYNC_PAGE_SIZE
+        changes[entity] = rows
+        deleted[entity] = []
+
+    if not full_pass_started:
+        for stream, filters in TOMBSTONE_STREAMS.items():
+            # Cursors from before job tombstones had their own stream resume from the shared one
+            position = positions.get(stream) or positions.get("tombstones")
+            tombstones = _page(
+                'sync_tombstones', 'id, entity, entity_id, deleted_at', position, column='deleted_at',
+                filters=lambda q: filters(q, user)
+            )
+            if tombstones:
+                positions[stream] = (tombstones[-1]["deleted_at"], tombstones[-1]["id"])
+            elif position:
+                positions[stream] = position
+            has_more = has_more or len(tombstones) == SYNC_PAGE_SIZE
+            for tombstone in tombstones:
+                if tombstone["entity"] in deleted:
+                    deleted[tombstone["entity"]].append(tombstone["entity_id"])
+        for entity in deleted:
+            deleted[entity] = _out_of_scope(entity, user, deleted[entity])
+        _add_referenced(changes)
+
+    if has_more:
+        next_state = {"v": 1, "full": full_pass_started, "pos": positions}
+    elif full_pass_started:
+        # Resume from the start of the full pass so changes made while it ran are not missed
+        next_state = {"v": 1, "full": None, "pos": {k: (full_pass_started, None) for k in [*SYNC_ENTITIES, *TOMBSTONE_STREAMS]}}
+    else:
+        next_state = {"v": 1, "full": None, "pos": {k: (p[0], None) if p else None for k, p in positions.items()}}
+
+    return {
+        "cursor": encode_cursor(next_state),
+        "has_more": has_more,
+        "reset": not cursor,
+        "changes": changes,
+        "deleted": deleted,
+    }
@@ -0,0 +1,59 @@
+from typing import List
+
+from database import supabase
+from models.asset import AssetResponse
+from models.customer import CustomerResponse, SiteResponse
+from models.job import JobResponse
+from services.job_generation import OPEN_JOB_STATUSES
+
+WORK_PACK_JOB_LIMIT = 100
+
+
+def _columns(model) -> str:
+    return ", ".join(model.model_fields)
+
+
+def _by_id(table: str, columns: str, ids: List[str]) -> dict:
+    if not ids:
+        return {}
+    response = supabase.table(table).select(columns).in_('id', ids).execute()
+    return {row["id"]: row for row in response.data}
+
+
+def build_work_pack(engineer_id: str) -> dict:
+    """
+    Everything an engineer needs offline for their open jobs, in six queries: the jobs,
+    then their customers, sites, assets and photos in bulk, plus the checklist templates.
+    Related rows are keyed by id so a site or asset shared by several jobs is sent once.
+    """
+    jobs = (
+        supabase.table('jobs')
+        .select(_columns(JobResponse))
+        .eq('assigned_engineer_id', engineer_id)
+        .in_('status', OPEN_JOB_STATUSES)
+        .order('scheduled_date')
+        .order('id')
+        .limit(WORK_PACK_JOB_LIMIT)
+        .execute()
+        .data
+    )
+    job_ids = [job["id"] for job in jobs]
+    customer_ids = sorted({job["customer_id"] for job in jobs if job.get("customer_id")})
+    site_ids = sorted({job["site_id"] for job in jobs if job.get("site_id")})
+    asset_ids = sorted({asset_id for job in jobs for asset_id in (job.get("asset_ids") or [])})
+
+    photos = {}
+    if job_ids:
+        for photo in supabase.table('job_photos').select('*').in_('job_id', job_ids).order('id').execute().data:
+            photos.setdefault(photo["job_id"], []).append(photo)
+
+    templates = supabase.table('checklist_templates').select('id, name, asset_type, items').order('id').limit(100).execute().data
+
+    return {
+        "jobs": jobs,
+        "customers": _by_id('customers', _columns(CustomerResponse), customer_ids),
+        "sites": _by_id('sites', _columns(SiteResponse), site_ids),
+        "assets": _by_id('assets', _columns(AssetResponse), asset_ids),
+        "photos": photos,
+        "checklist_templates": templates,
+    }
@@ -83,18 +83,23 @@ export function useUpdateJobStatus() {
 
   return useMutation({
     mutationFn: async ({ jobId, status }) => {
-      await updateLocalJob(jobId, { status });
+      // Updates must carry the version they were based on (the API answers 428 otherwise)
+      const localJob = await db.jobs.get(jobId);
+      const version = localJob?.version;
       
       if (!navigator.onLine) {
         await addToMutationQueue({
           type: MUTATION_TYPES.UPDATE_JOB_STATUS,
           jobId,
-          payload: { status },
+          payload: { status, version },
         });
+        // Each synced update bumps the version, so a later queued change expects the next one
+        await updateLocalJob(jobId, { status, version: version == null ? version : version + 1 });
         return { offline: true, jobId, status };
       }
       
-      const response = await api.put(`/jobs/${jobId}`, { status });
+      const response = await api.put(`/jobs/${jobId}`, { status, version });
+      await updateLocalJob(jobId, { status, version: response.data.version });
       return { offline: false, data: response.data };
     },
     onMutate: async ({ jobId, status }) => {
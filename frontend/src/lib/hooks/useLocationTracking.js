@@ -1,5 +1,5 @@
 import { useEffect, useRef, useCallback, useState } from 'react';
-import { api } from '../api';
+import { postLocations } from '../locationCodec';
 import { addToLocationQueue, getUnsyncedLocations, markLocationsSynced } from '../db';
 import { toast } from 'sonner';
 
@@ -66,7 +66,7 @@ export function useLocationTracking(jobs, isEnabled) {
         recorded_at: loc.recordedAt,
       }));
 
-      await api.post('/locations/track', { locations: locationPayload });
+      await postLocations(locationPayload);
 
       const ids = unsyncedLocations.map((loc) => loc.id);
       await markLocationsSynced(ids);
@@ -0,0 +1,97 @@
+import { api } from './api';
+
+// Binary location batch accepted by POST /locations/track; the layout is documented
+// in backend/services/location_codec.py. About 17 bytes per point instead of ~150 as JSON.
+export const LOCATION_BATCH_MEDIA_TYPE = 'application/vnd.fsm.location-batch';
+const LOCATION_STATUSES = ['travelling', 'in_progress', 'pending', 'completed'];
+const HEADER_SIZE = 26;
+const POINT_SIZE = 17;
+const NONE_U16 = 0xffff;
+const MAX_BATCH_POINTS = 10000;
+const MAX_INT32 = 2 ** 31 - 1;
+const UUID_PATTERN = /^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$/i;
+
+function canEncode(points) {
+  const times = points.map((p) => Date.parse(p.recorded_at));
+  return points.length <= MAX_BATCH_POINTS && points.every(
+    (p, i) =>
+      !Number.isNaN(times[i]) &&
+      (i === 0 || Math.abs(times[i] - times[i - 1]) <= MAX_INT32) &&
+      LOCATION_STATUSES.includes(p.status || 'travelling') &&
+      (!p.job_id || UUID_PATTERN.test(p.job_id))
+  );
+}
+
+export function encodeLocationBatch(points) {
+  const jobIds = [...new Set(points.map((p) => p.job_id).filter(Boolean))];
+  const count = points.length;
+  const buffer = new ArrayBuffer(HEADER_SIZE + jobIds.length * 16 + count * POINT_SIZE);
+  const view = new DataView(buffer);
+
+  const times = points.map((p) => Date.parse(p.recorded_at));
+  const lats = points.map((p) => Math.round(p.latitude * 1e7));
+  const lons = points.map((p) => Math.round(p.longitude * 1e7));
+
+  view.setUint8(0, 0x4c); // "LOC1"
+  view.setUint8(1, 0x4f);
+  view.setUint8(2, 0x43);
+  view.setUint8(3, 0x31);
+  view.setUint32(4, count, true);
+  view.setBigInt64(8, BigInt(times[0] || 0), true);
+  view.setInt32(16, lats[0] || 0, true);
+  view.setInt32(20, lons[0] || 0, true);
+  view.setUint16(24, jobIds.length, true);
+
+  let offset = HEADER_SIZE;
+  for (const jobId of jobIds) {
+    const hex = jobId.replace(/-/g, '');
+    for (let i = 0; i < 16; i += 1) {
+      view.setUint8(offset + i, parseInt(hex.slice(i * 2, i * 2 + 2), 16));
+    }
+    offset += 16;
+  }
+
+  const columns = [
+    [4, (i) => view.setInt32(offset + i * 4, i ? times[i] - times[i - 1] : 0, true)],
+    [4, (i) => view.setInt32(offset + i * 4, i ? lats[i] - lats[i - 1] : 0, true)],
+    [4, (i) => view.setInt32(offset + i * 4, i ? lons[i] - lons[i - 1] : 0, true)],
+    [2, (i) => {
+      const accuracy = points[i].accuracy;
+      const decimetres = accuracy == null ? NONE_U16 : Math.min(Math.round(accuracy * 10), NONE_U16 - 1);
+      view.setUint16(offset + i * 2, decimetres, true);
+    }],
+    [2, (i) => {
+      const jobId = points[i].job_id;
+      view.setUint16(offset + i * 2, jobId ? jobIds.indexOf(jobId) : NONE_U16, true);
+    }],
+    [1, (i) => view.setUint8(offset + i, LOCATION_STATUSES.indexOf(points[i].status || 'travelling'))],
+  ];
+  for (const [size, write] of columns) {
+    for (let i = 0; i < count; i += 1) write(i);
+    offset += count * size;
+  }
+  return buffer;
+}
+
+async function gzip(buffer) {
+  const stream = new Blob([buffer]).stream().pipeThrough(new CompressionStream('gzip'));
+  return new Response(stream).arrayBuffer();
+}
+
+/**
+ * Post location points to /locations/track, using the binary batch format
+ * (gzipped where the browser supports it) and falling back to JSON for points
+ * it cannot represent.
+ */
+export async function postLocations(points) {
+  if (!canEncode(points)) {
+    return api.post('/locations/track', { locations: points });
+  }
+  const headers = { 'Content-Type': LOCATION_BATCH_MEDIA_TYPE };
+  let body = encodeLocationBatch(points);
+  if (typeof CompressionStream !== 'undefined') {
+    body = await gzip(body);
+    headers['Content-Encoding'] = 'gzip';
+  }
+  return api.post('/locations/track', body, { headers });
+}
@@ -1,4 +1,5 @@
 import { api } from './api';
+import { postLocations } from './locationCodec';
 import { 
   db, 
   getPendingMutations, 
@@ -46,6 +47,11 @@ export async function processMutationQueue() {
         await removeMutation(mutation.id);
         
       } catch (error) {
+        // The job was already completed, e.g. by an earlier attempt whose response was lost
+        if (mutation.type === MUTATION_TYPES.COMPLETE_JOB && error.response?.status === 409) {
+          await removeMutation(mutation.id);
+          continue;
+        }
         console.error('Failed to sync mutation:', mutation, error);
         await updateMutationStatus(mutation.id, MUTATION_STATUS.FAILED);
       }
@@ -110,7 +116,7 @@ export async function syncLocationQueue() {
       recorded_at: loc.recordedAt,
     }));
 
-    await api.post('/locations/track', { locations: locationPayload });
+    await postLocations(locationPayload);
 
     const ids = unsyncedLocations.map((loc) => loc.id);
     await markLocationsSynced(ids);
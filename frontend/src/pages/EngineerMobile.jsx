@@ -121,13 +121,13 @@ const EngineerMobile = () => {
     }
   };
 
-  const updateJobStatus = async (jobId, status) => {
+  const updateJobStatus = async (job, status) => {
     try {
-      await api.put(`/jobs/${jobId}`, { status });
+      const response = await api.put(`/jobs/${job.id}`, { status, version: job.version });
       toast.success(`Job ${status.replace("_", " ")}`);
       fetchData();
       if (selectedJob) {
-        setSelectedJob({ ...selectedJob, status });
+        setSelectedJob({ ...selectedJob, status, version: response.data.version });
       }
     } catch (error) {
       toast.error("Failed to update job status");
@@ -198,7 +198,7 @@ const EngineerMobile = () => {
         engineer_notes: engineerNotes,
         travel_time: travelTime,
         time_on_site: timeOnSite,
-        parts_used: partsUsed.map((p) => ({ name: p.name, quantity: p.quantity })),
+        parts_used: partsUsed.map((p) => ({ part_id: p.id, part_number: p.part_number, name: p.name, quantity: p.quantity })),
         checklist_items: checklistItems,
         customer_signature: signatureData,
         photos: [],
@@ -371,7 +371,7 @@ const EngineerMobile = () => {
                   <Button
                     variant={selectedJob?.status === "travelling" ? "default" : "outline"}
                     className={selectedJob?.status === "travelling" ? "bg-purple-600" : ""}
-                    onClick={() => updateJobStatus(selectedJob?.id, "travelling")}
+                    onClick={() => updateJobStatus(selectedJob, "travelling")}
                     data-testid="status-travelling-btn"
                   >
                     <Navigation className="h-4 w-4 mr-1" />
@@ -380,7 +380,7 @@ const EngineerMobile = () => {
                   <Button
                     variant={selectedJob?.status === "in_progress" ? "default" : "outline"}
                     className={selectedJob?.status === "in_progress" ? "bg-cyan-600" : ""}
-                    onClick={() => updateJobStatus(selectedJob?.id, "in_progress")}
+                    onClick={() => updateJobStatus(selectedJob, "in_progress")}
                     data-testid="status-progress-btn"
                   >
                     <Play className="h-4 w-4 mr-1" />
@@ -388,7 +388,7 @@ const EngineerMobile = () => {
                   </Button>
                   <Button
                     variant="outline"
-                    onClick={() => updateJobStatus(selectedJob?.id, "pending")}
+                    onClick={() => updateJobStatus(selectedJob, "pending")}
                     data-testid="status-pause-btn"
                   >
                     <Pause className="h-4 w-4 mr-1" />
@@ -140,20 +140,30 @@ const JobDetail = () => {
 
   const updateStatus = async (status) => {
     try {
-      await api.put(`/jobs/${id}`, { status });
+      await api.put(`/jobs/${id}`, { status, version: job?.version });
       toast.success(`Job status updated to ${status.replace("_", " ")}`);
       fetchData();
     } catch (error) {
+      if (error.response?.status === 409) {
+        toast.error("This job was changed by someone else. Showing the latest version.");
+        fetchData();
+        return;
+      }
       toast.error("Failed to update status");
     }
   };
 
   const updateEngineer = async (engineerId) => {
     try {
-      await api.put(`/jobs/${id}`, { assigned_engineer_id: engineerId || null });
+      await api.put(`/jobs/${id}`, { assigned_engineer_id: engineerId || null, version: job?.version });
       toast.success("Engineer updated");
       fetchData();
     } catch (error) {
+      if (error.response?.status === 409) {
+        toast.error("This job was changed by someone else. Showing the latest version.");
+        fetchData();
+        return;
+      }
       toast.error("Failed to update engineer");
     }
   };
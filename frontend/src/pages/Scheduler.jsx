@@ -571,6 +571,7 @@ const Scheduler = () => {
       await api.put(`/jobs/${job.id}`, {
         scheduled_date: scheduledDate,
         scheduled_time: scheduledTime,
+        version: job.version,
       });
       toast.success(`Job ${job.job_number} scheduled for ${scheduledDate}`);
       triggerRefresh();
@@ -579,9 +580,9 @@ const Scheduler = () => {
     }
   };
 
-  const updateJobEngineer = async (jobId, engineerId) => {
+  const updateJobEngineer = async (job, engineerId) => {
     try {
-      await api.put(`/jobs/${jobId}`, { assigned_engineer_id: engineerId || null });
+      await api.put(`/jobs/${job.id}`, { assigned_engineer_id: engineerId || null, version: job.version });
       toast.success("Engineer updated");
       triggerRefresh();
     } catch (error) {
@@ -776,7 +777,7 @@ const Scheduler = () => {
                   </p>
                   <Select
                     value={selectedJob.assigned_engineer_id || "unassigned"}
-                    onValueChange={(v) => updateJobEngineer(selectedJob.id, v === "unassigned" ? null : v)}
+                    onValueChange={(v) => updateJobEngineer(selectedJob, v === "unassigned" ? null : v)}
                   >
                     <SelectTrigger data-testid="scheduler-engineer-select">
                       <SelectValue placeholder="Unassigned" />
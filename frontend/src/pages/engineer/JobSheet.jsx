@@ -148,7 +148,7 @@ export default function JobSheet() {
       engineer_notes: engineerNotes,
       travel_time: travelTime,
       time_on_site: timeOnSite,
-      parts_used: partsUsed.map((p) => ({ name: p.name, quantity: p.quantity })),
+      parts_used: partsUsed.map((p) => ({ part_id: p.id, part_number: p.part_number, name: p.name, quantity: p.quantity })),
       checklist_items: checklistItems,
       customer_signature: signatureData,
       photos: [],
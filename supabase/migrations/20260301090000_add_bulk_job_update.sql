@@ -0,0 +1,66 @@
+-- Bulk job reassignment / rescheduling
+-- Applies many per-job changes in a single transaction: one set-based UPDATE on jobs
+-- and one INSERT ... SELECT into job_events. If any job id does not exist the whole
+-- call is rolled back (all-or-nothing).
+--
+-- p_items is a JSON array of objects:
+--   [{"job_id": "...", "assigned_engineer_id": "...", "scheduled_date": "YYYY-MM-DD", "scheduled_time": "HH:MM"}]
+-- Fields that are omitted or null are left unchanged.
+
+CREATE OR REPLACE FUNCTION bulk_update_jobs(p_items JSONB, p_user_id VARCHAR)
+RETURNS SETOF jobs
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_requested INTEGER;
+    v_found INTEGER;
+BEGIN
+    SELECT COUNT(DISTINCT item->>'job_id') INTO v_requested FROM jsonb_array_elements(p_items) AS item;
+
+    -- Lock every target row up front so concurrent edits wait for this batch
+    SELECT COUNT(*) INTO v_found
+    FROM (
+        SELECT j.id FROM jobs j
+        WHERE j.id IN (SELECT (item->>'job_id')::UUID FROM jsonb_array_elements(p_items) AS item)
+        FOR UPDATE
+    ) locked;
+
+    IF v_found <> v_requested THEN
+        RAISE EXCEPTION 'Job not found: % of % jobs do not exist', v_requested - v_found, v_requested
+            USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+    SELECT
+        gen_random_uuid(),
+        j.id,
+        'rescheduled',
+        p_user_id,
+        NOW(),
+        jsonb_build_object(
+            'bulk', TRUE,
+            'old_engineer_id', j.assigned_engineer_id,
+            'new_engineer_id', COALESCE(c.assigned_engineer_id, j.assigned_engineer_id),
+            'old_scheduled_date', j.scheduled_date,
+            'new_scheduled_date', COALESCE(c.scheduled_date, j.scheduled_date),
+            'old_scheduled_time', j.scheduled_time,
+            'new_scheduled_time', COALESCE(c.scheduled_time, j.scheduled_time)
+        )
+    FROM jobs j
+    JOIN jsonb_to_recordset(p_items) AS c(
+        job_id UUID, assigned_engineer_id UUID, scheduled_date VARCHAR, scheduled_time VARCHAR
+    ) ON c.job_id = j.id;
+
+    RETURN QUERY
+    UPDATE jobs j SET
+        assigned_engineer_id = COALESCE(c.assigned_engineer_id, j.assigned_engineer_id),
+        scheduled_date = COALESCE(c.scheduled_date, j.scheduled_date),
+        scheduled_time = COALESCE(c.scheduled_time, j.scheduled_time),
+        updated_at = NOW()
+    FROM jsonb_to_recordset(p_items) AS c(
+        job_id UUID, assigned_engineer_id UUID, scheduled_date VARCHAR, scheduled_time VARCHAR
+    )
+    WHERE j.id = c.job_id
+    RETURNING j.*;
+END;
+$$;
@@ -0,0 +1,120 @@
+-- Optimistic concurrency for job updates
+-- Adds a version counter to jobs and a single-round-trip update function that
+-- compares the caller's expected version, applies the change, bumps the version
+-- and records a status_changed event in one transaction.
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS version INTEGER NOT NULL DEFAULT 1;
+-- JobUpdate has always accepted notes; make sure the column exists
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS notes TEXT DEFAULT '';
+
+-- p_changes holds only the columns being changed; absent keys keep their current value.
+-- p_expected_version may be NULL for an unconditional update.
+-- Raises P0002 when the job does not exist and PT409 (HTTP 409) on a version mismatch.
+CREATE OR REPLACE FUNCTION update_job_versioned(
+    p_job_id UUID,
+    p_changes JSONB,
+    p_expected_version INTEGER,
+    p_user_id VARCHAR
+)
+RETURNS SETOF jobs
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_old jobs;
+    v_new jobs;
+BEGIN
+    SELECT * INTO v_old FROM jobs WHERE id = p_job_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Job not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    IF p_expected_version IS NOT NULL AND v_old.version <> p_expected_version THEN
+        RAISE EXCEPTION 'Job has been modified by another user'
+            USING ERRCODE = 'PT409',
+                  DETAIL = format('expected version %s, current version %s', p_expected_version, v_old.version);
+    END IF;
+
+    UPDATE jobs j SET
+        (status, assigned_engineer_id, scheduled_date, scheduled_time, notes, priority) = (
+            SELECT r.status, r.assigned_engineer_id, r.scheduled_date, r.scheduled_time, r.notes, r.priority
+            FROM jsonb_populate_record(v_old, p_changes) r
+        ),
+        updated_at = NOW(),
+        version = j.version + 1
+    WHERE j.id = p_job_id
+    RETURNING j.* INTO v_new;
+
+    IF v_new.status IS DISTINCT FROM v_old.status THEN
+        INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+        VALUES (
+            gen_random_uuid(),
+            p_job_id,
+            'status_changed',
+            p_user_id,
+            NOW(),
+            jsonb_build_object('old_status', v_old.status, 'new_status', v_new.status)
+        );
+    END IF;
+
+    RETURN NEXT v_new;
+END;
+$$;
+
+-- Bulk reschedules bump the version too, so they invalidate stale single-job edits
+CREATE OR REPLACE FUNCTION bulk_update_jobs(p_items JSONB, p_user_id VARCHAR)
+RETURNS SETOF jobs
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_requested INTEGER;
+    v_found INTEGER;
+BEGIN
+    SELECT COUNT(DISTINCT item->>'job_id') INTO v_requested FROM jsonb_array_elements(p_items) AS item;
+
+    SELECT COUNT(*) INTO v_found
+    FROM (
+        SELECT j.id FROM jobs j
+        WHERE j.id IN (SELECT (item->>'job_id')::UUID FROM jsonb_array_elements(p_items) AS item)
+        FOR UPDATE
+    ) locked;
+
+    IF v_found <> v_requested THEN
+        RAISE EXCEPTION 'Job not found: % of % jobs do not exist', v_requested - v_found, v_requested
+            USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+    SELECT
+        gen_random_uuid(),
+        j.id,
+        'rescheduled',
+        p_user_id,
+        NOW(),
+        jsonb_build_object(
+            'bulk', TRUE,
+            'old_engineer_id', j.assigned_engineer_id,
+            'new_engineer_id', COALESCE(c.assigned_engineer_id, j.assigned_engineer_id),
+            'old_scheduled_date', j.scheduled_date,
+            'new_scheduled_date', COALESCE(c.scheduled_date, j.scheduled_date),
+            'old_scheduled_time', j.scheduled_time,
+            'new_scheduled_time', COALESCE(c.scheduled_time, j.scheduled_time)
+        )
+    FROM jobs j
+    JOIN jsonb_to_recordset(p_items) AS c(
+        job_id UUID, assigned_engineer_id UUID, scheduled_date VARCHAR, scheduled_time VARCHAR
+    ) ON c.job_id = j.id;
+
+    RETURN QUERY
+    UPDATE jobs j SET
+        assigned_engineer_id = COALESCE(c.assigned_engineer_id, j.assigned_engineer_id),
+        scheduled_date = COALESCE(c.scheduled_date, j.scheduled_date),
+        scheduled_time = COALESCE(c.scheduled_time, j.scheduled_time),
+        updated_at = NOW(),
+        version = j.version + 1
+    FROM jsonb_to_recordset(p_items) AS c(
+        job_id UUID, assigned_engineer_id UUID, scheduled_date VARCHAR, scheduled_time VARCHAR
+    )
+    WHERE j.id = c.job_id
+    RETURNING j.*;
+END;
+$$;
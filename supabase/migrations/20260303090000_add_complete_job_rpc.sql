@@ -0,0 +1,76 @@
+-- Transactional job completion
+-- Replaces the 4 + 2xN round trips of POST /jobs/{id}/complete with one call that
+-- inserts the completion, marks the job completed, rolls every linked asset's PM
+-- schedule forward with a single set-based UPDATE and records the completed event.
+-- Any failure rolls the whole completion back.
+
+CREATE OR REPLACE FUNCTION iso_timestamp(p_ts TIMESTAMPTZ)
+RETURNS VARCHAR
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT to_char(p_ts AT TIME ZONE 'UTC', 'YYYY-MM-DD"T"HH24:MI:SS.US"+00:00"');
+$$;
+
+-- p_completion holds the JobCompletionCreate fields.
+-- Raises P0002 when the job does not exist.
+CREATE OR REPLACE FUNCTION complete_job(p_job_id UUID, p_completion JSONB, p_user_id VARCHAR)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_now TIMESTAMPTZ := NOW();
+    v_job jobs;
+    v_completion_id UUID := gen_random_uuid();
+    v_assets_updated INTEGER;
+BEGIN
+    SELECT * INTO v_job FROM jobs WHERE id = p_job_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Job not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO job_completions
+    SELECT * FROM jsonb_populate_record(
+        NULL::job_completions,
+        p_completion || jsonb_build_object(
+            'id', v_completion_id,
+            'job_id', p_job_id,
+            'completed_by', p_user_id,
+            'completed_at', v_now
+        )
+    );
+
+    UPDATE jobs SET
+        status = 'completed',
+        updated_at = v_now,
+        version = version + 1
+    WHERE id = p_job_id;
+
+    UPDATE assets a SET
+        last_service_date = iso_timestamp(v_now),
+        next_pm_due = iso_timestamp(v_now + make_interval(days => COALESCE(a.pm_interval_months, 6) * 30))
+    WHERE a.id IN (
+        SELECT value::UUID FROM jsonb_array_elements_text(COALESCE(v_job.asset_ids, '[]'::JSONB))
+    );
+    GET DIAGNOSTICS v_assets_updated = ROW_COUNT;
+
+    INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+    VALUES (
+        gen_random_uuid(),
+        p_job_id,
+        'completed',
+        p_user_id,
+        v_now,
+        jsonb_build_object(
+            'travel_time', p_completion->'travel_time',
+            'time_on_site', p_completion->'time_on_site',
+            'assets_updated', v_assets_updated
+        )
+    );
+
+    RETURN jsonb_build_object(
+        'completion_id', v_completion_id,
+        'assets_updated', v_assets_updated
+    );
+END;
+$$;
@@ -0,0 +1,62 @@
+-- Job-to-asset link table
+-- Normalizes jobs.asset_ids (JSONB) into job_assets so asset history and open-PM
+-- checks are an index lookup on asset_id instead of a sequential scan of jobs.
+-- A trigger keeps the table in sync with every insert/update of jobs.asset_ids,
+-- so all write paths (API, RPCs, PM generation) stay consistent.
+
+CREATE TABLE IF NOT EXISTS job_assets (
+    job_id UUID NOT NULL REFERENCES jobs(id) ON DELETE CASCADE,
+    asset_id UUID NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
+    PRIMARY KEY (job_id, asset_id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_job_assets_asset_id ON job_assets(asset_id);
+
+-- Extracts the well-formed UUIDs from a JSONB array of strings
+CREATE OR REPLACE FUNCTION jsonb_uuid_array(p_values JSONB)
+RETURNS SETOF UUID
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT value::UUID
+    FROM jsonb_array_elements_text(
+        CASE WHEN jsonb_typeof(p_values) = 'array' THEN p_values ELSE '[]'::JSONB END
+    )
+    WHERE value ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$';
+$$;
+
+CREATE OR REPLACE FUNCTION sync_job_assets()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP = 'UPDATE' THEN
+        DELETE FROM job_assets
+        WHERE job_id = NEW.id
+          AND asset_id NOT IN (SELECT jsonb_uuid_array(NEW.asset_ids));
+    END IF;
+
+    -- Unknown asset ids are skipped rather than failing the job write
+    INSERT INTO job_assets (job_id, asset_id)
+    SELECT NEW.id, a.id
+    FROM assets a
+    WHERE a.id IN (SELECT jsonb_uuid_array(NEW.asset_ids))
+    ON CONFLICT DO NOTHING;
+
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_jobs_sync_job_assets ON jobs;
+CREATE TRIGGER trg_jobs_sync_job_assets
+    AFTER INSERT OR UPDATE OF asset_ids ON jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION sync_job_assets();
+
+-- Backfill existing jobs
+INSERT INTO job_assets (job_id, asset_id)
+SELECT j.id, a.id
+FROM jobs j
+CROSS JOIN LATERAL jsonb_uuid_array(j.asset_ids) AS linked(asset_id)
+JOIN assets a ON a.id = linked.asset_id
+ON CONFLICT DO NOTHING;
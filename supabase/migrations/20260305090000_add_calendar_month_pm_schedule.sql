@@ -0,0 +1,88 @@
+-- Calendar-month PM scheduling
+-- Adds a batched asset update function used by the bulk PM recomputation job
+-- (POST /pm/recompute-schedule) and switches job completion from 30-day months
+-- to calendar months, matching the recomputation rule.
+
+-- p_rows is a JSON array of {"id": "...", <column>: <value>, ...}. Only the listed
+-- schedule columns can be written; keys that are absent keep their current value.
+CREATE OR REPLACE FUNCTION bulk_update_assets(p_rows JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_updated INTEGER;
+BEGIN
+    UPDATE assets a SET
+        (next_pm_due, fgas_next_leak_check_due) = (
+            SELECT r.next_pm_due, r.fgas_next_leak_check_due
+            FROM jsonb_populate_record(a, item.value) r
+        )
+    FROM jsonb_array_elements(p_rows) AS item
+    WHERE a.id = (item.value->>'id')::UUID;
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+-- p_completion holds the JobCompletionCreate fields.
+-- Raises P0002 when the job does not exist.
+CREATE OR REPLACE FUNCTION complete_job(p_job_id UUID, p_completion JSONB, p_user_id VARCHAR)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_now TIMESTAMPTZ := NOW();
+    v_job jobs;
+    v_completion_id UUID := gen_random_uuid();
+    v_assets_updated INTEGER;
+BEGIN
+    SELECT * INTO v_job FROM jobs WHERE id = p_job_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Job not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO job_completions
+    SELECT * FROM jsonb_populate_record(
+        NULL::job_completions,
+        p_completion || jsonb_build_object(
+            'id', v_completion_id,
+            'job_id', p_job_id,
+            'completed_by', p_user_id,
+            'completed_at', v_now
+        )
+    );
+
+    UPDATE jobs SET
+        status = 'completed',
+        updated_at = v_now,
+        version = version + 1
+    WHERE id = p_job_id;
+
+    UPDATE assets a SET
+        last_service_date = iso_timestamp(v_now),
+        next_pm_due = iso_timestamp(v_now + make_interval(months => COALESCE(a.pm_interval_months, 6)))
+    WHERE a.id IN (
+        SELECT value::UUID FROM jsonb_array_elements_text(COALESCE(v_job.asset_ids, '[]'::JSONB))
+    );
+    GET DIAGNOSTICS v_assets_updated = ROW_COUNT;
+
+    INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+    VALUES (
+        gen_random_uuid(),
+        p_job_id,
+        'completed',
+        p_user_id,
+        v_now,
+        jsonb_build_object(
+            'travel_time', p_completion->'travel_time',
+            'time_on_site', p_completion->'time_on_site',
+            'assets_updated', v_assets_updated
+        )
+    );
+
+    RETURN jsonb_build_object(
+        'completion_id', v_completion_id,
+        'assets_updated', v_assets_updated
+    );
+END;
+$$;
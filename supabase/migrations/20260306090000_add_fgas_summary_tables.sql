@@ -0,0 +1,159 @@
+-- F-Gas compliance aggregates
+-- The F-Gas dashboard used to load every asset and every fgas_log of the year to
+-- aggregate them in Python. These summary tables are maintained incrementally by
+-- triggers on assets and fgas_logs, so the dashboard reads a handful of rows.
+
+CREATE TABLE IF NOT EXISTS fgas_category_summary (
+    category VARCHAR PRIMARY KEY,
+    asset_count INTEGER NOT NULL DEFAULT 0,
+    total_charge_kg NUMERIC NOT NULL DEFAULT 0,
+    total_co2_equivalent NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+CREATE TABLE IF NOT EXISTS fgas_annual_summary (
+    year INTEGER PRIMARY KEY,
+    log_count INTEGER NOT NULL DEFAULT 0,
+    refrigerant_added_kg NUMERIC NOT NULL DEFAULT 0,
+    refrigerant_recovered_kg NUMERIC NOT NULL DEFAULT 0,
+    refrigerant_lost_kg NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW()
+);
+
+-- refrigerant_charge is free text; anything that is not a plain number counts as 0
+CREATE OR REPLACE FUNCTION parse_refrigerant_charge(p_charge VARCHAR)
+RETURNS NUMERIC
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT CASE
+        WHEN p_charge ~ '^\s*[0-9]+(\.[0-9]+)?\s*$' THEN trim(p_charge)::NUMERIC
+        ELSE 0
+    END;
+$$;
+
+CREATE OR REPLACE FUNCTION fgas_apply_category_delta(
+    p_asset assets,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF COALESCE(p_asset.refrigerant_type, '') = '' OR COALESCE(p_asset.refrigerant_charge, '') = '' THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO fgas_category_summary AS s (category, asset_count, total_charge_kg, total_co2_equivalent, updated_at)
+    VALUES (
+        COALESCE(NULLIF(p_asset.fgas_category, ''), 'Uncategorized'),
+        p_sign,
+        p_sign * parse_refrigerant_charge(p_asset.refrigerant_charge),
+        p_sign * COALESCE(p_asset.fgas_co2_equivalent, 0),
+        NOW()
+    )
+    ON CONFLICT (category) DO UPDATE SET
+        asset_count = s.asset_count + EXCLUDED.asset_count,
+        total_charge_kg = s.total_charge_kg + EXCLUDED.total_charge_kg,
+        total_co2_equivalent = s.total_co2_equivalent + EXCLUDED.total_co2_equivalent,
+        updated_at = NOW();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION maintain_fgas_category_summary()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fgas_apply_category_delta(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fgas_apply_category_delta(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_assets_fgas_category_summary ON assets;
+CREATE TRIGGER trg_assets_fgas_category_summary
+    AFTER INSERT OR DELETE OR UPDATE OF refrigerant_type, refrigerant_charge, fgas_category, fgas_co2_equivalent ON assets
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_fgas_category_summary();
+
+CREATE OR REPLACE FUNCTION fgas_apply_annual_delta(
+    p_log fgas_logs,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO fgas_annual_summary AS s (
+        year, log_count, refrigerant_added_kg, refrigerant_recovered_kg, refrigerant_lost_kg, updated_at
+    )
+    VALUES (
+        EXTRACT(YEAR FROM COALESCE(p_log.created_at, NOW()) AT TIME ZONE 'UTC')::INTEGER,
+        p_sign,
+        p_sign * COALESCE(p_log.refrigerant_added, 0),
+        p_sign * COALESCE(p_log.refrigerant_recovered, 0),
+        p_sign * COALESCE(p_log.refrigerant_lost, 0),
+        NOW()
+    )
+    ON CONFLICT (year) DO UPDATE SET
+        log_count = s.log_count + EXCLUDED.log_count,
+        refrigerant_added_kg = s.refrigerant_added_kg + EXCLUDED.refrigerant_added_kg,
+        refrigerant_recovered_kg = s.refrigerant_recovered_kg + EXCLUDED.refrigerant_recovered_kg,
+        refrigerant_lost_kg = s.refrigerant_lost_kg + EXCLUDED.refrigerant_lost_kg,
+        updated_at = NOW();
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION maintain_fgas_annual_summary()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM fgas_apply_annual_delta(OLD, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM fgas_apply_annual_delta(NEW, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_fgas_logs_annual_summary ON fgas_logs;
+CREATE TRIGGER trg_fgas_logs_annual_summary
+    AFTER INSERT OR UPDATE OR DELETE ON fgas_logs
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_fgas_annual_summary();
+
+-- Leak-check lists on the dashboard filter on F-Gas assets by due date
+CREATE INDEX IF NOT EXISTS idx_assets_fgas_leak_check_due_fgas
+    ON assets(fgas_next_leak_check_due)
+    WHERE refrigerant_type <> '' AND refrigerant_charge <> '';
+
+-- Backfill from existing data
+TRUNCATE fgas_category_summary;
+INSERT INTO fgas_category_summary (category, asset_count, total_charge_kg, total_co2_equivalent)
+SELECT
+    COALESCE(NULLIF(fgas_category, ''), 'Uncategorized'),
+    COUNT(*),
+    SUM(parse_refrigerant_charge(refrigerant_charge)),
+    SUM(COALESCE(fgas_co2_equivalent, 0))
+FROM assets
+WHERE COALESCE(refrigerant_type, '') <> '' AND COALESCE(refrigerant_charge, '') <> ''
+GROUP BY 1;
+
+TRUNCATE fgas_annual_summary;
+INSERT INTO fgas_annual_summary (year, log_count, refrigerant_added_kg, refrigerant_recovered_kg, refrigerant_lost_kg)
+SELECT
+    EXTRACT(YEAR FROM COALESCE(created_at, NOW()) AT TIME ZONE 'UTC')::INTEGER,
+    COUNT(*),
+    SUM(COALESCE(refrigerant_added, 0)),
+    SUM(COALESCE(refrigerant_recovered, 0)),
+    SUM(COALESCE(refrigerant_lost, 0))
+FROM fgas_logs
+GROUP BY 1;
@@ -0,0 +1,101 @@
+-- Per-asset F-Gas annual totals for the regulatory export
+-- Extends the annual summary trigger so refrigerant added/recovered/lost is also
+-- kept per (year, asset). The export pages through this table by asset_id instead
+-- of aggregating the full log on every request.
+
+CREATE TABLE IF NOT EXISTS fgas_asset_annual_summary (
+    year INTEGER NOT NULL,
+    asset_id UUID NOT NULL REFERENCES assets(id) ON DELETE CASCADE,
+    log_count INTEGER NOT NULL DEFAULT 0,
+    refrigerant_added_kg NUMERIC NOT NULL DEFAULT 0,
+    refrigerant_recovered_kg NUMERIC NOT NULL DEFAULT 0,
+    refrigerant_lost_kg NUMERIC NOT NULL DEFAULT 0,
+    updated_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (year, asset_id)
+);
+
+CREATE OR REPLACE FUNCTION fgas_apply_annual_delta(
+    p_log fgas_logs,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_year INTEGER := EXTRACT(YEAR FROM COALESCE(p_log.created_at, NOW()) AT TIME ZONE 'UTC')::INTEGER;
+BEGIN
+    INSERT INTO fgas_annual_summary AS s (
+        year, log_count, refrigerant_added_kg, refrigerant_recovered_kg, refrigerant_lost_kg, updated_at
+    )
+    VALUES (
+        v_year,
+        p_sign,
+        p_sign * COALESCE(p_log.refrigerant_added, 0),
+        p_sign * COALESCE(p_log.refrigerant_recovered, 0),
+        p_sign * COALESCE(p_log.refrigerant_lost, 0),
+        NOW()
+    )
+    ON CONFLICT (year) DO UPDATE SET
+        log_count = s.log_count + EXCLUDED.log_count,
+        refrigerant_added_kg = s.refrigerant_added_kg + EXCLUDED.refrigerant_added_kg,
+        refrigerant_recovered_kg = s.refrigerant_recovered_kg + EXCLUDED.refrigerant_recovered_kg,
+        refrigerant_lost_kg = s.refrigerant_lost_kg + EXCLUDED.refrigerant_lost_kg,
+        updated_at = NOW();
+
+    -- Logs whose asset has been deleted (cascade) have nothing to attribute to
+    IF p_log.asset_id IS NULL OR NOT EXISTS (SELECT 1 FROM assets WHERE id = p_log.asset_id) THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO fgas_asset_annual_summary AS s (
+        year, asset_id, log_count, refrigerant_added_kg, refrigerant_recovered_kg, refrigerant_lost_kg, updated_at
+    )
+    VALUES (
+        v_year,
+        p_log.asset_id,
+        p_sign,
+        p_sign * COALESCE(p_log.refrigerant_added, 0),
+        p_sign * COALESCE(p_log.refrigerant_recovered, 0),
+        p_sign * COALESCE(p_log.refrigerant_lost, 0),
+        NOW()
+    )
+    ON CONFLICT (year, asset_id) DO UPDATE SET
+        log_count = s.log_count + EXCLUDED.log_count,
+        refrigerant_added_kg = s.refrigerant_added_kg + EXCLUDED.refrigerant_added_kg,
+        refrigerant_recovered_kg = s.refrigerant_recovered_kg + EXCLUDED.refrigerant_recovered_kg,
+        refrigerant_lost_kg = s.refrigerant_lost_kg + EXCLUDED.refrigerant_lost_kg,
+        updated_at = NOW();
+END;
+$$;
+
+-- Per-refrigerant totals are a small roll-up of the per-asset table
+CREATE OR REPLACE VIEW fgas_refrigerant_annual_totals AS
+SELECT
+    s.year,
+    COALESCE(NULLIF(a.refrigerant_type, ''), 'Unknown') AS refrigerant_type,
+    COUNT(DISTINCT s.asset_id) AS asset_count,
+    SUM(s.log_count) AS log_count,
+    SUM(s.refrigerant_added_kg) AS refrigerant_added_kg,
+    SUM(s.refrigerant_recovered_kg) AS refrigerant_recovered_kg,
+    SUM(s.refrigerant_lost_kg) AS refrigerant_lost_kg
+FROM fgas_asset_annual_summary s
+JOIN assets a ON a.id = s.asset_id
+GROUP BY s.year, COALESCE(NULLIF(a.refrigerant_type, ''), 'Unknown');
+
+-- Backfill from existing logs
+TRUNCATE fgas_asset_annual_summary;
+INSERT INTO fgas_asset_annual_summary (
+    year, asset_id, log_count, refrigerant_added_kg, refrigerant_recovered_kg, refrigerant_lost_kg
+)
+SELECT
+    EXTRACT(YEAR FROM COALESCE(l.created_at, NOW()) AT TIME ZONE 'UTC')::INTEGER,
+    l.asset_id,
+    COUNT(*),
+    SUM(COALESCE(l.refrigerant_added, 0)),
+    SUM(COALESCE(l.refrigerant_recovered, 0)),
+    SUM(COALESCE(l.refrigerant_lost, 0))
+FROM fgas_logs l
+JOIN assets a ON a.id = l.asset_id
+GROUP BY 1, l.asset_id;
+
+CREATE INDEX IF NOT EXISTS idx_fgas_asset_annual_summary_asset_id ON fgas_asset_annual_summary(asset_id);
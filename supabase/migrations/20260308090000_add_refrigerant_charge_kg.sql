@@ -0,0 +1,61 @@
+-- Numeric refrigerant charge and computed CO2 equivalents
+-- refrigerant_charge stays as entered; refrigerant_charge_kg holds the parsed value.
+-- fgas_co2_equivalent and fgas_category are filled from the GWP table by the API
+-- and by the bulk recomputation job (POST /fgas/recompute-co2e).
+
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS refrigerant_charge_kg DECIMAL(10,3);
+
+-- Allow the batched asset writer to set the F-Gas fields too
+CREATE OR REPLACE FUNCTION bulk_update_assets(p_rows JSONB)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_updated INTEGER;
+BEGIN
+    UPDATE assets a SET
+        (next_pm_due, fgas_next_leak_check_due, refrigerant_charge_kg, fgas_co2_equivalent, fgas_category) = (
+            SELECT r.next_pm_due, r.fgas_next_leak_check_due, r.refrigerant_charge_kg, r.fgas_co2_equivalent, r.fgas_category
+            FROM jsonb_populate_record(a, item.value) r
+        )
+    FROM jsonb_array_elements(p_rows) AS item
+    WHERE a.id = (item.value->>'id')::UUID;
+    GET DIAGNOSTICS v_updated = ROW_COUNT;
+    RETURN v_updated;
+END;
+$$;
+
+-- Category summary prefers the parsed charge when it is available
+CREATE OR REPLACE FUNCTION fgas_apply_category_delta(
+    p_asset assets,
+    p_sign INTEGER
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF COALESCE(p_asset.refrigerant_type, '') = '' OR COALESCE(p_asset.refrigerant_charge, '') = '' THEN
+        RETURN;
+    END IF;
+
+    INSERT INTO fgas_category_summary AS s (category, asset_count, total_charge_kg, total_co2_equivalent, updated_at)
+    VALUES (
+        COALESCE(NULLIF(p_asset.fgas_category, ''), 'Uncategorized'),
+        p_sign,
+        p_sign * COALESCE(p_asset.refrigerant_charge_kg, parse_refrigerant_charge(p_asset.refrigerant_charge)),
+        p_sign * COALESCE(p_asset.fgas_co2_equivalent, 0),
+        NOW()
+    )
+    ON CONFLICT (category) DO UPDATE SET
+        asset_count = s.asset_count + EXCLUDED.asset_count,
+        total_charge_kg = s.total_charge_kg + EXCLUDED.total_charge_kg,
+        total_co2_equivalent = s.total_co2_equivalent + EXCLUDED.total_co2_equivalent,
+        updated_at = NOW();
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_assets_fgas_category_summary ON assets;
+CREATE TRIGGER trg_assets_fgas_category_summary
+    AFTER INSERT OR DELETE OR UPDATE OF refrigerant_type, refrigerant_charge, refrigerant_charge_kg, fgas_category, fgas_co2_equivalent ON assets
+    FOR EACH ROW
+    EXECUTE FUNCTION maintain_fgas_category_summary();
@@ -0,0 +1,110 @@
+-- Global full-text search
+-- Each searchable table gets a weighted tsvector column kept up to date by Postgres
+-- (generated column) and a GIN index. search_all() ranks hits from all four tables
+-- in a single query so the frontend no longer downloads whole lists to filter them.
+-- The 'simple' configuration is used so serial numbers, model codes and postcodes
+-- are indexed verbatim instead of being stemmed.
+
+-- Punctuation is folded to spaces first so 'SN-4471-AB' indexes as sn / 4471 / ab
+-- rather than the parser's signed-number token '-4471'.
+CREATE OR REPLACE FUNCTION search_weighted(p_text TEXT, p_weight "char")
+RETURNS TSVECTOR
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT setweight(to_tsvector('simple', regexp_replace(COALESCE(p_text, ''), '[^[:alnum:]]+', ' ', 'g')), p_weight);
+$$;
+
+ALTER TABLE customers ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        search_weighted(company_name, 'A') ||
+        search_weighted(COALESCE(email, '') || ' ' || COALESCE(phone, ''), 'B') ||
+        search_weighted(billing_address, 'C')
+    ) STORED;
+
+ALTER TABLE sites ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        search_weighted(name, 'A') ||
+        search_weighted(address, 'B') ||
+        search_weighted(contact_name, 'C')
+    ) STORED;
+
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        search_weighted(COALESCE(serial_number, '') || ' ' || COALESCE(name, ''), 'A') ||
+        search_weighted(COALESCE(make, '') || ' ' || COALESCE(model, ''), 'B') ||
+        search_weighted(refrigerant_type, 'C')
+    ) STORED;
+
+ALTER TABLE jobs ADD COLUMN IF NOT EXISTS search_vector TSVECTOR
+    GENERATED ALWAYS AS (
+        search_weighted(job_number, 'A') ||
+        search_weighted(description, 'B')
+    ) STORED;
+
+CREATE INDEX IF NOT EXISTS idx_customers_search_vector ON customers USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_sites_search_vector ON sites USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_assets_search_vector ON assets USING GIN (search_vector);
+CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN (search_vector);
+
+-- Turn free text into a prefix query: "carr r404" -> 'carr':* & 'r404':*
+CREATE OR REPLACE FUNCTION search_prefix_query(p_query TEXT)
+RETURNS TSQUERY
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT to_tsquery('simple', string_agg(quote_literal(term) || ':*', ' & '))
+    FROM regexp_split_to_table(lower(trim(p_query)), '[^[:alnum:]]+') AS term
+    WHERE term <> '';
+$$;
+
+CREATE OR REPLACE FUNCTION search_all(
+    p_query TEXT,
+    p_types TEXT[] DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    entity_type TEXT,
+    id UUID,
+    title TEXT,
+    subtitle TEXT,
+    customer_id UUID,
+    site_id UUID,
+    rank REAL,
+    total_count BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT search_prefix_query(p_query) AS query
+    ),
+    hits AS (
+        SELECT 'customer'::TEXT, c.id, c.company_name::TEXT, c.email::TEXT, c.id, NULL::UUID,
+               ts_rank(c.search_vector, q.query)
+        FROM customers c, q
+        WHERE (p_types IS NULL OR 'customer' = ANY(p_types)) AND c.search_vector @@ q.query
+        UNION ALL
+        SELECT 'site', s.id, s.name::TEXT, s.address, s.customer_id, s.id,
+               ts_rank(s.search_vector, q.query)
+        FROM sites s, q
+        WHERE (p_types IS NULL OR 'site' = ANY(p_types)) AND s.search_vector @@ q.query
+        UNION ALL
+        SELECT 'asset', a.id, a.name::TEXT,
+               concat_ws(' ', NULLIF(a.make, ''), NULLIF(a.model, ''), NULLIF(a.serial_number, '')),
+               NULL::UUID, a.site_id,
+               ts_rank(a.search_vector, q.query)
+        FROM assets a, q
+        WHERE (p_types IS NULL OR 'asset' = ANY(p_types)) AND a.search_vector @@ q.query
+        UNION ALL
+        SELECT 'job', j.id, j.job_number::TEXT, j.description, j.customer_id, j.site_id,
+               ts_rank(j.search_vector, q.query)
+        FROM jobs j, q
+        WHERE (p_types IS NULL OR 'job' = ANY(p_types)) AND j.search_vector @@ q.query
+    )
+    SELECT h.*, COUNT(*) OVER () AS total_count
+    FROM hits AS h(entity_type, id, title, subtitle, customer_id, site_id, rank)
+    ORDER BY h.rank DESC, h.title, h.id
+    LIMIT p_limit OFFSET p_offset;
+$$;
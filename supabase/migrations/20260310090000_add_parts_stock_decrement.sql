@@ -0,0 +1,127 @@
+-- Stock tracking for parts used on job completion
+-- complete_job() now decrements parts.stock_quantity for every entry in parts_used
+-- inside the same transaction as the completion. Quantities are summed per part and
+-- applied with one relative UPDATE, after locking the affected rows in id order so
+-- concurrent completions that share parts serialize instead of deadlocking.
+-- Entries are matched by part_id, then part_number, then (case-insensitive) name for
+-- completions sent by older clients; unmatched entries are kept on the completion only.
+
+CREATE OR REPLACE FUNCTION complete_job(p_job_id UUID, p_completion JSONB, p_user_id VARCHAR)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_now TIMESTAMPTZ := NOW();
+    v_job jobs;
+    v_completion_id UUID := gen_random_uuid();
+    v_assets_updated INTEGER;
+    v_part_ids UUID[];
+    v_quantities INTEGER[];
+    v_parts JSONB;
+BEGIN
+    SELECT * INTO v_job FROM jobs WHERE id = p_job_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Job not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    INSERT INTO job_completions
+    SELECT * FROM jsonb_populate_record(
+        NULL::job_completions,
+        p_completion || jsonb_build_object(
+            'id', v_completion_id,
+            'job_id', p_job_id,
+            'completed_by', p_user_id,
+            'completed_at', v_now
+        )
+    );
+
+    UPDATE jobs SET
+        status = 'completed',
+        updated_at = v_now,
+        version = version + 1
+    WHERE id = p_job_id;
+
+    UPDATE assets a SET
+        last_service_date = iso_timestamp(v_now),
+        next_pm_due = iso_timestamp(v_now + make_interval(months => COALESCE(a.pm_interval_months, 6)))
+    WHERE a.id IN (
+        SELECT value::UUID FROM jsonb_array_elements_text(COALESCE(v_job.asset_ids, '[]'::JSONB))
+    );
+    GET DIAGNOSTICS v_assets_updated = ROW_COUNT;
+
+    SELECT array_agg(u.part_id ORDER BY u.part_id), array_agg(u.quantity ORDER BY u.part_id)
+    INTO v_part_ids, v_quantities
+    FROM (
+        SELECT part_id, SUM(quantity)::INTEGER AS quantity
+        FROM (
+            SELECT
+                COALESCE(
+                    (SELECT p.id FROM parts p
+                     WHERE item->>'part_id' ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+                       AND p.id = (item->>'part_id')::UUID),
+                    (SELECT p.id FROM parts p WHERE p.part_number = item->>'part_number' ORDER BY p.id LIMIT 1),
+                    (SELECT p.id FROM parts p WHERE lower(p.name) = lower(item->>'name') ORDER BY p.id LIMIT 1)
+                ) AS part_id,
+                CASE
+                    WHEN item->>'quantity' ~ '^\s*[0-9]+(\.[0-9]+)?\s*$' THEN round((item->>'quantity')::NUMERIC)
+                    ELSE 1
+                END AS quantity
+            FROM jsonb_array_elements(COALESCE(p_completion->'parts_used', '[]'::JSONB)) AS item
+        ) matched
+        WHERE part_id IS NOT NULL AND quantity > 0
+        GROUP BY part_id
+    ) u;
+
+    IF v_part_ids IS NOT NULL THEN
+        PERFORM 1 FROM parts WHERE id = ANY(v_part_ids) ORDER BY id FOR UPDATE;
+
+        WITH updated AS (
+            UPDATE parts p SET
+                stock_quantity = COALESCE(p.stock_quantity, 0) - u.quantity
+            FROM unnest(v_part_ids, v_quantities) AS u(part_id, quantity)
+            WHERE p.id = u.part_id
+            RETURNING p.id, p.part_number, p.name, p.unit_price, p.stock_quantity, p.min_stock_level, u.quantity
+        )
+        SELECT jsonb_agg(to_jsonb(updated)) INTO v_parts FROM updated;
+    END IF;
+
+    INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+    VALUES (
+        gen_random_uuid(),
+        p_job_id,
+        'completed',
+        p_user_id,
+        v_now,
+        jsonb_build_object(
+            'travel_time', p_completion->'travel_time',
+            'time_on_site', p_completion->'time_on_site',
+            'assets_updated', v_assets_updated,
+            'parts_decremented', COALESCE(jsonb_array_length(v_parts), 0)
+        )
+    );
+
+    RETURN jsonb_build_object(
+        'completion_id', v_completion_id,
+        'assets_updated', v_assets_updated,
+        'parts', COALESCE(v_parts, '[]'::JSONB)
+    );
+END;
+$$;
+
+-- Low-stock lookups only touch the handful of parts at or below their minimum
+CREATE INDEX IF NOT EXISTS idx_parts_low_stock
+    ON parts ((stock_quantity - min_stock_level), id)
+    WHERE stock_quantity <= min_stock_level;
+
+CREATE OR REPLACE VIEW low_stock_parts AS
+SELECT
+    id,
+    part_number,
+    name,
+    unit_price,
+    stock_quantity,
+    min_stock_level,
+    min_stock_level - stock_quantity AS shortfall
+FROM parts
+WHERE stock_quantity <= min_stock_level
+ORDER BY (stock_quantity - min_stock_level), id;
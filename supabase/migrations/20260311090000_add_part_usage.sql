@@ -0,0 +1,163 @@
+-- Flattened parts consumption for usage analytics
+-- Each parts_used entry on a job completion becomes one part_usage row, written by a
+-- trigger as completions arrive, so analytics scan a narrow table instead of
+-- unnesting JSONB across every completion. complete_job() now decrements stock from
+-- these rows, keeping a single definition of how entries are matched to parts.
+
+ALTER TABLE parts ADD COLUMN IF NOT EXISTS lead_time_days INTEGER DEFAULT 7;
+
+CREATE TABLE IF NOT EXISTS part_usage (
+    id BIGSERIAL PRIMARY KEY,
+    completion_id UUID NOT NULL REFERENCES job_completions(id) ON DELETE CASCADE,
+    job_id UUID REFERENCES jobs(id) ON DELETE CASCADE,
+    part_id UUID REFERENCES parts(id) ON DELETE SET NULL,
+    part_number VARCHAR DEFAULT '',
+    name VARCHAR DEFAULT '',
+    quantity INTEGER NOT NULL,
+    used_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_part_usage_used_at ON part_usage(used_at);
+CREATE INDEX IF NOT EXISTS idx_part_usage_part_id ON part_usage(part_id);
+CREATE INDEX IF NOT EXISTS idx_part_usage_completion_id ON part_usage(completion_id);
+
+-- Match parts_used entries by part_id, then part_number, then (case-insensitive) name
+CREATE OR REPLACE FUNCTION flatten_parts_used(p_parts_used JSONB)
+RETURNS TABLE (part_id UUID, part_number VARCHAR, name VARCHAR, quantity INTEGER)
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT
+        COALESCE(
+            (SELECT p.id FROM parts p
+             WHERE item->>'part_id' ~* '^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$'
+               AND p.id = (item->>'part_id')::UUID),
+            (SELECT p.id FROM parts p WHERE p.part_number = item->>'part_number' ORDER BY p.id LIMIT 1),
+            (SELECT p.id FROM parts p WHERE lower(p.name) = lower(item->>'name') ORDER BY p.id LIMIT 1)
+        ),
+        COALESCE(item->>'part_number', '')::VARCHAR,
+        COALESCE(item->>'name', '')::VARCHAR,
+        CASE
+            WHEN item->>'quantity' ~ '^\s*[0-9]+(\.[0-9]+)?\s*$' THEN round((item->>'quantity')::NUMERIC)::INTEGER
+            ELSE 1
+        END
+    FROM jsonb_array_elements(
+        CASE WHEN jsonb_typeof(p_parts_used) = 'array' THEN p_parts_used ELSE '[]'::JSONB END
+    ) AS item;
+$$;
+
+CREATE OR REPLACE FUNCTION record_part_usage()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO part_usage (completion_id, job_id, part_id, part_number, name, quantity, used_at)
+    SELECT NEW.id, NEW.job_id, f.part_id, f.part_number, f.name, f.quantity, COALESCE(NEW.completed_at, NOW())
+    FROM flatten_parts_used(NEW.parts_used) f
+    WHERE f.quantity > 0;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_job_completions_part_usage ON job_completions;
+CREATE TRIGGER trg_job_completions_part_usage
+    AFTER INSERT ON job_completions
+    FOR EACH ROW
+    EXECUTE FUNCTION record_part_usage();
+
+CREATE OR REPLACE FUNCTION complete_job(p_job_id UUID, p_completion JSONB, p_user_id VARCHAR)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_now TIMESTAMPTZ := NOW();
+    v_job jobs;
+    v_completion_id UUID := gen_random_uuid();
+    v_assets_updated INTEGER;
+    v_part_ids UUID[];
+    v_quantities INTEGER[];
+    v_parts JSONB;
+BEGIN
+    SELECT * INTO v_job FROM jobs WHERE id = p_job_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Job not found' USING ERRCODE = 'P0002';
+    END IF;
+
+    -- trg_job_completions_part_usage writes the part_usage rows for this completion
+    INSERT INTO job_completions
+    SELECT * FROM jsonb_populate_record(
+        NULL::job_completions,
+        p_completion || jsonb_build_object(
+            'id', v_completion_id,
+            'job_id', p_job_id,
+            'completed_by', p_user_id,
+            'completed_at', v_now
+        )
+    );
+
+    UPDATE jobs SET
+        status = 'completed',
+        updated_at = v_now,
+        version = version + 1
+    WHERE id = p_job_id;
+
+    UPDATE assets a SET
+        last_service_date = iso_timestamp(v_now),
+        next_pm_due = iso_timestamp(v_now + make_interval(months => COALESCE(a.pm_interval_months, 6)))
+    WHERE a.id IN (
+        SELECT value::UUID FROM jsonb_array_elements_text(COALESCE(v_job.asset_ids, '[]'::JSONB))
+    );
+    GET DIAGNOSTICS v_assets_updated = ROW_COUNT;
+
+    SELECT array_agg(u.part_id ORDER BY u.part_id), array_agg(u.quantity ORDER BY u.part_id)
+    INTO v_part_ids, v_quantities
+    FROM (
+        SELECT part_id, SUM(quantity)::INTEGER AS quantity
+        FROM part_usage
+        WHERE completion_id = v_completion_id AND part_id IS NOT NULL
+        GROUP BY part_id
+    ) u;
+
+    IF v_part_ids IS NOT NULL THEN
+        PERFORM 1 FROM parts WHERE id = ANY(v_part_ids) ORDER BY id FOR UPDATE;
+
+        WITH updated AS (
+            UPDATE parts p SET
+                stock_quantity = COALESCE(p.stock_quantity, 0) - u.quantity
+            FROM unnest(v_part_ids, v_quantities) AS u(part_id, quantity)
+            WHERE p.id = u.part_id
+            RETURNING p.id, p.part_number, p.name, p.unit_price, p.stock_quantity, p.min_stock_level, u.quantity
+        )
+        SELECT jsonb_agg(to_jsonb(updated)) INTO v_parts FROM updated;
+    END IF;
+
+    INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+    VALUES (
+        gen_random_uuid(),
+        p_job_id,
+        'completed',
+        p_user_id,
+        v_now,
+        jsonb_build_object(
+            'travel_time', p_completion->'travel_time',
+            'time_on_site', p_completion->'time_on_site',
+            'assets_updated', v_assets_updated,
+            'parts_decremented', COALESCE(jsonb_array_length(v_parts), 0)
+        )
+    );
+
+    RETURN jsonb_build_object(
+        'completion_id', v_completion_id,
+        'assets_updated', v_assets_updated,
+        'parts', COALESCE(v_parts, '[]'::JSONB)
+    );
+END;
+$$;
+
+-- Backfill from existing completions
+TRUNCATE part_usage;
+INSERT INTO part_usage (completion_id, job_id, part_id, part_number, name, quantity, used_at)
+SELECT c.id, c.job_id, f.part_id, f.part_number, f.name, f.quantity, COALESCE(c.completed_at, NOW())
+FROM job_completions c
+CROSS JOIN LATERAL flatten_parts_used(c.parts_used) f
+WHERE f.quantity > 0;
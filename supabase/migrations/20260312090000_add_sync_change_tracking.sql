@@ -0,0 +1,65 @@
+-- Change tracking for engineer device delta sync
+-- Every synced table gets an updated_at column stamped by a trigger on insert and
+-- update, and deletes leave a row in sync_tombstones. GET /sync pages through rows
+-- whose (updated_at, id) is past the device's cursor instead of resending everything.
+
+ALTER TABLE sites ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE assets ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE parts ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+ALTER TABLE checklist_templates ADD COLUMN IF NOT EXISTS updated_at TIMESTAMPTZ DEFAULT NOW();
+
+-- Existing rows keep their creation time as the last change
+UPDATE sites SET updated_at = COALESCE(created_at, NOW());
+UPDATE assets SET updated_at = COALESCE(created_at, NOW());
+UPDATE parts SET updated_at = COALESCE(created_at, NOW());
+UPDATE checklist_templates SET updated_at = COALESCE(created_at, NOW());
+UPDATE jobs SET updated_at = COALESCE(updated_at, created_at, NOW()) WHERE updated_at IS NULL;
+
+CREATE OR REPLACE FUNCTION set_updated_at()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.updated_at := NOW();
+    RETURN NEW;
+END;
+$$;
+
+CREATE TABLE IF NOT EXISTS sync_tombstones (
+    id BIGSERIAL PRIMARY KEY,
+    entity VARCHAR NOT NULL,
+    entity_id UUID NOT NULL,
+    deleted_at TIMESTAMPTZ NOT NULL DEFAULT NOW()
+);
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_deleted_at ON sync_tombstones(deleted_at, id);
+
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO sync_tombstones (entity, entity_id) VALUES (TG_TABLE_NAME, OLD.id);
+    RETURN NULL;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_table TEXT;
+BEGIN
+    FOREACH v_table IN ARRAY ARRAY['jobs', 'sites', 'assets', 'parts', 'checklist_templates'] LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_set_updated_at ON %I', v_table, v_table);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_set_updated_at BEFORE INSERT OR UPDATE ON %I FOR EACH ROW EXECUTE FUNCTION set_updated_at()',
+            v_table, v_table
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_%s_sync_tombstone ON %I', v_table, v_table);
+        EXECUTE format(
+            'CREATE TRIGGER trg_%s_sync_tombstone AFTER DELETE ON %I FOR EACH ROW EXECUTE FUNCTION record_sync_tombstone()',
+            v_table, v_table
+        );
+        EXECUTE format('CREATE INDEX IF NOT EXISTS idx_%s_updated_at_id ON %I(updated_at, id)', v_table, v_table);
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,16 @@
+-- Shared store for Idempotency-Key replay
+-- Used instead of the in-process store when IDEMPOTENCY_STORE=database, so retries that
+-- land on a different API worker still replay the first response. A row with a NULL
+-- status_code is a request that is still running.
+
+CREATE TABLE IF NOT EXISTS idempotency_keys (
+    key VARCHAR PRIMARY KEY,
+    fingerprint VARCHAR NOT NULL,
+    status_code INTEGER,
+    response_headers JSONB,
+    response_body TEXT,
+    created_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    expires_at TIMESTAMPTZ NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_idempotency_keys_expires_at ON idempotency_keys(expires_at);
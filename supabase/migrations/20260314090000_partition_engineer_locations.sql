@@ -0,0 +1,296 @@
+-- Monthly partitions, daily rollups and retention for engineer_locations
+-- The table is rebuilt as a RANGE partition on recorded_at with one partition per UTC
+-- month (engineer_locations_pYYYYMM) plus a default partition for points outside them.
+-- apply_engineer_location_retention() is run periodically by the API: it keeps
+-- partitions ahead of time, rolls points up into engineer_location_daily and drops raw
+-- partitions older than the retention period, so history reports read the rollups.
+
+-- Move the unpartitioned table aside, freeing its index names
+DO $$
+BEGIN
+    IF to_regclass('engineer_locations') IS NOT NULL
+        AND NOT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'engineer_locations'::regclass) THEN
+        ALTER TABLE engineer_locations RENAME TO engineer_locations_unpartitioned;
+        ALTER INDEX IF EXISTS engineer_locations_pkey RENAME TO engineer_locations_unpartitioned_pkey;
+        DROP INDEX IF EXISTS idx_engineer_locations_engineer_id;
+        DROP INDEX IF EXISTS idx_engineer_locations_recorded_at;
+        DROP INDEX IF EXISTS idx_engineer_locations_engineer_recorded;
+        DROP INDEX IF EXISTS idx_engineer_locations_status;
+    END IF;
+END;
+$$;
+
+CREATE TABLE IF NOT EXISTS engineer_locations (
+    id UUID NOT NULL DEFAULT gen_random_uuid(),
+    engineer_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    latitude DOUBLE PRECISION NOT NULL,
+    longitude DOUBLE PRECISION NOT NULL,
+    accuracy DOUBLE PRECISION,
+    job_id UUID REFERENCES jobs(id) ON DELETE SET NULL,
+    status VARCHAR NOT NULL DEFAULT 'travelling',
+    recorded_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    synced_at TIMESTAMPTZ DEFAULT NOW(),
+    PRIMARY KEY (id, recorded_at)
+) PARTITION BY RANGE (recorded_at);
+
+CREATE TABLE IF NOT EXISTS engineer_locations_default PARTITION OF engineer_locations DEFAULT;
+
+-- Month bounds are computed on dates and timestamps without time zone, then pinned to
+-- UTC, so they do not depend on the session time zone
+CREATE OR REPLACE FUNCTION ensure_engineer_location_partitions(p_from DATE, p_to DATE)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_month DATE := date_trunc('month', p_from::timestamp)::date;
+    v_next DATE;
+    v_name TEXT;
+    v_created INTEGER := 0;
+BEGIN
+    WHILE v_month <= p_to LOOP
+        v_next := (v_month::timestamp + INTERVAL '1 month')::date;
+        v_name := 'engineer_locations_p' || to_char(v_month, 'YYYYMM');
+        IF to_regclass(v_name) IS NULL THEN
+            -- Rows for this month that already landed in the default partition would
+            -- block the new partition, so move them across
+            CREATE TEMP TABLE IF NOT EXISTS engineer_locations_moving (LIKE engineer_locations) ON COMMIT DROP;
+            WITH moved AS (
+                DELETE FROM engineer_locations_default
+                WHERE recorded_at >= v_month::timestamp AT TIME ZONE 'UTC'
+                  AND recorded_at < v_next::timestamp AT TIME ZONE 'UTC'
+                RETURNING *
+            )
+            INSERT INTO engineer_locations_moving SELECT * FROM moved;
+
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF engineer_locations FOR VALUES FROM (%L) TO (%L)',
+                v_name, v_month::timestamp AT TIME ZONE 'UTC', v_next::timestamp AT TIME ZONE 'UTC'
+            );
+            INSERT INTO engineer_locations SELECT * FROM engineer_locations_moving;
+            TRUNCATE engineer_locations_moving;
+            v_created := v_created + 1;
+        END IF;
+        v_month := v_next;
+    END LOOP;
+    RETURN v_created;
+END;
+$$;
+
+-- Copy existing points into their monthly partitions, creating only months that have rows
+DO $$
+DECLARE
+    v_month DATE;
+BEGIN
+    IF to_regclass('engineer_locations_unpartitioned') IS NOT NULL THEN
+        FOR v_month IN
+            SELECT DISTINCT date_trunc('month', recorded_at AT TIME ZONE 'UTC')::date FROM engineer_locations_unpartitioned
+        LOOP
+            PERFORM ensure_engineer_location_partitions(v_month, v_month);
+        END LOOP;
+    END IF;
+    PERFORM ensure_engineer_location_partitions(
+        (NOW() AT TIME ZONE 'UTC')::date,
+        ((NOW() AT TIME ZONE 'UTC') + INTERVAL '2 months')::date
+    );
+    IF to_regclass('engineer_locations_unpartitioned') IS NOT NULL THEN
+        INSERT INTO engineer_locations (id, engineer_id, latitude, longitude, accuracy, job_id, status, recorded_at, synced_at)
+        SELECT id, engineer_id, latitude, longitude, accuracy, job_id, status, recorded_at, synced_at
+        FROM engineer_locations_unpartitioned;
+        DROP TABLE engineer_locations_unpartitioned;
+    END IF;
+END;
+$$;
+
+CREATE INDEX IF NOT EXISTS idx_engineer_locations_engineer_recorded ON engineer_locations(engineer_id, recorded_at DESC);
+CREATE INDEX IF NOT EXISTS idx_engineer_locations_recorded_at ON engineer_locations(recorded_at);
+
+-- One row per engineer per UTC day. Distance and duration only count consecutive
+-- points at most p_max_gap_seconds apart, so gaps between tracking sessions are not
+-- counted as travel. track is a [latitude, longitude, epoch seconds] list with one
+-- point per p_track_interval_seconds.
+CREATE TABLE IF NOT EXISTS engineer_location_daily (
+    engineer_id UUID NOT NULL REFERENCES users(id) ON DELETE CASCADE,
+    day DATE NOT NULL,
+    point_count INTEGER NOT NULL,
+    first_recorded_at TIMESTAMPTZ NOT NULL,
+    last_recorded_at TIMESTAMPTZ NOT NULL,
+    duration_seconds INTEGER NOT NULL DEFAULT 0,
+    distance_m DOUBLE PRECISION NOT NULL DEFAULT 0,
+    job_ids UUID[] NOT NULL DEFAULT '{}',
+    track JSONB NOT NULL DEFAULT '[]',
+    rolled_up_at TIMESTAMPTZ NOT NULL DEFAULT NOW(),
+    PRIMARY KEY (engineer_id, day)
+);
+
+CREATE INDEX IF NOT EXISTS idx_engineer_location_daily_day ON engineer_location_daily(day);
+
+CREATE OR REPLACE FUNCTION location_distance_m(
+    p_lat1 DOUBLE PRECISION,
+    p_lon1 DOUBLE PRECISION,
+    p_lat2 DOUBLE PRECISION,
+    p_lon2 DOUBLE PRECISION
+)
+RETURNS DOUBLE PRECISION
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    -- Haversine distance on a 6371 km sphere
+    SELECT 2 * 6371000 * asin(sqrt(LEAST(1,
+        sin(radians(p_lat2 - p_lat1) / 2) ^ 2
+        + cos(radians(p_lat1)) * cos(radians(p_lat2)) * sin(radians(p_lon2 - p_lon1) / 2) ^ 2
+    )));
+$$;
+
+-- Roll up the whole UTC days in [p_from, p_to). Existing summaries are replaced unless
+-- p_replace is false, in which case only days without a summary are added.
+CREATE OR REPLACE FUNCTION rollup_engineer_locations(
+    p_from TIMESTAMPTZ,
+    p_to TIMESTAMPTZ,
+    p_replace BOOLEAN DEFAULT TRUE,
+    p_track_interval_seconds INTEGER DEFAULT 300,
+    p_max_gap_seconds INTEGER DEFAULT 900
+)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_days INTEGER;
+BEGIN
+    WITH points AS (
+        SELECT
+            engineer_id,
+            job_id,
+            latitude,
+            longitude,
+            recorded_at,
+            (recorded_at AT TIME ZONE 'UTC')::date AS day,
+            LAG(latitude) OVER w AS prev_latitude,
+            LAG(longitude) OVER w AS prev_longitude,
+            LAG(recorded_at) OVER w AS prev_recorded_at
+        FROM engineer_locations
+        WHERE recorded_at >= p_from AND recorded_at < p_to
+        WINDOW w AS (PARTITION BY engineer_id, (recorded_at AT TIME ZONE 'UTC')::date ORDER BY recorded_at, id)
+    ),
+    days AS (
+        SELECT
+            engineer_id,
+            day,
+            COUNT(*)::int AS point_count,
+            MIN(recorded_at) AS first_recorded_at,
+            MAX(recorded_at) AS last_recorded_at,
+            COALESCE(SUM(EXTRACT(EPOCH FROM recorded_at - prev_recorded_at))
+                FILTER (WHERE recorded_at - prev_recorded_at <= make_interval(secs => p_max_gap_seconds)), 0)::int AS duration_seconds,
+            COALESCE(SUM(location_distance_m(prev_latitude, prev_longitude, latitude, longitude))
+                FILTER (WHERE recorded_at - prev_recorded_at <= make_interval(secs => p_max_gap_seconds)), 0) AS distance_m,
+            COALESCE(array_agg(DISTINCT job_id) FILTER (WHERE job_id IS NOT NULL), '{}') AS job_ids
+        FROM points
+        GROUP BY engineer_id, day
+    ),
+    samples AS (
+        SELECT DISTINCT ON (engineer_id, day, floor(EXTRACT(EPOCH FROM recorded_at) / p_track_interval_seconds))
+            engineer_id, day, latitude, longitude, recorded_at
+        FROM points
+        ORDER BY engineer_id, day, floor(EXTRACT(EPOCH FROM recorded_at) / p_track_interval_seconds), recorded_at
+    ),
+    tracks AS (
+        SELECT
+            engineer_id,
+            day,
+            jsonb_agg(
+                jsonb_build_array(round(latitude::numeric, 6), round(longitude::numeric, 6), EXTRACT(EPOCH FROM recorded_at)::bigint)
+                ORDER BY recorded_at
+            ) AS track
+        FROM samples
+        GROUP BY engineer_id, day
+    )
+    INSERT INTO engineer_location_daily (
+        engineer_id, day, point_count, first_recorded_at, last_recorded_at,
+        duration_seconds, distance_m, job_ids, track, rolled_up_at
+    )
+    SELECT d.engineer_id, d.day, d.point_count, d.first_recorded_at, d.last_recorded_at,
+           d.duration_seconds, d.distance_m, d.job_ids, t.track, NOW()
+    FROM days d
+    JOIN tracks t USING (engineer_id, day)
+    WHERE p_replace OR NOT EXISTS (
+        SELECT 1 FROM engineer_location_daily existing
+        WHERE existing.engineer_id = d.engineer_id AND existing.day = d.day
+    )
+    ON CONFLICT (engineer_id, day) DO UPDATE SET
+        point_count = EXCLUDED.point_count,
+        first_recorded_at = EXCLUDED.first_recorded_at,
+        last_recorded_at = EXCLUDED.last_recorded_at,
+        duration_seconds = EXCLUDED.duration_seconds,
+        distance_m = EXCLUDED.distance_m,
+        job_ids = EXCLUDED.job_ids,
+        track = EXCLUDED.track,
+        rolled_up_at = EXCLUDED.rolled_up_at;
+
+    GET DIAGNOSTICS v_days = ROW_COUNT;
+    RETURN v_days;
+END;
+$$;
+
+-- Periodic maintenance: create the next partitions, roll up the last two complete days
+-- (late offline uploads included), then roll up and drop monthly partitions older than
+-- p_retention_months. Points in the default partition past the cutoff are rolled up
+-- only for days without a summary, since their month was already summarised, and
+-- then deleted. Concurrent calls from other API workers are skipped.
+CREATE OR REPLACE FUNCTION apply_engineer_location_retention(
+    p_retention_months INTEGER,
+    p_months_ahead INTEGER DEFAULT 2
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_today DATE := (NOW() AT TIME ZONE 'UTC')::date;
+    v_cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') - make_interval(months => p_retention_months))::date;
+    v_created INTEGER;
+    v_days INTEGER := 0;
+    v_deleted INTEGER;
+    v_dropped TEXT[] := '{}';
+    v_partition TEXT;
+    v_month DATE;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('apply_engineer_location_retention')) THEN
+        RETURN jsonb_build_object('skipped', true);
+    END IF;
+
+    v_created := ensure_engineer_location_partitions(v_today, (v_today::timestamp + make_interval(months => p_months_ahead))::date);
+    v_days := v_days + rollup_engineer_locations((v_today - 2)::timestamp AT TIME ZONE 'UTC', v_today::timestamp AT TIME ZONE 'UTC');
+
+    FOR v_partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'engineer_locations'::regclass
+          AND c.relname ~ '^engineer_locations_p[0-9]{6}$'
+        ORDER BY c.relname
+    LOOP
+        v_month := to_date(right(v_partition, 6), 'YYYYMM');
+        IF v_month < v_cutoff THEN
+            v_days := v_days + rollup_engineer_locations(
+                v_month::timestamp AT TIME ZONE 'UTC',
+                (v_month::timestamp + INTERVAL '1 month') AT TIME ZONE 'UTC'
+            );
+            EXECUTE format('DROP TABLE %I', v_partition);
+            v_dropped := v_dropped || v_partition;
+        END IF;
+    END LOOP;
+
+    v_days := v_days + rollup_engineer_locations('-infinity', v_cutoff::timestamp AT TIME ZONE 'UTC', FALSE);
+    DELETE FROM engineer_locations_default WHERE recorded_at < v_cutoff::timestamp AT TIME ZONE 'UTC';
+    GET DIAGNOSTICS v_deleted = ROW_COUNT;
+
+    RETURN jsonb_build_object(
+        'skipped', false,
+        'partitions_created', v_created,
+        'partitions_dropped', to_jsonb(v_dropped),
+        'days_rolled_up', v_days,
+        'stray_points_deleted', v_deleted
+    );
+END;
+$$;
+
+-- Summaries for the points that already exist
+SELECT rollup_engineer_locations('-infinity', (NOW() AT TIME ZONE 'UTC')::date::timestamp AT TIME ZONE 'UTC');
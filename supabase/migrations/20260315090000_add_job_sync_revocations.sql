@@ -0,0 +1,44 @@
+-- Per-engineer job tombstones for delta sync
+-- A device only syncs its engineer's open jobs, so it must hear when one of them is
+-- reassigned or closed. Those transitions, and deletes, now leave a sync_tombstones
+-- row naming the engineer the job was taken from; GET /sync only returns job
+-- tombstones addressed to the calling engineer.
+
+ALTER TABLE sync_tombstones ADD COLUMN IF NOT EXISTS engineer_id UUID;
+
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_engineer_deleted_at ON sync_tombstones(engineer_id, deleted_at, id) WHERE entity = 'jobs';
+
+CREATE OR REPLACE FUNCTION record_sync_tombstone()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO sync_tombstones (entity, entity_id, engineer_id)
+    VALUES (TG_TABLE_NAME, OLD.id, (to_jsonb(OLD)->>'assigned_engineer_id')::uuid);
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION record_job_sync_revocation()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    IF OLD.assigned_engineer_id IS NOT NULL
+        AND OLD.status IN ('pending', 'in_progress', 'travelling')
+        AND (
+            NEW.assigned_engineer_id IS DISTINCT FROM OLD.assigned_engineer_id
+            OR NEW.status NOT IN ('pending', 'in_progress', 'travelling')
+        ) THEN
+        INSERT INTO sync_tombstones (entity, entity_id, engineer_id)
+        VALUES ('jobs', OLD.id, OLD.assigned_engineer_id);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_jobs_sync_revocation ON jobs;
+CREATE TRIGGER trg_jobs_sync_revocation
+    AFTER UPDATE OF assigned_engineer_id, status ON jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION record_job_sync_revocation();
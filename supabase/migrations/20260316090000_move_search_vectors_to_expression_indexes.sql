@@ -0,0 +1,110 @@
+-- Full-text search without stored vectors
+-- The generated search_vector columns came back from every select('*') on customers,
+-- sites, assets and jobs, bloating list and detail responses. The vectors are now
+-- computed by one function per table and indexed as GIN expression indexes;
+-- search_all() calls the same functions so the planner uses those indexes.
+
+CREATE OR REPLACE FUNCTION customer_search_vector(c customers)
+RETURNS TSVECTOR
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT search_weighted(c.company_name, 'A') ||
+           search_weighted(COALESCE(c.email, '') || ' ' || COALESCE(c.phone, ''), 'B') ||
+           search_weighted(c.billing_address, 'C');
+$$;
+
+CREATE OR REPLACE FUNCTION site_search_vector(s sites)
+RETURNS TSVECTOR
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT search_weighted(s.name, 'A') ||
+           search_weighted(s.address, 'B') ||
+           search_weighted(s.contact_name, 'C');
+$$;
+
+CREATE OR REPLACE FUNCTION asset_search_vector(a assets)
+RETURNS TSVECTOR
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT search_weighted(COALESCE(a.serial_number, '') || ' ' || COALESCE(a.name, ''), 'A') ||
+           search_weighted(COALESCE(a.make, '') || ' ' || COALESCE(a.model, ''), 'B') ||
+           search_weighted(a.refrigerant_type, 'C');
+$$;
+
+CREATE OR REPLACE FUNCTION job_search_vector(j jobs)
+RETURNS TSVECTOR
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT search_weighted(j.job_number, 'A') ||
+           search_weighted(j.description, 'B');
+$$;
+
+DROP INDEX IF EXISTS idx_customers_search_vector;
+DROP INDEX IF EXISTS idx_sites_search_vector;
+DROP INDEX IF EXISTS idx_assets_search_vector;
+DROP INDEX IF EXISTS idx_jobs_search_vector;
+
+ALTER TABLE customers DROP COLUMN IF EXISTS search_vector;
+ALTER TABLE sites DROP COLUMN IF EXISTS search_vector;
+ALTER TABLE assets DROP COLUMN IF EXISTS search_vector;
+ALTER TABLE jobs DROP COLUMN IF EXISTS search_vector;
+
+CREATE INDEX IF NOT EXISTS idx_customers_search_vector ON customers USING GIN (customer_search_vector(customers));
+CREATE INDEX IF NOT EXISTS idx_sites_search_vector ON sites USING GIN (site_search_vector(sites));
+CREATE INDEX IF NOT EXISTS idx_assets_search_vector ON assets USING GIN (asset_search_vector(assets));
+CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN (job_search_vector(jobs));
+
+CREATE OR REPLACE FUNCTION search_all(
+    p_query TEXT,
+    p_types TEXT[] DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    entity_type TEXT,
+    id UUID,
+    title TEXT,
+    subtitle TEXT,
+    customer_id UUID,
+    site_id UUID,
+    rank REAL,
+    total_count BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT search_prefix_query(p_query) AS query
+    ),
+    hits AS (
+        SELECT 'customer'::TEXT, c.id, c.company_name::TEXT, c.email::TEXT, c.id, NULL::UUID,
+               ts_rank(customer_search_vector(c), q.query)
+        FROM customers c, q
+        WHERE (p_types IS NULL OR 'customer' = ANY(p_types)) AND customer_search_vector(c) @@ q.query
+        UNION ALL
+        SELECT 'site', s.id, s.name::TEXT, s.address, s.customer_id, s.id,
+               ts_rank(site_search_vector(s), q.query)
+        FROM sites s, q
+        WHERE (p_types IS NULL OR 'site' = ANY(p_types)) AND site_search_vector(s) @@ q.query
+        UNION ALL
+        SELECT 'asset', a.id, a.name::TEXT,
+               concat_ws(' ', NULLIF(a.make, ''), NULLIF(a.model, ''), NULLIF(a.serial_number, '')),
+               NULL::UUID, a.site_id,
+               ts_rank(asset_search_vector(a), q.query)
+        FROM assets a, q
+        WHERE (p_types IS NULL OR 'asset' = ANY(p_types)) AND asset_search_vector(a) @@ q.query
+        UNION ALL
+        SELECT 'job', j.id, j.job_number::TEXT, j.description, j.customer_id, j.site_id,
+               ts_rank(job_search_vector(j), q.query)
+        FROM jobs j, q
+        WHERE (p_types IS NULL OR 'job' = ANY(p_types)) AND job_search_vector(j) @@ q.query
+    )
+    SELECT h.*, COUNT(*) OVER () AS total_count
+    FROM hits AS h(entity_type, id, title, subtitle, customer_id, site_id, rank)
+    ORDER BY h.rank DESC, h.title, h.id
+    LIMIT p_limit OFFSET p_offset;
+$$;
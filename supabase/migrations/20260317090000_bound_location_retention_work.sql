@@ -0,0 +1,73 @@
+-- Bounded location retention runs
+-- apply_engineer_location_retention() is called through PostgREST, so the whole run is
+-- one statement subject to the API role's statement_timeout. A backlog of expired
+-- months could make a single call roll up and drop all of them at once; it now drops
+-- at most p_max_partitions per call and reports 'more' so the caller calls again.
+
+DROP FUNCTION IF EXISTS apply_engineer_location_retention(INTEGER, INTEGER);
+
+CREATE OR REPLACE FUNCTION apply_engineer_location_retention(
+    p_retention_months INTEGER,
+    p_months_ahead INTEGER DEFAULT 2,
+    p_max_partitions INTEGER DEFAULT 1
+)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_today DATE := (NOW() AT TIME ZONE 'UTC')::date;
+    v_cutoff DATE := (date_trunc('month', NOW() AT TIME ZONE 'UTC') - make_interval(months => p_retention_months))::date;
+    v_created INTEGER;
+    v_days INTEGER := 0;
+    v_deleted INTEGER := 0;
+    v_dropped TEXT[] := '{}';
+    v_more BOOLEAN := FALSE;
+    v_partition TEXT;
+    v_month DATE;
+BEGIN
+    IF NOT pg_try_advisory_xact_lock(hashtext('apply_engineer_location_retention')) THEN
+        RETURN jsonb_build_object('skipped', true);
+    END IF;
+
+    v_created := ensure_engineer_location_partitions(v_today, (v_today::timestamp + make_interval(months => p_months_ahead))::date);
+    v_days := v_days + rollup_engineer_locations((v_today - 2)::timestamp AT TIME ZONE 'UTC', v_today::timestamp AT TIME ZONE 'UTC');
+
+    FOR v_partition IN
+        SELECT c.relname
+        FROM pg_inherits i
+        JOIN pg_class c ON c.oid = i.inhrelid
+        WHERE i.inhparent = 'engineer_locations'::regclass
+          AND c.relname ~ '^engineer_locations_p[0-9]{6}$'
+        ORDER BY c.relname
+    LOOP
+        v_month := to_date(right(v_partition, 6), 'YYYYMM');
+        EXIT WHEN v_month >= v_cutoff;
+        IF cardinality(v_dropped) >= p_max_partitions THEN
+            v_more := TRUE;
+            EXIT;
+        END IF;
+        v_days := v_days + rollup_engineer_locations(
+            v_month::timestamp AT TIME ZONE 'UTC',
+            (v_month::timestamp + INTERVAL '1 month') AT TIME ZONE 'UTC'
+        );
+        EXECUTE format('DROP TABLE %I', v_partition);
+        v_dropped := v_dropped || v_partition;
+    END LOOP;
+
+    -- Stray points are handled once the expired partitions are gone
+    IF NOT v_more THEN
+        v_days := v_days + rollup_engineer_locations('-infinity', v_cutoff::timestamp AT TIME ZONE 'UTC', FALSE);
+        DELETE FROM engineer_locations_default WHERE recorded_at < v_cutoff::timestamp AT TIME ZONE 'UTC';
+        GET DIAGNOSTICS v_deleted = ROW_COUNT;
+    END IF;
+
+    RETURN jsonb_build_object(
+        'skipped', false,
+        'more', v_more,
+        'partitions_created', v_created,
+        'partitions_dropped', to_jsonb(v_dropped),
+        'days_rolled_up', v_days,
+        'stray_points_deleted', v_deleted
+    );
+END;
+$$;
@@ -0,0 +1,26 @@
+-- Job numbers from a sequence
+-- Job numbers were derived from COUNT(*) of jobs, so two concurrent creations (or any
+-- deleted job) produced a duplicate and the unique constraint rejected the insert,
+-- failing a whole bulk insert of generated PM / leak-check jobs. Numbers are now
+-- reserved from a sequence, which never hands out the same value twice.
+
+CREATE SEQUENCE IF NOT EXISTS job_number_seq;
+
+-- Continue after the highest number handed out so far (the first call returns JOB-00001 on an empty table)
+SELECT setval('job_number_seq', GREATEST(last_number, 1), last_number > 0)
+FROM (
+    SELECT GREATEST(
+        COUNT(*),
+        COALESCE(MAX(substring(job_number FROM '^JOB-([0-9]+)$')::BIGINT), 0)
+    ) AS last_number
+    FROM jobs
+) AS existing;
+
+CREATE OR REPLACE FUNCTION reserve_job_numbers(p_count INTEGER DEFAULT 1)
+RETURNS SETOF TEXT
+LANGUAGE sql
+VOLATILE
+AS $$
+    SELECT 'JOB-' || lpad(nextval('job_number_seq')::TEXT, 5, '0')
+    FROM generate_series(1, p_count);
+$$;
@@ -0,0 +1,49 @@
+-- Per-engineer site and asset tombstones for delta sync
+-- Engineer devices now only sync the sites and assets referenced by their open jobs.
+-- When a job leaves an engineer (deleted, reassigned, closed) or stops referencing a
+-- site or asset, tombstones for that site and those assets are addressed to the
+-- engineer as well; GET /sync drops the ones another of their open jobs still uses.
+
+DROP INDEX IF EXISTS idx_sync_tombstones_engineer_deleted_at;
+CREATE INDEX IF NOT EXISTS idx_sync_tombstones_engineer_deleted_at ON sync_tombstones(engineer_id, deleted_at, id) WHERE engineer_id IS NOT NULL;
+
+CREATE OR REPLACE FUNCTION record_job_sync_revocation()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_revoked BOOLEAN;
+BEGIN
+    IF OLD.assigned_engineer_id IS NULL OR OLD.status NOT IN ('pending', 'in_progress', 'travelling') THEN
+        RETURN NULL;
+    END IF;
+
+    v_revoked := TG_OP = 'DELETE'
+        OR NEW.assigned_engineer_id IS DISTINCT FROM OLD.assigned_engineer_id
+        OR NEW.status NOT IN ('pending', 'in_progress', 'travelling');
+
+    -- Deleted jobs are already tombstoned by record_sync_tombstone
+    IF v_revoked AND TG_OP = 'UPDATE' THEN
+        INSERT INTO sync_tombstones (entity, entity_id, engineer_id)
+        VALUES ('jobs', OLD.id, OLD.assigned_engineer_id);
+    END IF;
+
+    IF OLD.site_id IS NOT NULL AND (v_revoked OR NEW.site_id IS DISTINCT FROM OLD.site_id) THEN
+        INSERT INTO sync_tombstones (entity, entity_id, engineer_id)
+        VALUES ('sites', OLD.site_id, OLD.assigned_engineer_id);
+    END IF;
+
+    INSERT INTO sync_tombstones (entity, entity_id, engineer_id)
+    SELECT 'assets', old_asset.id, OLD.assigned_engineer_id
+    FROM jsonb_uuid_array(OLD.asset_ids) AS old_asset(id)
+    WHERE v_revoked OR old_asset.id NOT IN (SELECT jsonb_uuid_array(NEW.asset_ids));
+
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_jobs_sync_revocation ON jobs;
+CREATE TRIGGER trg_jobs_sync_revocation
+    AFTER UPDATE OF assigned_engineer_id, status, site_id, asset_ids OR DELETE ON jobs
+    FOR EACH ROW
+    EXECUTE FUNCTION record_job_sync_revocation();
@@ -0,0 +1,123 @@
+-- Record leak checks when a leak_check job is completed
+-- Only create_fgas_log advanced fgas_next_leak_check_due, so completing a job made by
+-- /fgas/generate-leak-check-jobs left its assets due and the next run generated the
+-- same leak check again. complete_job now moves the leak-check schedule of the job's
+-- F-Gas assets on, as create_fgas_log does: fgas_last_leak_check is the completion
+-- time and the next check is due fgas_leak_check_interval calendar months later.
+-- Doing it here keeps the completion and the schedule in one transaction, rather than
+-- having the generator guess from job history whether a check was already done.
+
+CREATE OR REPLACE FUNCTION complete_job(p_job_id UUID, p_completion JSONB, p_user_id VARCHAR)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_now TIMESTAMPTZ := NOW();
+    v_job jobs;
+    v_completion_id UUID := gen_random_uuid();
+    v_assets_updated INTEGER;
+    v_leak_checks_recorded INTEGER := 0;
+    v_part_ids UUID[];
+    v_quantities INTEGER[];
+    v_parts JSONB;
+BEGIN
+    SELECT * INTO v_job FROM jobs WHERE id = p_job_id FOR UPDATE;
+    IF NOT FOUND THEN
+        RAISE EXCEPTION 'Job not found' USING ERRCODE = 'P0002';
+    END IF;
+    IF v_job.status = 'completed' THEN
+        RAISE EXCEPTION 'Job is already completed' USING ERRCODE = 'PT409';
+    END IF;
+
+    -- trg_job_completions_part_usage writes the part_usage rows for this completion
+    INSERT INTO job_completions
+    SELECT * FROM jsonb_populate_record(
+        NULL::job_completions,
+        p_completion || jsonb_build_object(
+            'id', v_completion_id,
+            'job_id', p_job_id,
+            'completed_by', p_user_id,
+            'completed_at', v_now
+        )
+    );
+
+    UPDATE jobs SET
+        status = 'completed',
+        updated_at = v_now,
+        version = version + 1
+    WHERE id = p_job_id;
+
+    UPDATE assets a SET
+        last_service_date = iso_timestamp(v_now),
+        next_pm_due = iso_timestamp(v_now + make_interval(months => COALESCE(a.pm_interval_months, 6)))
+    WHERE a.id IN (
+        SELECT value::UUID FROM jsonb_array_elements_text(COALESCE(v_job.asset_ids, '[]'::JSONB))
+    );
+    GET DIAGNOSTICS v_assets_updated = ROW_COUNT;
+
+    IF v_job.job_type = 'leak_check' THEN
+        UPDATE assets a SET
+            fgas_last_leak_check = iso_timestamp(v_now),
+            fgas_next_leak_check_due = iso_timestamp(v_now + make_interval(months => COALESCE(a.fgas_leak_check_interval, 12)))
+        WHERE a.id IN (
+            SELECT value::UUID FROM jsonb_array_elements_text(COALESCE(v_job.asset_ids, '[]'::JSONB))
+        )
+          AND COALESCE(a.refrigerant_type, '') <> '';
+        GET DIAGNOSTICS v_leak_checks_recorded = ROW_COUNT;
+    END IF;
+
+    SELECT array_agg(u.part_id ORDER BY u.part_id), array_agg(u.quantity ORDER BY u.part_id)
+    INTO v_part_ids, v_quantities
+    FROM (
+        SELECT part_id, SUM(quantity)::INTEGER AS quantity
+        FROM part_usage
+        WHERE completion_id = v_completion_id AND part_id IS NOT NULL
+        GROUP BY part_id
+    ) u;
+
+    IF v_part_ids IS NOT NULL THEN
+        PERFORM 1 FROM parts WHERE id = ANY(v_part_ids) ORDER BY id FOR UPDATE;
+
+        -- The FROM list sees the row as it was before the update, so the shortfall is
+        -- taken from the locked stock level
+        WITH updated AS (
+            UPDATE parts p SET
+                stock_quantity = GREATEST(COALESCE(before.stock_quantity, 0) - u.quantity, 0)
+            FROM unnest(v_part_ids, v_quantities) AS u(part_id, quantity)
+            JOIN parts before ON before.id = u.part_id
+            WHERE p.id = u.part_id
+            RETURNING p.id, p.part_number, p.name, p.unit_price, p.stock_quantity, p.min_stock_level, u.quantity,
+                      GREATEST(u.quantity - GREATEST(COALESCE(before.stock_quantity, 0), 0), 0) AS shortfall
+        )
+        SELECT jsonb_agg(to_jsonb(updated)) INTO v_parts FROM updated;
+    END IF;
+
+    INSERT INTO job_events (id, job_id, event_type, user_id, timestamp, details)
+    VALUES (
+        gen_random_uuid(),
+        p_job_id,
+        'completed',
+        p_user_id,
+        v_now,
+        jsonb_build_object(
+            'travel_time', p_completion->'travel_time',
+            'time_on_site', p_completion->'time_on_site',
+            'assets_updated', v_assets_updated,
+            'leak_checks_recorded', v_leak_checks_recorded,
+            'parts_decremented', COALESCE(jsonb_array_length(v_parts), 0),
+            'stock_shortfall', COALESCE((
+                SELECT jsonb_agg(jsonb_build_object('part_id', part->'id', 'shortfall', part->'shortfall'))
+                FROM jsonb_array_elements(v_parts) AS part
+                WHERE (part->>'shortfall')::INTEGER > 0
+            ), '[]'::JSONB)
+        )
+    );
+
+    RETURN jsonb_build_object(
+        'completion_id', v_completion_id,
+        'assets_updated', v_assets_updated,
+        'leak_checks_recorded', v_leak_checks_recorded,
+        'parts', COALESCE(v_parts, '[]'::JSONB)
+    );
+END;
+$$;
@@ -0,0 +1,118 @@
+-- Search indexes on explicit column expressions
+-- The expression indexes from 20260316090000 called whole-row functions such as
+-- customer_search_vector(customers). An index over a whole-row value depends on every
+-- column of the table, so any ALTER TABLE that adds or changes a column has to rebuild
+-- it, and the functions hide which columns the index actually reads. The indexes are
+-- now built on the column expressions themselves, and search_all() repeats exactly the
+-- same expressions so the planner still matches them to the indexes.
+
+DROP INDEX IF EXISTS idx_customers_search_vector;
+DROP INDEX IF EXISTS idx_sites_search_vector;
+DROP INDEX IF EXISTS idx_assets_search_vector;
+DROP INDEX IF EXISTS idx_jobs_search_vector;
+
+CREATE INDEX IF NOT EXISTS idx_customers_search_vector ON customers USING GIN ((
+    search_weighted(company_name, 'A') ||
+    search_weighted(COALESCE(email, '') || ' ' || COALESCE(phone, ''), 'B') ||
+    search_weighted(billing_address, 'C')
+));
+CREATE INDEX IF NOT EXISTS idx_sites_search_vector ON sites USING GIN ((
+    search_weighted(name, 'A') ||
+    search_weighted(address, 'B') ||
+    search_weighted(contact_name, 'C')
+));
+CREATE INDEX IF NOT EXISTS idx_assets_search_vector ON assets USING GIN ((
+    search_weighted(COALESCE(serial_number, '') || ' ' || COALESCE(name, ''), 'A') ||
+    search_weighted(COALESCE(make, '') || ' ' || COALESCE(model, ''), 'B') ||
+    search_weighted(refrigerant_type, 'C')
+));
+CREATE INDEX IF NOT EXISTS idx_jobs_search_vector ON jobs USING GIN ((
+    search_weighted(job_number, 'A') ||
+    search_weighted(description, 'B')
+));
+
+CREATE OR REPLACE FUNCTION search_all(
+    p_query TEXT,
+    p_types TEXT[] DEFAULT NULL,
+    p_limit INTEGER DEFAULT 20,
+    p_offset INTEGER DEFAULT 0
+)
+RETURNS TABLE (
+    entity_type TEXT,
+    id UUID,
+    title TEXT,
+    subtitle TEXT,
+    customer_id UUID,
+    site_id UUID,
+    rank REAL,
+    total_count BIGINT
+)
+LANGUAGE sql
+STABLE
+AS $$
+    WITH q AS (
+        SELECT search_prefix_query(p_query) AS query
+    ),
+    hits AS (
+        SELECT 'customer'::TEXT, c.id, c.company_name::TEXT, c.email::TEXT, c.id, NULL::UUID,
+               ts_rank(
+                   search_weighted(c.company_name, 'A') ||
+                   search_weighted(COALESCE(c.email, '') || ' ' || COALESCE(c.phone, ''), 'B') ||
+                   search_weighted(c.billing_address, 'C'),
+                   q.query
+               )
+        FROM customers c, q
+        WHERE (p_types IS NULL OR 'customer' = ANY(p_types))
+          AND (search_weighted(c.company_name, 'A') ||
+               search_weighted(COALESCE(c.email, '') || ' ' || COALESCE(c.phone, ''), 'B') ||
+               search_weighted(c.billing_address, 'C')) @@ q.query
+        UNION ALL
+        SELECT 'site', s.id, s.name::TEXT, s.address, s.customer_id, s.id,
+               ts_rank(
+                   search_weighted(s.name, 'A') ||
+                   search_weighted(s.address, 'B') ||
+                   search_weighted(s.contact_name, 'C'),
+                   q.query
+               )
+        FROM sites s, q
+        WHERE (p_types IS NULL OR 'site' = ANY(p_types))
+          AND (search_weighted(s.name, 'A') ||
+               search_weighted(s.address, 'B') ||
+               search_weighted(s.contact_name, 'C')) @@ q.query
+        UNION ALL
+        SELECT 'asset', a.id, a.name::TEXT,
+               concat_ws(' ', NULLIF(a.make, ''), NULLIF(a.model, ''), NULLIF(a.serial_number, '')),
+               NULL::UUID, a.site_id,
+               ts_rank(
+                   search_weighted(COALESCE(a.serial_number, '') || ' ' || COALESCE(a.name, ''), 'A') ||
+                   search_weighted(COALESCE(a.make, '') || ' ' || COALESCE(a.model, ''), 'B') ||
+                   search_weighted(a.refrigerant_type, 'C'),
+                   q.query
+               )
+        FROM assets a, q
+        WHERE (p_types IS NULL OR 'asset' = ANY(p_types))
+          AND (search_weighted(COALESCE(a.serial_number, '') || ' ' || COALESCE(a.name, ''), 'A') ||
+               search_weighted(COALESCE(a.make, '') || ' ' || COALESCE(a.model, ''), 'B') ||
+               search_weighted(a.refrigerant_type, 'C')) @@ q.query
+        UNION ALL
+        SELECT 'job', j.id, j.job_number::TEXT, j.description, j.customer_id, j.site_id,
+               ts_rank(
+                   search_weighted(j.job_number, 'A') ||
+                   search_weighted(j.description, 'B'),
+                   q.query
+               )
+        FROM jobs j, q
+        WHERE (p_types IS NULL OR 'job' = ANY(p_types))
+          AND (search_weighted(j.job_number, 'A') ||
+               search_weighted(j.description, 'B')) @@ q.query
+    )
+    SELECT h.*, COUNT(*) OVER () AS total_count
+    FROM hits AS h(entity_type, id, title, subtitle, customer_id, site_id, rank)
+    ORDER BY h.rank DESC, h.title, h.id
+    LIMIT p_limit OFFSET p_offset;
+$$;
+
+DROP FUNCTION IF EXISTS customer_search_vector(customers);
+DROP FUNCTION IF EXISTS site_search_vector(sites);
+DROP FUNCTION IF EXISTS asset_search_vector(assets);
+DROP FUNCTION IF EXISTS job_search_vector(jobs);
@@ -0,0 +1,10 @@
+import os
+import sys
+from pathlib import Path
+
+# The backend modules import each other as top-level packages (from database import ...)
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+# database.py builds the Supabase client at import time; no request is made until a query runs
+os.environ.setdefault("SUPABASE_URL", "https://test.supabase.co")
+os.environ.setdefault("SUPABASE_KEY", "eyJhbGciOiJIUzI1NiJ9.eyJyb2xlIjoiYW5vbiJ9.test")
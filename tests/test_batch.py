@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI, HTTPException
+
+from models.batch import BatchOperation
+from services.batch import plan_waves, run_batch
+
+
+def op(id, path="/health", method="GET", depends_on=()):
+    return BatchOperation(id=id, method=method, path=path, depends_on=list(depends_on))
+
+
+def wave_ids(operations):
+    return [[o.id for o in wave] for wave in plan_waves(operations)]
+
+
+def test_plan_waves_orders_by_dependencies():
+    operations = [op("c", depends_on=["a", "b"]), op("a"), op("b", depends_on=["a"]), op("d")]
+    assert wave_ids(operations) == [["a", "d"], ["b"], ["c"]]
+
+
+def test_plan_waves_rejects_cycles():
+    with pytest.raises(HTTPException) as exc:
+        plan_waves([op("a", depends_on=["b"]), op("b", depends_on=["a"])])
+    assert exc.value.status_code == 400
+    assert "cycle" in exc.value.detail
+
+
+def test_plan_waves_rejects_unknown_dependency():
+    with pytest.raises(HTTPException) as exc:
+        plan_waves([op("a", depends_on=["missing"])])
+    assert exc.value.status_code == 400
+    assert "unknown dependency missing" in exc.value.detail
+
+
+def test_plan_waves_rejects_duplicate_ids_and_nested_batches():
+    with pytest.raises(HTTPException):
+        plan_waves([op("a"), op("a")])
+    with pytest.raises(HTTPException):
+        plan_waves([op("a", path="/batch", method="POST")])
+
+
+def test_run_batch_isolates_failing_operation():
+    app = FastAPI()
+
+    @app.get("/api/health")
+    def health():
+        return {"status": "healthy"}
+
+    @app.get("/api/jobs/{job_id}")
+    def get_job(job_id: str):
+        raise ConnectionError("Supabase unreachable")
+
+    operations = [op("h"), op("j", path="/jobs/abc"), op("d", depends_on=["j"])]
+    results = asyncio.run(run_batch(app, operations, [], {"id": "u"}))
+
+    assert [(r["id"], r["status"]) for r in results] == [("h", 200), ("j", 500), ("d", 424)]
+    assert results[0]["body"] == {"status": "healthy"}
+    assert results[2]["body"] == {"detail": "Dependency failed: j"}
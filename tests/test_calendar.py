@@ -0,0 +1,52 @@
+from services.calendar import UNASSIGNED_KEY, build_engineer_calendar
+
+
+def job(id, time, duration=60, engineer="e1", date="2026-03-02"):
+    return {
+        "id": id,
+        "assigned_engineer_id": engineer,
+        "scheduled_date": date,
+        "scheduled_time": time,
+        "estimated_duration": duration,
+    }
+
+
+def day(calendar, engineer="e1", date="2026-03-02"):
+    return {entry["id"]: entry for entry in calendar[engineer][date]}
+
+
+def test_overlapping_jobs_are_flagged_both_ways():
+    entries = day(build_engineer_calendar([job("a", "09:00", 90), job("b", "10:00"), job("c", "11:00")]))
+    assert entries["a"]["conflicts_with"] == ["b"]
+    assert entries["b"]["conflicts_with"] == ["a"]
+    assert entries["c"]["conflict"] is False
+
+
+def test_back_to_back_jobs_do_not_conflict():
+    entries = day(build_engineer_calendar([job("a", "09:00", 60), job("b", "10:00", 60)]))
+    assert not entries["a"]["conflict"] and not entries["b"]["conflict"]
+
+
+def test_long_job_conflicts_with_every_job_it_spans():
+    entries = day(build_engineer_calendar([job("long", "08:00", 480), job("x", "09:00"), job("y", "13:00")]))
+    assert sorted(entries["long"]["conflicts_with"]) == ["x", "y"]
+    assert entries["x"]["conflicts_with"] == ["long"]
+
+
+def test_jobs_are_sorted_and_default_to_nine_for_an_hour():
+    calendar = build_engineer_calendar([job("late", "14:30"), job("unset", None, duration=None)])
+    entries = calendar["e1"]["2026-03-02"]
+    assert [e["id"] for e in entries] == ["unset", "late"]
+    assert (entries[0]["start_minute"], entries[0]["end_minute"]) == (540, 600)
+
+
+def test_other_days_engineers_and_unassigned_never_conflict():
+    calendar = build_engineer_calendar([
+        job("a", "09:00"),
+        job("b", "09:00", date="2026-03-03"),
+        job("c", "09:00", engineer="e2"),
+        job("u1", "09:00", engineer=None),
+        job("u2", "09:00", engineer=None),
+    ])
+    assert not any(e["conflict"] for days in calendar.values() for entries in days.values() for e in entries)
+    assert len(calendar[UNASSIGNED_KEY]["2026-03-02"]) == 2
@@ -0,0 +1,128 @@
+import gzip
+import struct
+import time
+import uuid
+
+import numpy as np
+import pytest
+from fastapi import HTTPException
+
+from services.location_codec import (
+    decode_location_batch,
+    LOCATION_STATUSES,
+    MAX_BATCH_POINTS,
+    MIN_RECORDED_MS,
+    MAX_FUTURE_MS,
+)
+
+JOB_ID = "6f1c2d3e-4a5b-4c6d-8e9f-0a1b2c3d4e5f"
+
+
+def encode(points, job_ids=(), base_ms=None, count=None):
+    """Build a batch the way frontend/src/lib/locationCodec.js does."""
+    base_ms = points[0]["recorded_ms"] if base_ms is None else base_ms
+    base_lat = round(points[0]["latitude"] * 1e7)
+    base_lon = round(points[0]["longitude"] * 1e7)
+    header = struct.pack(
+        "<4sIqiiH", b"LOC1", len(points) if count is None else count,
+        base_ms, base_lat, base_lon, len(job_ids)
+    )
+    jobs = b"".join(uuid.UUID(j).bytes for j in job_ids)
+
+    ms = np.array([p["recorded_ms"] for p in points], dtype=np.int64)
+    lat = np.array([round(p["latitude"] * 1e7) for p in points], dtype=np.int64)
+    lon = np.array([round(p["longitude"] * 1e7) for p in points], dtype=np.int64)
+    columns = [
+        np.diff(ms, prepend=base_ms).astype("<i4"),
+        np.diff(lat, prepend=base_lat).astype("<i4"),
+        np.diff(lon, prepend=base_lon).astype("<i4"),
+        np.array([0xFFFF if p.get("accuracy") is None else round(p["accuracy"] * 10) for p in points], dtype="<u2"),
+        np.array([0xFFFF if p.get("job_id") is None else job_ids.index(p["job_id"]) for p in points], dtype="<u2"),
+        np.array([LOCATION_STATUSES.index(p.get("status", "travelling")) for p in points], dtype="u1"),
+    ]
+    return header + jobs + b"".join(c.tobytes() for c in columns)
+
+
+def point(recorded_ms, **fields):
+    return {"latitude": 51.5007292, "longitude": -0.1246254, "recorded_ms": recorded_ms, **fields}
+
+
+def test_round_trip():
+    now_ms = int(time.time() * 1000) // 1000 * 1000
+    points = [
+        point(now_ms - 60000, accuracy=4.5, job_id=JOB_ID),
+        point(now_ms - 30000, latitude=51.5010001, longitude=-0.1250002, status="in_progress"),
+        point(now_ms, latitude=-33.8567844, longitude=151.2152967, accuracy=0.1, status="completed"),
+    ]
+    decoded = decode_location_batch(encode(points, job_ids=(JOB_ID,)))
+
+    assert [row[:5] for row in decoded] == [
+        (51.5007292, -0.1246254, 4.5, JOB_ID, "travelling"),
+        (51.5010001, -0.1250002, None, None, "in_progress"),
+        (-33.8567844, 151.2152967, 0.1, None, "completed"),
+    ]
+    assert decoded[0][5] == np.datetime_as_string(np.datetime64(now_ms - 60000, "ms"), unit="ms", timezone="UTC")
+
+
+def test_gzip_body():
+    body = encode([point(MIN_RECORDED_MS + 1)])
+    assert decode_location_batch(gzip.compress(body), "gzip") == decode_location_batch(body)
+
+
+def test_unsupported_encoding():
+    with pytest.raises(HTTPException) as exc:
+        decode_location_batch(encode([point(MIN_RECORDED_MS)]), "br")
+    assert exc.value.status_code == 415
+
+
+@pytest.mark.parametrize("recorded_ms", [MIN_RECORDED_MS, None])
+def test_timestamps_at_the_bounds_are_accepted(recorded_ms):
+    recorded_ms = recorded_ms or int(time.time() * 1000) + MAX_FUTURE_MS - 60000
+    assert len(decode_location_batch(encode([point(recorded_ms)]))) == 1
+
+
+@pytest.mark.parametrize("recorded_ms", [MIN_RECORDED_MS - 1, None])
+def test_timestamps_out_of_range_are_rejected(recorded_ms):
+    recorded_ms = recorded_ms or int(time.time() * 1000) + MAX_FUTURE_MS + 60000
+    with pytest.raises(HTTPException) as exc:
+        decode_location_batch(encode([point(recorded_ms)]))
+    assert exc.value.status_code == 400
+    assert "recorded time" in exc.value.detail
+
+
+def test_delta_that_walks_before_the_lower_bound_is_rejected():
+    # The second point is only out of range once its delta is added to the first
+    body = encode([point(MIN_RECORDED_MS + 10), point(MIN_RECORDED_MS - 10)])
+    with pytest.raises(HTTPException) as exc:
+        decode_location_batch(body)
+    assert exc.value.status_code == 400
+
+
+@pytest.mark.parametrize("body, detail", [
+    (b"LOC1", "truncated header"),
+    (b"XXXX" + encode([point(MIN_RECORDED_MS)])[4:], "unknown format"),
+    (encode([point(MIN_RECORDED_MS)])[:-1], "length does not match"),
+    (encode([point(MIN_RECORDED_MS, latitude=90.5)]), "coordinates out of range"),
+])
+def test_malformed_batches_are_rejected(body, detail):
+    with pytest.raises(HTTPException) as exc:
+        decode_location_batch(body)
+    assert exc.value.status_code == 400
+    assert detail in exc.value.detail
+
+
+def test_job_index_must_reference_a_job_id():
+    body = bytearray(encode([point(MIN_RECORDED_MS, job_id=JOB_ID)], job_ids=(JOB_ID,)))
+    # Drop the job id table but keep the point's index 0
+    body[24:26] = struct.pack("<H", 0)
+    del body[26:42]
+    with pytest.raises(HTTPException) as exc:
+        decode_location_batch(bytes(body))
+    assert "job index" in exc.value.detail
+
+
+def test_too_many_points():
+    body = encode([point(MIN_RECORDED_MS)], count=MAX_BATCH_POINTS + 1)
+    with pytest.raises(HTTPException) as exc:
+        decode_location_batch(body)
+    assert exc.value.status_code == 413
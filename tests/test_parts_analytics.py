@@ -0,0 +1,79 @@
+from datetime import datetime, timezone
+
+import pandas as pd
+import pytest
+
+from services.parts_analytics import compute_reorder_plan, DEFAULT_LEAD_TIME_DAYS, REVIEW_PERIOD_DAYS
+
+SINCE = datetime(2026, 1, 1, tzinfo=timezone.utc)
+DAYS = 28
+
+
+def parts(*rows):
+    columns = ["id", "part_number", "name", "unit_price", "stock_quantity", "min_stock_level", "lead_time_days"]
+    return pd.DataFrame([dict(zip(columns, row)) for row in rows], columns=columns)
+
+
+def usage(*rows):
+    return pd.DataFrame(
+        [{"part_id": part_id, "quantity": quantity, "used_at": used_at} for part_id, quantity, used_at in rows],
+        columns=["part_id", "quantity", "used_at"],
+    )
+
+
+def plan_for(part_rows, usage_rows):
+    return compute_reorder_plan(parts(*part_rows), usage(*usage_rows), SINCE, DAYS).set_index("id")
+
+
+def test_steady_demand_below_reorder_point_is_reordered():
+    plan = plan_for(
+        [("p1", "F1", "Filter", 2.5, 2, 5, 7)],
+        [("p1", 7, f"2026-01-{day:02d}T10:00:00+00:00") for day in (2, 9, 16, 23)],
+    )
+    row = plan.loc["p1"]
+    assert row["used_quantity"] == 28
+    assert row["daily_rate"] == 1.0
+    assert row["safety_stock"] == 0
+    assert row["reorder_point"] == 7
+    assert row["days_of_cover"] == 2.0
+    assert row["suggested_order_quantity"] == 7 + REVIEW_PERIOD_DAYS - 2
+    assert row["estimated_cost"] == pytest.approx(35 * 2.5)
+
+
+def test_unused_part_keeps_min_stock_and_default_lead_time():
+    plan = plan_for([("p2", "B1", "Belt", 4.0, 10, 3, None)], [])
+    row = plan.loc["p2"]
+    assert row["used_quantity"] == 0
+    assert row["reorder_point"] == 3
+    assert row["lead_time_days"] == DEFAULT_LEAD_TIME_DAYS
+    assert row["suggested_order_quantity"] == 0
+    assert pd.isna(row["days_of_cover"])
+
+
+def test_lumpy_demand_adds_safety_stock():
+    # 14 used in the first week only: weekly std is sqrt(36.75) over four weeks
+    plan = plan_for(
+        [("p3", "V1", "Valve", 10.0, 30, 0, 14)],
+        [("p3", 14, "2026-01-03T09:00:00+00:00")],
+    )
+    row = plan.loc["p3"]
+    assert row["daily_rate"] == 0.5
+    assert row["safety_stock"] == pytest.approx(1.65 * 36.75 ** 0.5 * 2 ** 0.5, abs=0.05)
+    assert row["reorder_point"] == 22
+    assert row["suggested_order_quantity"] == 0
+
+
+def test_stock_at_the_reorder_point_triggers_an_order():
+    plan = plan_for(
+        [("p4", "C1", "Coil", 1.0, 7, 0, 7)],
+        [("p4", 7, f"2026-01-{day:02d}T10:00:00+00:00") for day in (2, 9, 16, 23)],
+    )
+    assert plan.loc["p4", "suggested_order_quantity"] == 7 + REVIEW_PERIOD_DAYS - 7
+
+
+def test_usage_outside_the_window_lands_in_the_edge_weeks():
+    plan = plan_for(
+        [("p5", "S1", "Seal", 1.0, 100, 0, 7)],
+        [("p5", 3, "2026-01-29T23:00:00+00:00"), ("p5", 1, "2026-01-01T00:00:00+00:00")],
+    )
+    assert plan.loc["p5", "used_quantity"] == 4
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from services.pm_schedule import (
+    add_months,
+    compute_pm_schedule,
+    format_timestamps,
+    next_pm_due_from,
+    parse_timestamps,
+    DEFAULT_PM_INTERVAL_MONTHS,
+)
+
+
+def shift(dates, months):
+    return format_timestamps(add_months(parse_timestamps(dates), np.array(months, dtype=np.int64)))
+
+
+@pytest.mark.parametrize("date, months, expected", [
+    ("2026-01-31", 1, "2026-02-28"),
+    ("2028-01-31", 1, "2028-02-29"),
+    ("2026-03-31", 1, "2026-04-30"),
+    ("2026-08-31", 6, "2027-02-28"),
+    ("2026-01-15", 1, "2026-02-15"),
+    ("2026-11-30", 3, "2027-02-28"),
+    ("2026-02-28", 12, "2027-02-28"),
+    ("2028-02-29", 12, "2029-02-28"),
+    ("2026-05-31", -1, "2026-04-30"),
+    ("2026-12-31", 0, "2026-12-31"),
+])
+def test_add_months_clamps_to_month_end(date, months, expected):
+    assert shift([date], [months]) == [f"{expected}T00:00:00.000000+00:00"]
+
+
+def test_add_months_keeps_time_of_day_and_nat():
+    assert shift(["2026-01-31T13:45:10.5+00:00", None, "garbage"], [1, 1, 1]) == [
+        "2026-02-28T13:45:10.500000+00:00", None, None,
+    ]
+
+
+def test_next_pm_due_from():
+    assert next_pm_due_from("2026-08-31T09:00:00+00:00", 6) == "2027-02-28T09:00:00.000000+00:00"
+    assert next_pm_due_from("2026-01-10", None) == shift(["2026-01-10"], [DEFAULT_PM_INTERVAL_MONTHS])[0]
+    assert next_pm_due_from(None, 6) is None
+    assert next_pm_due_from("not a date", 6) is None
+
+
+def test_compute_pm_schedule_returns_changed_rows_only():
+    assets = pd.DataFrame([
+        # Last service wins over install date
+        {"id": "a1", "install_date": "2025-01-01", "last_service_date": "2026-01-31",
+         "pm_interval_months": 1, "next_pm_due": None},
+        # Already correct
+        {"id": "a2", "install_date": "2026-03-31", "last_service_date": None,
+         "pm_interval_months": 6, "next_pm_due": "2026-09-30T00:00:00+00:00"},
+        # No dates at all
+        {"id": "a3", "install_date": None, "last_service_date": None,
+         "pm_interval_months": 6, "next_pm_due": None},
+        # Interval falls back to the default
+        {"id": "a4", "install_date": "2026-01-31", "last_service_date": None,
+         "pm_interval_months": None, "next_pm_due": None},
+    ])
+    changed = compute_pm_schedule(assets).set_index("id")["next_pm_due"].to_dict()
+    assert changed == {
+        "a1": "2026-02-28T00:00:00.000000+00:00",
+        "a4": shift(["2026-01-31"], [DEFAULT_PM_INTERVAL_MONTHS])[0],
+    }
@@ -0,0 +1,32 @@
+import pytest
+from fastapi import HTTPException
+
+from services.sync import decode_cursor, encode_cursor, _strip_embeds
+
+
+def test_cursor_round_trip():
+    state = {"v": 1, "full": None, "pos": {"jobs": ["2026-10-01T00:00:00+00:00", "j1"], "parts": None}}
+    cursor = encode_cursor(state)
+    assert decode_cursor(cursor) == state
+
+
+@pytest.mark.parametrize("cursor", [
+    "garbage!!",
+    encode_cursor({"v": 2, "pos": {}}),
+    encode_cursor({"v": 1, "pos": []}),
+    "e30=",  # {}
+    "WzFd",  # [1]
+])
+def test_invalid_cursor_is_rejected(cursor):
+    with pytest.raises(HTTPException) as exc:
+        decode_cursor(cursor)
+    assert exc.value.status_code == 400
+
+
+def test_scope_embeds_are_removed_from_rows():
+    sites = _strip_embeds("sites", [{"id": "s1", "jobs": [{"id": "j1"}]}])
+    assets = _strip_embeds("assets", [{"id": "a1", "job_assets": [{"jobs": {"id": "j1"}}]}])
+    parts = _strip_embeds("parts", [{"id": "p1", "jobs": "kept"}])
+    assert sites == [{"id": "s1"}]
+    assert assets == [{"id": "a1"}]
+    assert parts == [{"id": "p1", "jobs": "kept"}]